@@ -0,0 +1,124 @@
+import json
+import re
+
+# --- Config ---
+
+CATALOG_FILE = "accessories.json"
+
+# Tier words in upgrade order, e.g. ANITA_TALISMAN < ANITA_RING < ANITA_ARTIFACT
+TIER_WORDS = ["TALISMAN", "BADGE", "RING", "ARTIFACT", "RELIC", "HEIRLOOM"]
+
+RARITY_ORDER = ["COMMON", "UNCOMMON", "RARE", "EPIC", "LEGENDARY", "MYTHIC"]
+
+# Upgrade lines the id patterns can't see, lowest tier first
+UPGRADE_CHAINS = {
+    "COINS": ["COIN_TALISMAN", "RING_OF_COINS", "ARTIFACT_OF_COINS", "RELIC_OF_COINS"],
+    "SHARK_TOOTH_NECKLACE": [
+        "RAGGEDY_SHARK_TOOTH_NECKLACE",
+        "DULL_SHARK_TOOTH_NECKLACE",
+        "HONED_SHARK_TOOTH_NECKLACE",
+        "SHARP_SHARK_TOOTH_NECKLACE",
+        "RAZOR_SHARP_SHARK_TOOTH_NECKLACE",
+    ],
+    "JERRY_TALISMAN": ["JERRY_TALISMAN_GREEN", "JERRY_TALISMAN_BLUE", "JERRY_TALISMAN_PURPLE", "JERRY_TALISMAN_GOLDEN"],
+    "SCARF": ["SCARF_STUDIES", "SCARF_THESIS", "SCARF_GRIMOIRE"],
+    "SOULFLOW": ["SOULFLOW_PILE", "SOULFLOW_BATTERY", "SOULFLOW_SUPERCELL"],
+    "ODGERS_TOOTH": ["ODGERS_BRONZE_TOOTH", "ODGERS_SILVER_TOOTH", "ODGERS_GOLD_TOOTH", "ODGERS_DIAMOND_TOOTH"],
+    "KUUDRA_CORE": ["BURNING_KUUDRA_CORE", "FIERY_KUUDRA_CORE", "INFERNAL_KUUDRA_CORE"],
+    "FISH_BOWL": ["SMALL_FISH_BOWL", "MEDIUM_FISH_BOWL", "LARGE_FISH_BOWL"],
+    "PIGGY_BANK": ["BROKEN_PIGGY_BANK", "CRACKED_PIGGY_BANK", "PIGGY_BANK"],
+    "CAT_TALISMAN": ["CAT_TALISMAN", "LYNX_TALISMAN", "CHEETAH_TALISMAN"],
+    "SHADY_RING": ["SHADY_RING", "CROOKED_ARTIFACT", "SEAL_OF_THE_FAMILY"],
+    "BLUETOOTH_RING": ["BLUETOOTH_RING", "BLUERTOOTH_RING"],
+    "IQ_POINT": ["IQ_POINT", "TWO_IQ_POINT"],
+    "CHOCOLATE": [
+        "NIBBLE_CHOCOLATE_STICK",
+        "SMOOTH_CHOCOLATE_BAR",
+        "RICH_CHOCOLATE_CHUNK",
+        "GANACHE_CHOCOLATE_SLAB",
+        "PRESTIGE_CHOCOLATE_REALM",
+    ],
+    # Wolf Paw is its own accessory, not part of the Wolf Talisman line
+    "WOLF_PAW": ["WOLF_PAW"],
+}
+
+# id -> (family, rank), flattened from UPGRADE_CHAINS
+FAMILY_OVERRIDES = {
+    item_id: (family, rank)
+    for family, chain in UPGRADE_CHAINS.items()
+    for rank, item_id in enumerate(chain)
+}
+
+NUMBERED_ID = re.compile(r"^(.+)_(\d+)$")
+
+
+def classify(item_id):
+    """
+    Work out (family, rank) for an accessory id.
+    Higher rank = further up the upgrade line; ids that match no pattern are their own family.
+    """
+    if item_id in FAMILY_OVERRIDES:
+        return FAMILY_OVERRIDES[item_id]
+
+    # CAMPFIRE_TALISMAN_12, MASTER_SKULL_TIER_4, PERSONAL_DELETOR_6000, ...
+    numbered = NUMBERED_ID.match(item_id)
+    if numbered:
+        return numbered.group(1), int(numbered.group(2))
+
+    parts = item_id.split("_")
+    if len(parts) > 1:
+        # BEASTMASTER_CREST_EPIC
+        if parts[-1] in RARITY_ORDER:
+            return "_".join(parts[:-1]), RARITY_ORDER.index(parts[-1])
+        # ANITA_RING, PESTHUNTER_BADGE
+        if parts[-1] in TIER_WORDS:
+            return "_".join(parts[:-1]), TIER_WORDS.index(parts[-1])
+        # RING_OF_SPACE, ARTIFACT_POTION_AFFINITY
+        if parts[0] in TIER_WORDS:
+            rest = parts[2:] if parts[1] == "OF" and len(parts) > 2 else parts[1:]
+            return "_".join(rest), TIER_WORDS.index(parts[0])
+
+    return item_id, 0
+
+
+# --- Index ---
+
+class FamilyIndex:
+    """Precomputed id -> (family, rank) map with the members of each family in upgrade order."""
+
+    def __init__(self, item_ids):
+        self.by_id = {}
+        self.members = {}
+        for item_id in item_ids:
+            if item_id is None or item_id in self.by_id:
+                continue
+            family, rank = classify(item_id)
+            self.by_id[item_id] = (family, rank)
+            self.members.setdefault(family, []).append(item_id)
+        for ids in self.members.values():
+            ids.sort(key=lambda i: self.by_id[i][1])
+
+    def family_of(self, item_id):
+        """Family name for an id; unknown ids are classified on the fly."""
+        entry = self.by_id.get(item_id)
+        return entry[0] if entry else classify(item_id)[0] if item_id else None
+
+    def rank_of(self, item_id):
+        entry = self.by_id.get(item_id)
+        return entry[1] if entry else classify(item_id)[1] if item_id else 0
+
+    def chains(self):
+        """Families with more than one member, lowest tier first."""
+        return {family: ids for family, ids in self.members.items() if len(ids) > 1}
+
+
+def load_family_index(path=CATALOG_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    return FamilyIndex(acc.get("id") for acc in catalog)
+
+
+if __name__ == "__main__":
+    index = load_family_index()
+    for family, ids in sorted(index.chains().items()):
+        print(f"{family}: {' < '.join(ids)}")
@@ -0,0 +1,168 @@
+import argparse
+import glob
+import json
+import os
+from math import inf
+
+import numpy as np
+
+import talisman
+from catalog import CATALOG_FILE, load_catalog
+
+# --- Config ---
+
+PROFILES_DIR = "profiles"
+PLANS_DIR = "plans"
+
+
+def load_profiles(paths, name_to_id, known_ids):
+    """
+    Read owned-accessory profiles. Each file is either a list of accessory ids/names
+    or {"owned": [...]}; the file name (without .json) names the player.
+    """
+    profiles = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        owned = data.get("owned", []) if isinstance(data, dict) else data
+        ids = []
+        for entry in owned:
+            item_id = entry if entry in known_ids else name_to_id.get(entry)
+            if item_id is None:
+                print(f"[WARN] {os.path.basename(path)}: unknown accessory {entry!r}")
+                continue
+            ids.append(item_id)
+        profiles.append((os.path.splitext(os.path.basename(path))[0], ids))
+    return profiles
+
+
+# --- Planner ---
+
+class BatchPlanner:
+    """
+    Plans for many players against one shared catalog.
+
+    Only the MP a player already has in each upgrade family changes their plan,
+    and a family has just a handful of possible levels. So the upgrade chain of
+    every (family, owned level) pair is computed once up front; a player's plan is
+    then a mask over those steps plus an argsort, done for all players at once.
+    """
+
+    def __init__(self, accessories, index, recombo_price, catalog=()):
+        self.index = index
+        self.recombo_price = recombo_price
+        # Priced rows win over bare catalog rows (they carry the fixed-up rarity)
+        self.by_id = {a.id: a for a in catalog}
+        self.by_id.update((a.id, a) for a in accessories)
+        parsed = talisman.parse_accessories(accessories)
+
+        members = {}
+        for item in parsed:
+            members.setdefault(index.family_of(item["id"]), []).append(item)
+        # Catalog position breaks coins/MP ties, same as rank_by_family's heap
+        position = {(item["id"], item["rarity"]): i for i, item in enumerate(parsed)}
+        self.families = sorted(members)
+        family_code = {f: i for i, f in enumerate(self.families)}
+
+        # Possible owned MP per family: nothing, or any member's MP
+        self.levels = []
+        for family in self.families:
+            mps = {0}
+            for item_id in index.members.get(family, []):
+                acc = self.by_id.get(item_id)
+                if acc is not None:
+                    mps.add(talisman.magical_power.get(acc.rarity_label or "COMMON", 0))
+            mps.update(item["mp"] for item in members[family])
+            self.levels.append({mp: level for level, mp in enumerate(sorted(mps))})
+
+        self.steps = []
+        step_family, step_level, step_key, step_tie = [], [], [], []
+        for family in self.families:
+            code = family_code[family]
+            for mp, level in self.levels[code].items():
+                chain = talisman.rank_by_family(members[family], index, {family: mp})
+                # A step can't come before its predecessor, so it sorts at the
+                # highest coins/MP seen so far along its chain
+                key = -inf
+                for step in chain:
+                    key = max(key, step["coins_per_mp"])
+                    self.steps.append(step)
+                    step_family.append(code)
+                    step_level.append(level)
+                    step_key.append(key)
+                    step_tie.append(position[(step["id"], step["rarity"])])
+
+        # Pre-sort once so the stable per-player argsort keeps this tie order
+        order = np.lexsort((np.asarray(step_tie), np.asarray(step_key)))
+        self.steps = [self.steps[i] for i in order]
+        self.step_family = np.asarray(step_family, dtype=np.int32)[order]
+        self.step_level = np.asarray(step_level, dtype=np.int32)[order]
+        self.step_key = np.asarray(step_key, dtype=np.float64)[order]
+        self.family_code = family_code
+
+    def owned_levels(self, profiles):
+        """(players x families) matrix of the level each player already owns."""
+        levels = np.zeros((len(profiles), len(self.families)), dtype=np.int32)
+        for p, (_, owned) in enumerate(profiles):
+            for family, mp in talisman.owned_family_mp(owned, self.by_id, self.index).items():
+                code = self.family_code.get(family)
+                if code is None:
+                    continue
+                # Owning something between known levels counts as the level below it
+                known = [m for m in self.levels[code] if m <= mp]
+                levels[p, code] = self.levels[code][max(known)]
+        return levels
+
+    def rank(self, profiles):
+        """Ranked remaining purchases for every profile, as lists of step rows."""
+        levels = self.owned_levels(profiles)
+        mask = levels[:, self.step_family] == self.step_level[None, :]
+        keys = np.where(mask, self.step_key[None, :], inf)
+        order = np.argsort(keys, axis=1, kind="stable")
+        counts = mask.sum(axis=1)
+        return [[self.steps[s] for s in order[p, :counts[p]]] for p in range(len(profiles))]
+
+    def plan(self, profiles):
+        return [
+            talisman.build_plan(ranked, self.recombo_price, verbose=False)
+            for ranked in self.rank(profiles)
+        ]
+
+
+# --- Main ---
+
+def main(profile_paths, out_dir=PLANS_DIR):
+    accessories = talisman.load_accessories()
+    index = talisman.family_index_for(accessories)
+    catalog = load_catalog(CATALOG_FILE, missing_ok=True)
+    name_to_id = {a.name: a.id for a in list(catalog) + list(accessories)}
+    known_ids = set(catalog.by_id) | set(accessories.by_id)
+
+    profiles = load_profiles(profile_paths, name_to_id, known_ids)
+    if not profiles:
+        print("No profiles found.")
+        return
+
+    planner = BatchPlanner(accessories, index, talisman.fetch_recombobulator_price(), catalog)
+    plans = planner.plan(profiles)
+
+    os.makedirs(out_dir, exist_ok=True)
+    for (name, owned), plan in zip(profiles, plans):
+        path = os.path.join(out_dir, f"{name}.json")
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(plan, fh, indent=4, ensure_ascii=False)
+
+    print(f"Saved {len(plans)} plans to {out_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan accessory upgrades for many players at once.")
+    parser.add_argument("profiles", nargs="*", default=[PROFILES_DIR],
+                        help=f"profile JSON files or directories of them (default {PROFILES_DIR}/)")
+    parser.add_argument("--out", default=PLANS_DIR, help=f"output directory (default {PLANS_DIR}/)")
+    args = parser.parse_args()
+
+    paths = []
+    for p in args.profiles:
+        paths.extend(sorted(glob.glob(os.path.join(p, "*.json"))) if os.path.isdir(p) else [p])
+    main(paths, args.out)
@@ -0,0 +1,240 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from cofl_stub import CoflStub
+
+# --- Config ---
+
+RESULTS_FILE = "benchmark_results.jsonl"
+SIZES = [400, 4_000, 40_000]
+STAGES = ["filter", "price", "plan"]
+
+RARITIES = ["COMMON", "UNCOMMON", "RARE", "EPIC", "LEGENDARY", "MYTHIC"]
+TIERS = [("Talisman", "TALISMAN"), ("Ring", "RING"), ("Artifact", "ARTIFACT"), ("Relic", "RELIC")]
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def synthetic_catalog(size, seed=0):
+    """accessories.json-shaped catalog of `size` entries in upgrade families of 1-4 tiers."""
+    from filter_accessories import REMOVE_NAMES, SOULBOUND_NAMES
+
+    rng = random.Random(seed)
+    # A sprinkling of names every filter rule matches
+    caught = sorted(REMOVE_NAMES) + sorted(SOULBOUND_NAMES) + ["Campfire Adept Badge II", "Ring of Love"]
+    catalog = []
+    family = 0
+    while len(catalog) < size:
+        family += 1
+        start = rng.randint(0, 3)
+        for k in range(rng.randint(1, len(TIERS))):
+            word, suffix = TIERS[k]
+            name = f"Synthetic {family} {word}"
+            if rng.random() < 0.05:
+                name = caught[rng.randrange(len(caught))]
+            catalog.append({
+                "id": f"SYN{family}_{suffix}",
+                "name": name,
+                "rarity": RARITIES[min(start + k, len(RARITIES) - 1)],
+                "auction_price": None,
+                "craft_price": None,
+                "npc_price": None
+            })
+    return catalog[:size]
+
+
+# --- Measurement ---
+
+def run_quietly(fn):
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+
+
+def measure(fn, stub=None, prepare=None, memory=True):
+    """
+    Time one stage, then re-run it under tracemalloc for peak memory
+    (tracing slows Python down, so it is kept out of the timed pass).
+    """
+    if prepare:
+        prepare()
+    if stub:
+        stub.reset_counters()
+    start = time.perf_counter()
+    run_quietly(fn)
+    seconds = time.perf_counter() - start
+    requests = stub.requests if stub else 0
+
+    peak = None
+    if memory:
+        if prepare:
+            prepare()
+        tracemalloc.start()
+        try:
+            run_quietly(fn)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "seconds": round(seconds, 4),
+        "requests": requests,
+        "requests_per_s": round(requests / seconds, 1) if requests and seconds else None,
+        "peak_mb": round(peak / 2**20, 2) if peak is not None else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- Results ---
+
+def load_results(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def previous_result(history, result):
+    """Latest earlier result for the same stage, size and stub settings."""
+    for old in reversed(history):
+        if all(old.get(k) == result[k] for k in ("stage", "size", "workers", "stub")):
+            return old
+    return None
+
+
+def report(results, history):
+    print(f"{'stage':<8}{'size':>8}{'seconds':>10}{'req/s':>10}{'peak MB':>10}  vs previous")
+    for r in results:
+        old = previous_result(history, r)
+        delta = ""
+        if old and old.get("seconds"):
+            delta = f"{(r['seconds'] - old['seconds']) / old['seconds'] * 100:+.1f}% ({old.get('revision') or '?'})"
+        rps = r["requests_per_s"] if r["requests_per_s"] is not None else "-"
+        peak = r["peak_mb"] if r["peak_mb"] is not None else "-"
+        print(f"{r['stage']:<8}{r['size']:>8}{r['seconds']:>10.3f}{rps:>10}{peak:>10}  {delta}")
+
+
+# --- Main ---
+
+def run(sizes, stages, workers, stub_options, memory=True, results_file=RESULTS_FILE):
+    stub = CoflStub(**stub_options).start()
+    os.environ["COFL_API"] = stub.api_url
+
+    # Imported only now so their endpoint constants pick up COFL_API
+    import filter_accessories
+    import price_accessories
+    import talisman
+    from response_cache import ResponseCache
+    for module in (price_accessories, talisman):
+        importlib.reload(module)
+
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "workers": workers,
+        "stub": stub_options,
+    }
+    results_path = os.path.abspath(results_file)
+    history = load_results(results_path)
+    results = []
+    cwd = os.getcwd()
+
+    try:
+        for size in sizes:
+            with tempfile.TemporaryDirectory(prefix=f"bench{size}-") as workdir:
+                os.chdir(workdir)
+                with open("accessories.json", "w", encoding="utf-8") as f:
+                    json.dump(synthetic_catalog(size), f, indent=2)
+
+                # Every stage needs its predecessor's output on disk
+                run_quietly(filter_accessories.filter_accessories)
+
+                def prepare_price():
+                    # Unthrottled: the stand-in is local, so polite_delay() is skipped too
+                    price_accessories.configure_rate_limit(1e9, 1e9)
+                    price_accessories.configure_cache(None)
+                    price_accessories.configure_crafting()
+                    price_accessories._auction_tiers.clear()
+
+                def prepare_plan():
+                    # Recombobulator price comes from a warm cache, keeping polite_delay() out of the timing
+                    talisman.response_cache = ResponseCache("bench_cache.sqlite")
+                    run_quietly(talisman.fetch_recombobulator_price)
+
+                stage_runs = {
+                    "filter": (filter_accessories.filter_accessories, None, None),
+                    "price": (lambda: price_accessories.fix_missing_prices(workers=workers), stub, prepare_price),
+                    "plan": (talisman.main, None, prepare_plan),
+                }
+                for stage in STAGES:
+                    if stage not in stages:
+                        if stage == "price":
+                            prepare_price()
+                            run_quietly(stage_runs["price"][0])
+                        continue
+                    fn, stage_stub, prepare = stage_runs[stage]
+                    result = dict(meta, stage=stage, size=size, **measure(fn, stage_stub, prepare, memory))
+                    results.append(result)
+                    print(f"[BENCH] {stage} x{size}: {result['seconds']:.3f}s")
+
+                talisman.response_cache = None
+                os.chdir(cwd)
+    finally:
+        os.chdir(cwd)
+        stub.shutdown()
+
+    report(results, history)
+    with open(results_path, "a", encoding="utf-8") as f:
+        for r in results:
+            f.write(json.dumps(r) + "\n")
+    print(f"Appended {len(results)} results to {results_path}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the filter, price and plan stages.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="synthetic catalog sizes")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--workers", type=int, default=16, help="price stage fetch threads")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="stand-in random extra latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory pass")
+    parser.add_argument("--results", default=RESULTS_FILE, help=f"results history (default {RESULTS_FILE})")
+    args = parser.parse_args()
+
+    run(
+        args.sizes,
+        args.stages,
+        args.workers,
+        {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "throttle_rate": args.throttle_rate,
+        },
+        memory=not args.no_memory,
+        results_file=args.results,
+    )
@@ -0,0 +1,230 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import tarfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from catalog import CATALOG_FILE, Accessory, Rarity, save_records, strip_formatting
+
+# --- Config ---
+
+# Per-item JSON files, e.g. a checked-out item repository's items/ folder,
+# or a .zip / .tar(.gz) of one
+ITEMS_SOURCE = "items"
+OUTPUT_FILE = CATALOG_FILE
+
+# Parsed entry per source file, keyed by (size, mtime) and content hash
+CACHE_FILE = ".catalog_cache.json"
+
+# Item types (the last word of the rarity line, "§6§lLEGENDARY ACCESSORY") that go into the catalog
+ACCESSORY_TYPES = ("ACCESSORY", "HATCESSORY")
+
+# Bump when parse_item changes, so cached entries are parsed again
+PARSER_VERSION = 1
+
+# Files in flight per worker process; keeps archives from being read into memory all at once
+WINDOW_PER_WORKER = 64
+
+RARITY_LINE = re.compile(r"\b(VERY SPECIAL|[A-Z]+)(?: DUNGEON)? (" + "|".join(ACCESSORY_TYPES) + r")\b")
+
+
+# --- Parsing ---
+
+def parse_item(data):
+    """{"id", "name", "rarity"} for an accessory's item JSON, or None for anything else."""
+    if not isinstance(data, dict):
+        return None
+    item_id = data.get("internalname")
+    lore = data.get("lore") or []
+    for line in reversed(lore):
+        text = strip_formatting(line).strip()
+        if text:
+            break
+    else:
+        return None
+    match = RARITY_LINE.search(text)
+    if not item_id or match is None:
+        return None
+    try:
+        rarity = Rarity.parse(match.group(1))
+    except ValueError:
+        rarity = None
+    return {
+        "id": item_id,
+        "name": strip_formatting(data.get("displayname") or item_id).strip(),
+        "rarity": rarity.label if rarity is not None else None,
+    }
+
+
+def read_item(task):
+    """
+    Worker: hash one file's bytes and parse it unless the hash matches the cached one.
+    `source` is a path (read here, in the worker) or the bytes of an archive member.
+    Returns (key, digest, entry), with entry None for non-accessories and ... for "same as cached".
+    """
+    key, source, cached_digest = task
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            source = f.read()
+    digest = hashlib.sha256(source).hexdigest()
+    if digest == cached_digest:
+        return key, digest, ...
+    try:
+        entry = parse_item(json.loads(source))
+    except ValueError:
+        print(f"[WARN] {key}: not valid JSON, skipped")
+        entry = None
+    return key, digest, entry
+
+
+# --- Sources ---
+
+def scan_source(source, cached):
+    """
+    Yield (key, stamp, task) for every .json file under `source` (a directory or
+    archive). `task` is None when the stamp matches the cache, so the file is never read.
+    """
+    def item(key, stamp, load):
+        entry = cached.get(key)
+        if entry is not None and entry[0] == stamp:
+            return key, stamp, None
+        return key, stamp, (key, load(), entry[1] if entry is not None else None)
+
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    st = os.stat(path)
+                    yield item(os.path.relpath(path, source).replace(os.sep, "/"),
+                               [st.st_size, st.st_mtime_ns], lambda: path)
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if info.filename.endswith(".json"):
+                    yield item(info.filename, [info.file_size, info.CRC], lambda: archive.read(info))
+    else:
+        # Streamed member by member, so compressed tarballs are read in one pass
+        with tarfile.open(source, "r|*") as archive:
+            for member in archive:
+                if member.isfile() and member.name.endswith(".json"):
+                    yield item(member.name, [member.size, member.mtime],
+                               lambda: archive.extractfile(member).read())
+
+
+def stream_results(tasks, workers=None):
+    """read_item over `tasks` on a process pool, with a bounded number in flight; yields results as they finish."""
+    if workers == 1:
+        for task in tasks:
+            yield read_item(task)
+        return
+    workers = workers or os.cpu_count() or 1
+    window = WINDOW_PER_WORKER * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for task in tasks:
+            pending.add(pool.submit(read_item, task))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+# --- Cache ---
+
+def cache_config():
+    return [PARSER_VERSION, list(ACCESSORY_TYPES)]
+
+
+def load_cache(path=CACHE_FILE):
+    """{key: [stamp, digest, entry]} from the last build, or {} if it was made with other settings."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return data.get("files", {}) if data.get("config") == cache_config() else {}
+
+
+def save_cache(files, path=CACHE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"config": cache_config(), "files": files}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+# --- Build ---
+
+def build_catalog(source=ITEMS_SOURCE, out=OUTPUT_FILE, cache_file=CACHE_FILE, workers=None):
+    """
+    Regenerate `out` from the item files in `source`: every accessory-type item
+    with its name (formatting codes stripped) and rarity, sorted by id, prices empty.
+    Files whose stamp or content hash is unchanged since the last build are not parsed again.
+    Returns the number of accessories written.
+    """
+    cached = load_cache(cache_file)
+    files = {}
+    tasks = []
+
+    def pending_tasks():
+        for key, stamp, task in scan_source(source, cached):
+            if task is None:
+                files[key] = cached[key]
+            else:
+                files[key] = [stamp, None, None]
+                tasks.append(key)
+                yield task
+
+    for key, digest, entry in stream_results(pending_tasks(), workers):
+        if entry is ...:
+            entry = cached[key][2]
+        files[key][1:] = [digest, entry]
+
+    reparsed = sum(1 for key in tasks if key not in cached or files[key][1] != cached[key][1])
+    print(f"[SCAN] {len(files)} files, {len(tasks)} changed on disk, {reparsed} parsed")
+    save_cache(files, cache_file)
+
+    # One row per id; the first file in key order wins if a dump has duplicates
+    by_id = {}
+    for key in sorted(files):
+        entry = files[key][2]
+        if entry is not None:
+            by_id.setdefault(entry["id"], entry)
+    records = [
+        Accessory(entry["id"], entry["name"], Rarity.parse(entry["rarity"]))
+        for entry in sorted(by_id.values(), key=lambda e: e["id"])
+    ]
+
+    try:
+        with open(out, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    except FileNotFoundError:
+        previous = None
+    rows = [acc.to_dict() for acc in records]
+    if rows == previous:
+        print(f"{out} unchanged ({len(rows)} accessories)")
+        return len(rows)
+    if previous is not None:
+        old_ids = {row.get("id") for row in previous}
+        new_ids = set(by_id)
+        print(f"[DIFF] {len(new_ids - old_ids)} added, {len(old_ids - new_ids)} removed")
+    save_records(records, out)
+    print(f"Saved {len(records)} accessories to {out}")
+    return len(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Regenerate {OUTPUT_FILE} from a local dump of per-item JSON files.")
+    parser.add_argument("source", nargs="?", default=ITEMS_SOURCE,
+                        help=f"directory, .zip or .tar(.gz) of item JSON files (default {ITEMS_SOURCE}/)")
+    parser.add_argument("--out", default=OUTPUT_FILE, help=f"output file (default {OUTPUT_FILE})")
+    parser.add_argument("--cache", default=CACHE_FILE, help=f"parsed-file cache (default {CACHE_FILE})")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    args = parser.parse_args()
+    build_catalog(args.source, args.out, args.cache, args.workers)
@@ -0,0 +1,456 @@
+import argparse
+import json
+import os
+import re
+from enum import IntEnum
+from math import isnan, nan
+
+from snapshot import Snapshot, write_snapshot
+
+# --- Config ---
+
+CATALOG_FILE = "accessories.json"
+
+# Price fields stored per accessory (bin_price last so older snapshots keep their bit layout)
+PRICE_FIELDS = ("auction_price", "craft_price", "npc_price", "bin_price")
+
+# How best_price() picks the market price: the lower of the recent-sales median
+# (auction_price) and the lowest BIN, the BIN only, or the median only
+PRICE_POLICIES = ("min", "bin", "median")
+DEFAULT_PRICE_POLICY = "min"
+
+# Columnar copies of the JSON files (see snapshot.py) use this extension
+SNAPSHOT_SUFFIX = ".snap"
+
+# Set by configure_snapshots() (or SKYNESS_SNAPSHOTS=1): also write a snapshot beside every saved JSON file
+write_snapshots = os.environ.get("SKYNESS_SNAPSHOTS", "") not in ("", "0")
+
+# Magical Power per Rarity
+magical_power = {
+    "COMMON": 3,
+    "UNCOMMON": 5,
+    "RARE": 8,
+    "EPIC": 12,
+    "LEGENDARY": 16,
+    "MYTHIC": 22,
+    "SPECIAL": 3,
+    "VERY SPECIAL": 5
+}
+
+
+# Minecraft formatting codes in item names, e.g. the "§e" of "§eShiny Yellow Rock"
+FORMATTING_CODE = re.compile("§.")
+
+
+def strip_formatting(text):
+    """`text` without Minecraft colour/style codes."""
+    return FORMATTING_CODE.sub("", text) if text else text
+
+
+KNOWN_FIELDS = frozenset((
+    "id", "name", "rarity", "auction_price", "craft_price", "npc_price", "bin_price",
+    "craft_breakdown", "price_source", "priced_at", "fetch_error",
+))
+
+
+class Rarity(IntEnum):
+    """Item tiers; the JSON files spell them as in-game, e.g. "VERY SPECIAL". Numbered from 1 so every tier is truthy."""
+
+    COMMON = 1
+    UNCOMMON = 2
+    RARE = 3
+    EPIC = 4
+    LEGENDARY = 5
+    MYTHIC = 6
+    DIVINE = 7
+    SUPREME = 8
+    SPECIAL = 9
+    VERY_SPECIAL = 10
+    ULTIMATE = 11
+    ADMIN = 12
+
+    @property
+    def label(self):
+        return self.name.replace("_", " ")
+
+    @classmethod
+    def parse(cls, text):
+        """Rarity for a JSON spelling ("VERY SPECIAL", "rare"); None stays None."""
+        if not text:
+            return None
+        try:
+            return cls[text.strip().upper().replace(" ", "_")]
+        except KeyError:
+            raise ValueError(f"unknown rarity: {text!r}") from None
+
+
+_RARITY_LABELS = {r.label: r for r in Rarity}
+
+
+# --- Records ---
+
+class Accessory:
+    """
+    One catalog row. Fields live in slots rather than a per-row dict; rarity is a
+    Rarity (or None) and prices are plain numbers or None. Keys this class doesn't
+    know about are kept in `extra` so files round-trip unchanged.
+    """
+
+    __slots__ = (
+        "id", "name", "rarity", "auction_price", "craft_price", "npc_price", "bin_price",
+        "craft_breakdown", "price_source", "priced_at", "fetch_error", "extra",
+    )
+
+    def __init__(self, id, name, rarity=None, auction_price=None, craft_price=None, npc_price=None,
+                 bin_price=None):
+        self.id = id
+        self.name = name
+        self.rarity = rarity
+        self.auction_price = auction_price
+        self.craft_price = craft_price
+        self.npc_price = npc_price
+        self.bin_price = bin_price
+        self.craft_breakdown = None
+        self.price_source = None
+        self.priced_at = None
+        self.fetch_error = None
+        self.extra = None
+
+    @classmethod
+    def from_dict(cls, data):
+        get = data.get
+        rarity = get("rarity")
+        tier = _RARITY_LABELS.get(rarity)
+        if tier is None and rarity:
+            try:
+                tier = Rarity.parse(rarity)
+            except ValueError:
+                # A tier this version doesn't know: no MP, so the planner skips the entry
+                print(f"[WARN] {get('name')}: unknown rarity {rarity!r}, treated as missing")
+        acc = cls(
+            get("id"),
+            get("name"),
+            tier,
+            get("auction_price"),
+            get("craft_price"),
+            get("npc_price"),
+            get("bin_price"),
+        )
+        acc.craft_breakdown = get("craft_breakdown")
+        acc.price_source = get("price_source")
+        acc.priced_at = get("priced_at")
+        acc.fetch_error = get("fetch_error")
+        if not KNOWN_FIELDS.issuperset(data):
+            acc.extra = {k: v for k, v in data.items() if k not in KNOWN_FIELDS}
+        if tier is None and rarity:
+            # Written back as it was spelled (to_dict applies `extra` last)
+            acc.extra = dict(acc.extra or {}, rarity=rarity)
+        return acc
+
+    def to_dict(self):
+        """The JSON form; pricing metadata is only written once an entry has been priced."""
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "rarity": self.rarity_label,
+            "auction_price": self.auction_price,
+            "craft_price": self.craft_price,
+            "npc_price": self.npc_price,
+        }
+        if self.bin_price is not None:
+            data["bin_price"] = self.bin_price
+        if self.craft_breakdown is not None:
+            data["craft_breakdown"] = self.craft_breakdown
+        if self.priced_at is not None:
+            data["price_source"] = self.price_source
+            data["priced_at"] = self.priced_at
+        if self.fetch_error is not None:
+            data["fetch_error"] = self.fetch_error
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def copy(self, **changes):
+        clone = Accessory.__new__(Accessory)
+        for field in self.__slots__:
+            setattr(clone, field, getattr(self, field))
+        if clone.extra:
+            clone.extra = dict(clone.extra)
+        for field, value in changes.items():
+            setattr(clone, field, value)
+        return clone
+
+    @property
+    def rarity_label(self):
+        return self.rarity.label if self.rarity is not None else None
+
+    def market_price(self, policy=DEFAULT_PRICE_POLICY):
+        """Auction-house price as a float per `policy` (see PRICE_POLICIES), or None."""
+        median_price, bin_price = _number(self.auction_price), _number(self.bin_price)
+        if policy == "median":
+            return median_price
+        if policy == "bin":
+            return bin_price
+        if policy != "min":
+            raise ValueError(f"unknown price policy: {policy!r}")
+        if median_price is None or bin_price is None:
+            return median_price if bin_price is None else bin_price
+        return min(median_price, bin_price)
+
+    def best_price(self, policy=DEFAULT_PRICE_POLICY):
+        """First available price (market > craft > npc) as a float, or None."""
+        for value in (self.market_price(policy), _number(self.craft_price), _number(self.npc_price)):
+            if value is not None:
+                return value
+        return None
+
+    def __repr__(self):
+        return f"Accessory({self.id!r}, {self.name!r}, {self.rarity_label!r})"
+
+
+def _number(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# --- Catalog ---
+
+class Catalog:
+    """
+    Accessory records in file order with O(1) lookups by id and by name.
+    Both can repeat (Runebook has a row per rarity, the Beastmaster Crests share
+    a name): the indexes hold the first row, and the rare later ones are kept
+    aside in `more_rows` so unique keys don't pay for a list each.
+    """
+
+    def __init__(self, records=()):
+        self.records = []
+        self.by_id = {}
+        self.by_name = {}
+        self.more_rows = {}  # item id -> rows after the first
+        self.extend(records)
+
+    def add(self, acc):
+        self.records.append(acc)
+        if acc.id in self.by_id:
+            self.more_rows.setdefault(acc.id, []).append(acc)
+        else:
+            self.by_id[acc.id] = acc
+        self.by_name.setdefault(acc.name, acc)
+
+    def extend(self, records):
+        for acc in records:
+            self.add(acc)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, item_id):
+        return item_id in self.by_id
+
+    def get(self, item_id):
+        return self.by_id.get(item_id)
+
+    def rows(self, item_id):
+        """Every row for `item_id` (several for per-rarity entries like Runebook)."""
+        first = self.by_id.get(item_id)
+        if first is None:
+            return []
+        return [first] + self.more_rows.get(item_id, [])
+
+    def named(self, name):
+        return self.by_name.get(name)
+
+    @classmethod
+    def from_dicts(cls, data):
+        return cls(Accessory.from_dict(d) for d in data)
+
+    def to_dicts(self):
+        return [acc.to_dict() for acc in self.records]
+
+    def save(self, path, indent=2):
+        save_records(self.records, path, indent)
+
+
+def load_catalog(path=CATALOG_FILE, missing_ok=False):
+    """
+    Read a catalog JSON file (a list of accessory objects); an empty Catalog if missing and `missing_ok`.
+    A snapshot beside it that is at least as new as the JSON is read instead.
+    """
+    snap = fresh_snapshot(path)
+    if snap is not None:
+        snapshot = open_snapshot(snap)
+        try:
+            return Catalog(snapshot_records(snapshot))
+        finally:
+            snapshot.close()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        if missing_ok:
+            return Catalog()
+        raise
+    return Catalog.from_dicts(data if isinstance(data, list) else [])
+
+
+def save_records(records, path, indent=2):
+    # Written beside `path` and renamed into place, so readers (and hardlinked copies) never see a partial file
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump([acc.to_dict() for acc in records], f, indent=indent, ensure_ascii=False)
+    os.replace(tmp, path)
+    if write_snapshots:
+        save_snapshot(records, snapshot_path(path))
+
+
+# --- Snapshots ---
+
+def configure_snapshots(enabled=True):
+    global write_snapshots
+    write_snapshots = enabled
+
+
+def snapshot_path(path):
+    return os.path.splitext(path)[0] + SNAPSHOT_SUFFIX
+
+
+def fresh_snapshot(path):
+    """Path of the snapshot beside JSON file `path` if it exists and the JSON hasn't changed since, else None."""
+    snap = snapshot_path(path)
+    try:
+        snap_mtime = os.path.getmtime(snap)
+    except OSError:
+        return None
+    try:
+        if os.path.getmtime(path) > snap_mtime:
+            return None
+    except OSError:
+        pass
+    return snap
+
+
+def save_snapshot(records, path):
+    """
+    Write `records` as a snapshot: ids and names as string columns, rarity
+    (Rarity value, 0 = none), MP (-1 = unknown) and prices (NaN = none) as
+    fixed-width columns, pricing metadata as string columns ("" = none) and
+    a JSON "meta" column for anything else.
+    """
+    records = list(records)
+    columns = {
+        "id": ("s", [acc.id or "" for acc in records]),
+        "name": ("s", [acc.name or "" for acc in records]),
+        "rarity": ("B", [acc.rarity or 0 for acc in records]),
+        "mp": ("h", [magical_power.get(acc.rarity_label, -1) for acc in records]),
+        "best_price": ("d", [_price(acc.best_price()) for acc in records]),
+    }
+    # Bit k set: PRICE_FIELDS[k] was an int, so the JSON export writes it back as one
+    int_flags = [0] * len(records)
+    for k, field in enumerate(PRICE_FIELDS):
+        values = []
+        for i, acc in enumerate(records):
+            value = getattr(acc, field)
+            if isinstance(value, int):
+                int_flags[i] |= 1 << k
+            values.append(_price(value))
+        columns[field] = ("d", values)
+    columns["int_prices"] = ("B", int_flags)
+    for field in ("price_source", "priced_at", "fetch_error"):
+        columns[field] = ("s", [getattr(acc, field) or "" for acc in records])
+    columns["meta"] = ("s", [_meta(acc) for acc in records])
+    write_snapshot(path, len(records), columns)
+
+
+def _price(value):
+    return nan if value is None else float(value)
+
+
+def _meta(acc):
+    meta = {}
+    if acc.craft_breakdown is not None:
+        meta["craft_breakdown"] = acc.craft_breakdown
+    if acc.extra:
+        meta["extra"] = acc.extra
+    return json.dumps(meta, ensure_ascii=False) if meta else ""
+
+
+def open_snapshot(path):
+    return Snapshot(path)
+
+
+def _price_column(snapshot, field):
+    # Snapshots written before a price field existed read as all-missing
+    if field in snapshot:
+        return snapshot.column(field).tolist()
+    return [nan] * len(snapshot)
+
+
+def snapshot_best_prices(snapshot, policy=DEFAULT_PRICE_POLICY):
+    """Accessory.best_price(policy) of every row (NaN = none), from the price columns."""
+    if policy == DEFAULT_PRICE_POLICY:
+        return snapshot.column("best_price").tolist()
+    if policy not in PRICE_POLICIES:
+        raise ValueError(f"unknown price policy: {policy!r}")
+    market = _price_column(snapshot, "bin_price" if policy == "bin" else "auction_price")
+    craft, npc = _price_column(snapshot, "craft_price"), _price_column(snapshot, "npc_price")
+    return [m if not isnan(m) else c if not isnan(c) else n for m, c, n in zip(market, craft, npc)]
+
+
+def snapshot_records(snapshot):
+    """Rebuild the Accessory records stored in an open Snapshot."""
+    ids, names, sources, priced, errors, metas = (
+        snapshot.column(name).tolist()
+        for name in ("id", "name", "price_source", "priced_at", "fetch_error", "meta")
+    )
+    rarities, int_prices = snapshot.column("rarity").tolist(), snapshot.column("int_prices").tolist()
+    prices = [_price_column(snapshot, field) for field in PRICE_FIELDS]
+    by_value = {r.value: r for r in Rarity}
+    for i in range(len(snapshot)):
+        values = []
+        for k, column in enumerate(prices):
+            value = column[i]
+            if isnan(value):
+                value = None
+            elif int_prices[i] & (1 << k):
+                value = int(value)
+            values.append(value)
+        acc = Accessory(ids[i] or None, names[i] or None, by_value.get(rarities[i]), *values)
+        acc.price_source = sources[i] or None
+        acc.priced_at = priced[i] or None
+        acc.fetch_error = errors[i] or None
+        if metas[i]:
+            meta = json.loads(metas[i])
+            acc.craft_breakdown = meta.get("craft_breakdown")
+            acc.extra = meta.get("extra")
+        yield acc
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert accessory files between JSON and the snapshot format.")
+    parser.add_argument("action", choices=["snapshot", "export"],
+                        help="snapshot: write FILE.snap from FILE.json; export: write FILE.json from FILE.snap")
+    parser.add_argument("files", nargs="+")
+    args = parser.parse_args()
+
+    for path in args.files:
+        base = os.path.splitext(path)[0]
+        if args.action == "snapshot":
+            save_snapshot(load_catalog(base + ".json"), base + SNAPSHOT_SUFFIX)
+            print(f"Saved {base + SNAPSHOT_SUFFIX}")
+        else:
+            snapshot = open_snapshot(base + SNAPSHOT_SUFFIX)
+            try:
+                records = list(snapshot_records(snapshot))
+            finally:
+                snapshot.close()
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump([acc.to_dict() for acc in records], f, indent=2, ensure_ascii=False)
+            print(f"Exported {len(records)} accessories to {base}.json")
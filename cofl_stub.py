@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# --- Config ---
+
+FIXTURES_DIR = "fixtures"
+LIVE_API = "https://sky.coflnet.com/api"
+
+RARITIES = ["COMMON", "UNCOMMON", "RARE", "EPIC", "LEGENDARY"]
+
+# Endpoint class -> path pattern, mirroring the URLs the scripts request
+ROUTES = [
+    ("lowestbin", re.compile(r"^/api/item/lowestbin/([^/]+)$")),
+    ("overview", re.compile(r"^/api/auctions/tag/([^/]+)/recent/overview$")),
+    ("auction", re.compile(r"^/api/auction/([^/]+)$")),
+    ("bazaar", re.compile(r"^/api/bazaar/([^/]+)/snapshot$")),
+]
+
+
+# --- Synthetic responses ---
+
+def seeded(key):
+    """Deterministic RNG per URL, so every run serves the same data."""
+    return random.Random(zlib.crc32(key.encode("utf-8")))
+
+
+def synth_lowestbin(item_id):
+    rng = seeded("bin:" + item_id)
+    lowest = rng.randint(1_000, 50_000_000)
+    return {"lowest": lowest, "secondLowest": int(lowest * rng.uniform(1.0, 1.2))}
+
+
+def synth_overview(item_id):
+    rng = seeded("overview:" + item_id)
+    base = rng.randint(1_000, 50_000_000)
+    return [
+        {
+            "uuid": f"{zlib.crc32(f'{item_id}:{k}'.encode('utf-8')):08x}{k:04x}",
+            "price": int(base * rng.uniform(0.8, 1.25)),
+            "playerName": f"player{rng.randint(1, 9999)}",
+            "end": f"2026-01-{1 + k % 28:02d}T12:00:00Z",
+        }
+        for k in range(rng.randint(0, 12))
+    ]
+
+
+def synth_auction(uuid):
+    tier = seeded("auction:" + uuid).choice(RARITIES)
+    return {"uuid": uuid, "tier": tier, "item": {"tier": tier}}
+
+
+def synth_bazaar(item_id):
+    rng = seeded("bazaar:" + item_id)
+    buy = round(rng.uniform(1, 5_000_000), 1)
+    return {"productId": item_id, "buyPrice": buy, "sellPrice": round(buy * rng.uniform(0.85, 0.99), 1)}
+
+
+SYNTHESIZERS = {
+    "lowestbin": synth_lowestbin,
+    "overview": synth_overview,
+    "auction": synth_auction,
+    "bazaar": synth_bazaar,
+}
+
+
+# --- Server ---
+
+class CoflStub(ThreadingHTTPServer):
+    """
+    Local stand-in for the CoflNet endpoints the pipeline uses.
+    Serves recorded fixtures from `fixtures_dir` (<url path>.json) when present,
+    deterministic synthetic data otherwise, with optional latency, 5xx and 429s.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), fixtures_dir=FIXTURES_DIR,
+                 latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, seed=0):
+        super().__init__(address, StubHandler)
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.statuses = {}
+        self.endpoints = {}
+
+    @property
+    def api_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def record(self, endpoint, status):
+        with self.lock:
+            self.requests += 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.endpoints[endpoint] = self.endpoints.get(endpoint, 0) + 1
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.statuses = {}
+            self.endpoints = {}
+
+    def roll(self):
+        with self.lock:
+            return self.rng.random()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="cofl-stub", daemon=True).start()
+        return self
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=()):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        stub = self.server
+        path = self.path.split("?", 1)[0]
+
+        endpoint, key = None, None
+        for name, pattern in ROUTES:
+            match = pattern.match(path)
+            if match:
+                endpoint, key = name, match.group(1)
+                break
+
+        delay = stub.latency + (stub.roll() * stub.jitter if stub.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if endpoint is None:
+            stub.record("unknown", 404)
+            return self.send_json(404, {"message": f"no route for {path}"})
+
+        roll = stub.roll()
+        if roll < stub.throttle_rate:
+            stub.record(endpoint, 429)
+            return self.send_json(429, {"message": "Too many requests"}, [("Retry-After", "1")])
+        if roll < stub.throttle_rate + stub.error_rate:
+            stub.record(endpoint, 503)
+            return self.send_json(503, {"message": "Service unavailable"})
+
+        fixture = os.path.join(stub.fixtures_dir, path.lstrip("/") + ".json")
+        if os.path.exists(fixture):
+            with open(fixture, "r", encoding="utf-8") as f:
+                body = json.load(f)
+        else:
+            body = SYNTHESIZERS[endpoint](key)
+        stub.record(endpoint, 200)
+        self.send_json(200, body)
+
+
+# --- Recording ---
+
+def record_fixtures(paths, fixtures_dir=FIXTURES_DIR):
+    """Save live CoflNet responses for API paths (e.g. /bazaar/X/snapshot) as fixtures."""
+    for path in paths:
+        url = LIVE_API + "/" + path.lstrip("/")
+        resp = requests.get(url, timeout=15)
+        resp.raise_for_status()
+        target = os.path.join(fixtures_dir, "api", path.lstrip("/") + ".json")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump(resp.json(), f, indent=2, ensure_ascii=False)
+        print(f"Recorded {url} -> {target}")
+        time.sleep(random.uniform(0.4, 0.8))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local CoflNet stand-in for offline runs and benchmarks.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help=f"recorded responses (default {FIXTURES_DIR}/)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--record", nargs="+", metavar="PATH",
+                        help="fetch these API paths from the live API into --fixtures and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.record, args.fixtures)
+    else:
+        stub = CoflStub(("127.0.0.1", args.port), args.fixtures, args.latency, args.jitter,
+                        args.error_rate, args.throttle_rate)
+        print(f"Serving CoflNet stand-in on {stub.api_url} (export COFL_API={stub.api_url})")
+        stub.serve_forever()
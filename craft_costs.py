@@ -0,0 +1,140 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Config ---
+
+RECIPES_FILE = "recipes.json"
+
+# Which bazaar snapshot field prices an ingredient:
+#   sell-order: lowest sell order, i.e. what an instant buy costs ("buyPrice")
+#   buy-order:  top buy order, i.e. what you pay if you wait for a fill ("sellPrice")
+BAZAAR_PRICE_FIELDS = {
+    "sell-order": "buyPrice",
+    "buy-order": "sellPrice",
+}
+DEFAULT_ORDER = "sell-order"
+
+
+def load_recipes(path=RECIPES_FILE):
+    """Recipes as {item id: {ingredient id: quantity}}; ingredients may have recipes of their own."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class RecipeCycleError(ValueError):
+    pass
+
+
+# --- Engine ---
+
+class CraftCostEngine:
+    """
+    Resolves craft costs over the recipe DAG.
+    Bazaar unit prices are fetched once per ingredient (see prefetch) and every
+    resolved cost is memoized, so ingredients shared between recipes cost one lookup.
+    `fetch_snapshot(item_id)` returns the bazaar snapshot dict for an item.
+    """
+
+    def __init__(self, recipes, fetch_snapshot, order=DEFAULT_ORDER):
+        if order not in BAZAAR_PRICE_FIELDS:
+            raise ValueError(f"unknown bazaar order type: {order}")
+        self.recipes = recipes
+        self.fetch_snapshot = fetch_snapshot
+        self.price_field = BAZAAR_PRICE_FIELDS[order]
+        self.unit_prices = {}
+        self.failures = {}  # item id -> exception from its failed fetch
+        self.costs = {}
+        self.lock = threading.Lock()
+
+    def leaves(self, item_ids):
+        """Every ingredient reachable from `item_ids` that has no recipe of its own."""
+        found = set()
+        seen = set()
+        stack = list(item_ids)
+        while stack:
+            item_id = stack.pop()
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+            for ingredient in self.recipes.get(item_id, {}):
+                if ingredient in self.recipes:
+                    stack.append(ingredient)
+                else:
+                    found.add(ingredient)
+        return found
+
+    def unit_price(self, item_id):
+        """Bazaar price of one unit, or None; fetched at most once."""
+        with self.lock:
+            if item_id in self.unit_prices:
+                return self.unit_prices[item_id]
+        try:
+            price = self.fetch_snapshot(item_id).get(self.price_field)
+        except Exception as e:
+            print(f"[ERROR] Failed to fetch {item_id} price: {e}")
+            price = None
+            with self.lock:
+                self.failures[item_id] = e
+        with self.lock:
+            self.unit_prices[item_id] = price
+        return price
+
+    def prefetch(self, item_ids, workers=1):
+        """Fetch bazaar prices for all base ingredients of `item_ids` in one batch."""
+        todo = sorted(i for i in self.leaves(item_ids) if i not in self.unit_prices)
+        if workers > 1 and len(todo) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(self.unit_price, todo))
+        else:
+            for item_id in todo:
+                self.unit_price(item_id)
+
+    def cost(self, item_id, _path=()):
+        """
+        Cost to craft one `item_id`: (total, breakdown), where breakdown lists
+        {"id", "qty", "unit_price", "cost", "source"} per ingredient, nesting
+        "ingredients" for the ones that are crafted themselves.
+        total is None, not an undercount, when an ingredient anywhere below has no bazaar price.
+        """
+        if item_id in self.costs:
+            return self.costs[item_id]
+        if item_id in _path:
+            raise RecipeCycleError(" -> ".join(_path + (item_id,)))
+
+        total = 0
+        breakdown = []
+        for ingredient, qty in self.recipes[item_id].items():
+            entry = {"id": ingredient, "qty": qty}
+            if ingredient in self.recipes:
+                unit, parts = self.cost(ingredient, _path + (item_id,))
+                entry.update(unit_price=unit, source="craft", ingredients=parts)
+            else:
+                unit = self.unit_price(ingredient)
+                entry.update(unit_price=unit, source="bazaar")
+                if not unit:
+                    print(f"[WARN] No {self.price_field} for {ingredient}")
+                    unit = None
+            if unit is None:
+                entry["cost"] = total = None
+            else:
+                entry["cost"] = unit * qty
+                if total is not None:
+                    total += entry["cost"]
+            breakdown.append(entry)
+
+        self.costs[item_id] = (total, breakdown)
+        return total, breakdown
+
+
+def format_breakdown(breakdown, indent="  "):
+    lines = []
+    for entry in breakdown:
+        cost = int(entry["cost"]) if entry["cost"] is not None else "?"
+        lines.append(f"{indent}{entry['id']} x{entry['qty']} = {cost} ({entry['source']})")
+        if entry.get("ingredients"):
+            lines.extend(format_breakdown(entry["ingredients"], indent + "  "))
+    return lines
@@ -1,8 +1,11 @@
-import json
+import re
+
+from catalog import load_catalog, save_records, strip_formatting
 
 # File to clean
 INPUT_FILE = "accessories.json"
 OUTPUT_FILE = "accessories_clean.json"
+SOULBOUND_FILE = "accessories_soulbound.json"
 
 # Accessories to remove (by name)
 REMOVE_NAMES = {
@@ -37,25 +40,6 @@ REMOVE_NAMES = {
     "Eternal Crystal"
 }
 
-def clean_accessories():
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        accessories = json.load(f)
-
-    before_count = len(accessories)
-    filtered = [acc for acc in accessories if acc["name"] not in REMOVE_NAMES]
-    after_count = len(filtered)
-
-    removed = before_count - after_count
-    print(f"Removed {removed} accessories.")
-
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(filtered, f, indent=2, ensure_ascii=False)
-
-    print(f"Cleaned list saved to {OUTPUT_FILE} with {after_count} accessories.")
-
-if __name__ == "__main__":
-    clean_accessories()
-
 # Soulbound accessories
 SOULBOUND_NAMES = {
     "Archaeologist's Compass",
@@ -102,12 +86,12 @@ SOULBOUND_NAMES = {
     "Ring of Broken Love",
     "Ring of Eternal Love",
     "Rubbish Ring of Love",
-    "§eYellow Rock of Love",
+    "Yellow Rock of Love",
     "Classy Ring of Love",
     "Exquisite Ring of Love",
     "Modest Ring of Love",
     "Mediocre Ring of Love",
-    "§eShiny Yellow Rock",
+    "Shiny Yellow Rock",
     "Invaluable Ring of Love",
     "Refined Ring of Love",
     "Legendary Ring of Love",
@@ -121,57 +105,60 @@ SOULBOUND_NAMES = {
     "Personal Deletor 7000"
 }
 
-def move_soulbound():
-    # Load the cleaned accessories file
-    with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-        accessories = json.load(f)
-
-    soulbound = [acc for acc in accessories if acc["name"] in SOULBOUND_NAMES]
-    remaining = [acc for acc in accessories if acc["name"] not in SOULBOUND_NAMES]
-
-    print(f"Moving {len(soulbound)} soulbound accessories into accessories_soulbound.json")
-
-    # Save soulbound accessories to a new file
-    with open("accessories_soulbound.json", "w", encoding="utf-8") as f:
-        json.dump(soulbound, f, indent=2, ensure_ascii=False)
-
-    # Overwrite the cleaned file without the soulbound ones
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(remaining, f, indent=2, ensure_ascii=False)
-
-    print(f"Updated {OUTPUT_FILE} with {len(remaining)} accessories after removing soulbound.")
-
-def remove_special_names():
-    with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-        accessories = json.load(f)
-
-    filtered = [
-        acc for acc in accessories
-        if "Campfire" not in acc["name"]
-        and "Ring of" not in acc["name"]
-        and "Yellow Rock" not in acc["name"]
-    ]
-
-    removed_count = len(accessories) - len(filtered)
-    print(f"Removed {removed_count} accessories containing 'Campfire', 'Ring of', or 'Yellow Rock'.")
-
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(filtered, f, indent=2, ensure_ascii=False)
-
-def remove_campfire_from_clean():
-    with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-        accessories = json.load(f)
-
-    filtered = [acc for acc in accessories if "Campfire" not in acc["name"]]
-
-    removed_count = len(accessories) - len(filtered)
-    print(f"Removed {removed_count} accessories containing 'Campfire' from {OUTPUT_FILE}.")
+# Accessories removed when their name contains any of these
+SPECIAL_SUBSTRINGS = ("Campfire", "Ring of", "Yellow Rock")
+
+# All substring rules compiled into one matcher
+SPECIAL_NAME_MATCHER = re.compile("|".join(re.escape(sub) for sub in SPECIAL_SUBSTRINGS))
+
+# Ordered predicate chain: (label, predicate on name, sink file or None to drop).
+# Names are matched without formatting codes, so the lists above never need "§e" spellings.
+# The first matching rule wins; records no rule matches go to OUTPUT_FILE.
+FILTER_RULES = [
+    ("remove list", lambda name: name in REMOVE_NAMES, None),
+    ("soulbound", lambda name: name in SOULBOUND_NAMES, SOULBOUND_FILE),
+    ("special names", lambda name: SPECIAL_NAME_MATCHER.search(name) is not None, None),
+    ("campfire", lambda name: "Campfire" in name, None),
+]
+
+
+def route_accessories(accessories, rules=FILTER_RULES):
+    """
+    Send every record through the rule chain in a single pass.
+    Returns ({sink file: records}, {rule label: match count}).
+    """
+    sinks = {OUTPUT_FILE: []}
+    for _, _, sink in rules:
+        if sink is not None:
+            sinks.setdefault(sink, [])
+    counts = {label: 0 for label, _, _ in rules}
+
+    for acc in accessories:
+        name = strip_formatting(acc.name)
+        for label, matches, sink in rules:
+            if matches(name):
+                counts[label] += 1
+                if sink is not None:
+                    sinks[sink].append(acc)
+                break
+        else:
+            sinks[OUTPUT_FILE].append(acc)
+
+    return sinks, counts
+
+
+def filter_accessories():
+    """Load the catalog once, apply FILTER_RULES and write each output file once."""
+    sinks, counts = route_accessories(load_catalog(INPUT_FILE))
+
+    for label, _, sink in FILTER_RULES:
+        action = f"moved into {sink}" if sink else "removed"
+        print(f"[{label}] {counts[label]} accessories {action}")
+
+    for path, records in sinks.items():
+        save_records(records, path)
+        print(f"Saved {len(records)} accessories to {path}")
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(filtered, f, indent=2, ensure_ascii=False)
 
 if __name__ == "__main__":
-    clean_accessories()
-    move_soulbound()
-    remove_special_names()
-    remove_campfire_from_clean()
+    filter_accessories()
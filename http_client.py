@@ -0,0 +1,183 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_metrics import metrics
+from response_cache import endpoint_class
+
+# --- Config ---
+
+TIMEOUT = 15
+POOL_SIZE = 16
+
+# Statuses worth another try; 429 is CoflNet asking us to slow down
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5      # seconds, doubled per attempt
+BACKOFF_CAP = 30.0
+MAX_RETRY_AFTER = 120.0  # never wait longer than this on a Retry-After header
+
+# Consecutive 5xx/connection failures before the breaker opens, and how long it stays open
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 60.0
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request while CoflNet looks to be down."""
+
+
+# --- Circuit breaker ---
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and fails fast for `cooldown` seconds.
+    After that one trial request goes through (half-open): success closes the
+    breaker, failure opens it for another cooldown.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                self.trial_running = False
+                print(f"[CIRCUIT OPEN] {self.failures} failures in a row, pausing requests for {self.cooldown:.0f}s")
+                metrics.observe_breaker_open()
+
+
+# --- Client ---
+
+def retry_after_seconds(resp):
+    """Seconds requested by a Retry-After header (delta-seconds or HTTP date), or None."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class CoflClient:
+    """
+    Keep-alive session for CoflNet shared by all threads.
+    Transient failures (connection errors, timeouts, RETRY_STATUSES) are retried
+    with full-jitter exponential backoff, or after Retry-After when the server sends one.
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, timeout=TIMEOUT, retries=MAX_RETRIES, breaker=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+    def get_json(self, url, limiter=None):
+        """
+        GET `url` and return the decoded JSON body. `limiter` (a TokenBucket) is
+        waited on before every attempt, retries included.
+        Raises CircuitOpenError while the breaker is open, requests exceptions otherwise.
+        """
+        endpoint = endpoint_class(url)
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                error = CircuitOpenError(f"circuit open, skipped {url}")
+                metrics.observe_error(endpoint, error)
+                raise error
+            if limiter is not None:
+                with metrics.waiting("rate_limit"):
+                    limiter.acquire()
+
+            start = time.perf_counter()
+            try:
+                resp = self.session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.observe_error(endpoint, e)
+                self.breaker.record_failure()
+                if attempt >= self.retries:
+                    raise
+                metrics.observe_retry(endpoint, type(e).__name__)
+                metrics.sleep(self.backoff(attempt), "backoff")
+                attempt += 1
+                continue
+            except requests.RequestException as e:
+                # Not worth retrying (TooManyRedirects, ChunkedEncodingError, ...), but it still
+                # counts against the breaker, which also ends a half-open trial
+                metrics.observe_error(endpoint, e)
+                self.breaker.record_failure()
+                raise
+            metrics.observe_response(endpoint, time.perf_counter() - start, resp.status_code, len(resp.content))
+
+            if resp.status_code in RETRY_STATUSES:
+                # A throttled response still means CoflNet is up
+                if resp.status_code == 429:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+                if attempt >= self.retries:
+                    error = requests.HTTPError(f"{resp.status_code} after {attempt + 1} attempts: {url}", response=resp)
+                    metrics.observe_error(endpoint, error)
+                    raise error
+                wait = retry_after_seconds(resp)
+                metrics.observe_retry(endpoint, resp.status_code)
+                metrics.sleep(wait if wait is not None else self.backoff(attempt), "backoff")
+                attempt += 1
+                continue
+
+            self.breaker.record_success()
+            try:
+                resp.raise_for_status()
+                start = time.perf_counter()
+                data = resp.json()
+            except Exception as e:
+                metrics.observe_error(endpoint, e)
+                raise
+            metrics.observe_parse(endpoint, time.perf_counter() - start)
+            return data
+
+
+# Shared by price_accessories.py and talisman.py; replaced by configure_client()
+client = CoflClient()
+
+
+def configure_client(pool_size=POOL_SIZE, retries=MAX_RETRIES):
+    global client
+    client = CoflClient(pool_size=pool_size, retries=retries)
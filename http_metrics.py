@@ -0,0 +1,213 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# --- Config ---
+
+# Upper bounds (seconds) of the request latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_PREFIX = "skyness"
+
+
+# --- Metrics ---
+
+class Histogram:
+    """Latency histogram: per-bucket counts plus sum/count (made cumulative for Prometheus)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def as_dict(self):
+        bounds = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(bounds, self.counts)),
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+        }
+
+
+class Metrics:
+    """
+    Run-wide counters for outbound HTTP calls, sleeps and pipeline stages.
+    Every method is thread-safe; one instance (`metrics`) is shared by the scripts.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.latency = {}      # endpoint -> Histogram of request seconds
+            self.parse = {}        # endpoint -> seconds spent decoding JSON
+            self.statuses = {}     # endpoint -> {status code: count}
+            self.errors = {}       # endpoint -> {exception name: count}
+            self.retries = {}      # endpoint -> {reason: count}
+            self.breaker_opens = 0
+            self.bytes = {}        # endpoint -> response body bytes
+            self.sleeps = {}       # reason -> seconds slept
+            self.stages = {}       # stage -> wall seconds
+
+    def _add(self, table, endpoint, key, amount=1):
+        counts = table.setdefault(endpoint, {})
+        counts[key] = counts.get(key, 0) + amount
+
+    def observe_response(self, endpoint, seconds, status, size):
+        with self.lock:
+            self.latency.setdefault(endpoint, Histogram()).observe(seconds)
+            self._add(self.statuses, endpoint, str(status))
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + size
+
+    def observe_error(self, endpoint, error):
+        with self.lock:
+            self._add(self.errors, endpoint, type(error).__name__)
+
+    def observe_retry(self, endpoint, reason):
+        with self.lock:
+            self._add(self.retries, endpoint, str(reason))
+
+    def observe_breaker_open(self):
+        with self.lock:
+            self.breaker_opens += 1
+
+    def observe_parse(self, endpoint, seconds):
+        with self.lock:
+            self.parse[endpoint] = self.parse.get(endpoint, 0.0) + seconds
+
+    def add_sleep(self, reason, seconds):
+        with self.lock:
+            self.sleeps[reason] = self.sleeps.get(reason, 0.0) + seconds
+
+    def sleep(self, seconds, reason):
+        """time.sleep() that is accounted for under `reason`."""
+        time.sleep(seconds)
+        self.add_sleep(reason, seconds)
+
+    @contextmanager
+    def waiting(self, reason):
+        """Account the time spent inside the block as sleep (e.g. blocked on a rate limiter)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_sleep(reason, time.perf_counter() - start)
+
+    @contextmanager
+    def stage(self, name):
+        """Wall time of a pipeline stage; re-entering a stage adds to its total."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    # --- Reports ---
+
+    def report(self, cache=None):
+        """Everything recorded so far as a JSON-ready dict; `cache` adds ResponseCache hit counts."""
+        with self.lock:
+            endpoints = sorted(set(self.latency) | set(self.errors) | set(self.retries))
+            report = {
+                "started": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="seconds"),
+                "wall_seconds": round(time.time() - self.started, 3),
+                "requests": sum(h.count for h in self.latency.values()),
+                "bytes": sum(self.bytes.values()),
+                "endpoints": {
+                    endpoint: {
+                        "latency": self.latency[endpoint].as_dict() if endpoint in self.latency else None,
+                        "parse_seconds": round(self.parse.get(endpoint, 0.0), 6),
+                        "statuses": dict(self.statuses.get(endpoint, {})),
+                        "errors": dict(self.errors.get(endpoint, {})),
+                        "retries": dict(self.retries.get(endpoint, {})),
+                        "bytes": self.bytes.get(endpoint, 0),
+                    }
+                    for endpoint in endpoints
+                },
+                "circuit_breaker_opens": self.breaker_opens,
+                "sleep_seconds": {k: round(v, 3) for k, v in sorted(self.sleeps.items())},
+                "stage_seconds": {k: round(v, 3) for k, v in self.stages.items()},
+            }
+        if cache is not None:
+            report["cache"] = {"hits": dict(cache.hits), "misses": dict(cache.misses)}
+        return report
+
+    def write_report(self, path, cache=None):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(cache), f, indent=2)
+        print(f"[METRICS] Run report saved to {path}")
+
+    def write_prometheus(self, path, cache=None):
+        """Write the report in the Prometheus text exposition format (for node_exporter's textfile collector)."""
+        report = self.report(cache)
+        p = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {p}_http_request_seconds Outbound request latency by endpoint class.",
+            f"# TYPE {p}_http_request_seconds histogram",
+        ]
+        for endpoint, stats in report["endpoints"].items():
+            latency = stats["latency"]
+            if latency is None:
+                continue
+            total = 0
+            for bound, count in latency["buckets"].items():
+                total += count
+                lines.append(f'{p}_http_request_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {total}')
+            lines.append(f'{p}_http_request_seconds_sum{{endpoint="{endpoint}"}} {latency["sum"]}')
+            lines.append(f'{p}_http_request_seconds_count{{endpoint="{endpoint}"}} {latency["count"]}')
+
+        def counter(name, help_text, samples, kind="counter"):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{p}_{name}{{{label_text}}} {value}" if label_text else f"{p}_{name} {value}")
+
+        endpoints = report["endpoints"]
+        counter("http_responses_total", "Responses by endpoint class and status code.",
+                [({"endpoint": e, "status": s}, n) for e, st in endpoints.items() for s, n in st["statuses"].items()])
+        counter("http_errors_total", "Failed requests by endpoint class and error type.",
+                [({"endpoint": e, "error": k}, n) for e, st in endpoints.items() for k, n in st["errors"].items()])
+        counter("http_retries_total", "Retried requests by endpoint class and reason.",
+                [({"endpoint": e, "reason": k}, n) for e, st in endpoints.items() for k, n in st["retries"].items()])
+        counter("circuit_breaker_opens_total", "Times the circuit breaker tripped.",
+                [({}, report["circuit_breaker_opens"])])
+        counter("http_response_bytes_total", "Response body bytes by endpoint class.",
+                [({"endpoint": e}, st["bytes"]) for e, st in endpoints.items()])
+        counter("http_parse_seconds_total", "Seconds spent decoding JSON by endpoint class.",
+                [({"endpoint": e}, st["parse_seconds"]) for e, st in endpoints.items()])
+        counter("sleep_seconds_total", "Seconds spent sleeping or waiting on the rate limiter.",
+                [({"reason": r}, s) for r, s in report["sleep_seconds"].items()])
+        counter("stage_seconds", "Wall time of each pipeline stage in the last run.",
+                [({"stage": s}, t) for s, t in report["stage_seconds"].items()], kind="gauge")
+        if "cache" in report:
+            counter("cache_lookups_total", "Response cache lookups by endpoint class and result.",
+                    [({"endpoint": e, "result": "hit"}, n) for e, n in report["cache"]["hits"].items()]
+                    + [({"endpoint": e, "result": "miss"}, n) for e, n in report["cache"]["misses"].items()])
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        print(f"[METRICS] Prometheus metrics saved to {path}")
+
+
+# Shared by price_accessories.py and talisman.py
+metrics = Metrics()
@@ -0,0 +1,351 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import accessory_families
+import batch_plan
+import build_catalog
+import catalog
+import craft_costs
+import filter_accessories
+import plan_shards
+import price_accessories
+import talisman
+import transfer_accessories_copy
+
+# --- Config ---
+
+STATE_FILE = ".pipeline_state.json"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_JOBS = 4
+
+
+# --- Fingerprints ---
+
+def digest_value(value):
+    """Stable hash of a config value (sets are sorted so their order doesn't matter)."""
+    def normalize(v):
+        if isinstance(v, (set, frozenset)):
+            return sorted(normalize(x) for x in v)
+        if isinstance(v, dict):
+            return {str(k): normalize(x) for k, x in v.items()}
+        if isinstance(v, (list, tuple)):
+            return [normalize(x) for x in v]
+        return v
+    text = json.dumps(normalize(value), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class FileHasher:
+    """
+    Content hashes of files and directories. Digests are remembered by
+    (size, mtime) between runs, so unchanged files are not read again.
+    """
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+        self.lock = threading.Lock()
+
+    def file_digest(self, path):
+        st = os.stat(path)
+        key = [st.st_size, st.st_mtime_ns]
+        with self.lock:
+            entry = self.known.get(path)
+            if entry is not None and entry[:2] == key:
+                return entry[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        with self.lock:
+            self.known[path] = key + [digest]
+        return digest
+
+    def fingerprint(self, path):
+        """Digest of a file, of every file under a directory, or None if `path` is missing."""
+        if os.path.isfile(path):
+            return self.file_digest(path)
+        if os.path.isdir(path):
+            h = hashlib.sha256()
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    full = os.path.join(root, name)
+                    h.update(os.path.relpath(full, path).encode("utf-8"))
+                    h.update(self.file_digest(full).encode("ascii"))
+            return h.hexdigest()
+        return None
+
+
+# --- Stages ---
+
+def local_imports(script):
+    """Sorted paths of the modules beside `script` that it imports, directly or through one another."""
+    folder = os.path.dirname(script)
+    found = set()
+    todo = [script]
+    while todo:
+        with open(todo.pop(), "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                path = os.path.join(folder, name.split(".")[0] + ".py")
+                if path != script and path not in found and os.path.isfile(path):
+                    found.add(path)
+                    todo.append(path)
+    return sorted(found)
+
+
+class Stage:
+    """
+    One pipeline step: a script run with `args`, reading `inputs` and writing
+    `outputs` (files or directories). The script and the local modules it
+    imports are inputs too. `config` holds the tables the script takes from
+    shared modules (catalog.magical_power, ...), hashed by value so an edit
+    shows up as a configuration change.
+    """
+
+    def __init__(self, name, script, inputs, outputs, config, args=(), enabled=True):
+        self.name = name
+        self.script = os.path.join(SCRIPT_DIR, script)
+        self.args = list(args)
+        # Editing the script or any helper module it imports re-runs the stage
+        self.inputs = list(inputs) + [self.script] + local_imports(self.script)
+        self.outputs = list(outputs)
+        self.config = digest_value({"config": config, "args": self.args})
+        self.enabled = enabled
+        self.upstream = set()
+
+    def command(self):
+        return [sys.executable, self.script] + self.args
+
+
+def planner_config():
+    return {
+        "magical_power": catalog.magical_power,
+        "recombobulate": talisman.recombobulate,
+        "recombobulate_to": talisman.recombobulate_to,
+        "upgrade_chains": accessory_families.UPGRADE_CHAINS,
+        "tier_words": accessory_families.TIER_WORDS,
+    }
+
+
+def build_stages(price_args=()):
+    """(catalog when items/ exists ->) filter -> price -> plan (+ batch plans when profiles/ exists) -> transfer."""
+    stages = [
+        Stage(
+            "catalog", "build_catalog.py",
+            inputs=[build_catalog.ITEMS_SOURCE],
+            outputs=[build_catalog.OUTPUT_FILE],
+            config={"types": build_catalog.ACCESSORY_TYPES, "parser": build_catalog.PARSER_VERSION},
+            enabled=os.path.exists(build_catalog.ITEMS_SOURCE),
+        ),
+        Stage(
+            "filter", "filter_accessories.py",
+            inputs=[filter_accessories.INPUT_FILE],
+            outputs=[filter_accessories.OUTPUT_FILE, filter_accessories.SOULBOUND_FILE],
+            config={
+                "remove": filter_accessories.REMOVE_NAMES,
+                "soulbound": filter_accessories.SOULBOUND_NAMES,
+                "special": filter_accessories.SPECIAL_SUBSTRINGS,
+                "rules": [(label, sink) for label, _, sink in filter_accessories.FILTER_RULES],
+            },
+        ),
+        Stage(
+            "price", "price_accessories.py",
+            inputs=[price_accessories.INPUT_FILE, craft_costs.RECIPES_FILE],
+            outputs=[price_accessories.OUTPUT_FILE],
+            config={
+                "npc_prices": price_accessories.NPC_PRICES,
+                "api": price_accessories.COFL_API,
+            },
+            args=price_args,
+        ),
+        Stage(
+            "plan", "talisman.py",
+            inputs=talisman.ACCESSORY_FILES + [accessory_families.CATALOG_FILE],
+            outputs=[talisman.PLAN_FILE, plan_shards.SHARDS_DIR],
+            config=planner_config(),
+        ),
+        Stage(
+            "batch", "batch_plan.py",
+            inputs=talisman.ACCESSORY_FILES + [catalog.CATALOG_FILE, batch_plan.PROFILES_DIR],
+            outputs=[batch_plan.PLANS_DIR],
+            config=planner_config(),
+            enabled=os.path.isdir(batch_plan.PROFILES_DIR),
+        ),
+        Stage(
+            "transfer", "transfer_accessories_copy.py",
+            inputs=transfer_accessories_copy.files_to_copy + transfer_accessories_copy.dirs_to_copy,
+            outputs=[
+                os.path.join(transfer_accessories_copy.destination, name)
+                for name in (transfer_accessories_copy.files_to_copy + transfer_accessories_copy.dirs_to_copy
+                             + [transfer_accessories_copy.MANIFEST_FILE])
+            ],
+            config={"destination": transfer_accessories_copy.destination},
+        ),
+    ]
+
+    # A stage depends on every stage that writes one of its inputs
+    producers = {path: stage.name for stage in stages for path in stage.outputs}
+    for stage in stages:
+        stage.upstream = {producers[p] for p in stage.inputs if p in producers} - {stage.name}
+    return stages
+
+
+# --- Runner ---
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"stages": {}, "files": {}}
+
+
+def save_state(state, path=STATE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+class Pipeline:
+    """Runs stages in dependency order, in parallel where the DAG allows, skipping up-to-date ones."""
+
+    def __init__(self, stages, state_file=STATE_FILE, jobs=DEFAULT_JOBS, force=(), dry_run=False):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_file = state_file
+        self.state = load_state(state_file)
+        self.hasher = FileHasher(self.state.get("files"))
+        self.jobs = jobs
+        self.force = set(force)
+        self.dry_run = dry_run
+        self.lock = threading.Lock()
+
+    def reason_to_run(self, stage):
+        """Why `stage` must run, or None if its last run is still valid."""
+        if stage.name in self.force:
+            return "forced"
+        record = self.state["stages"].get(stage.name)
+        if record is None:
+            return "never run"
+        if record["config"] != stage.config:
+            return "configuration changed"
+        for path in stage.inputs:
+            if self.hasher.fingerprint(path) != record["inputs"].get(path):
+                return f"{path} changed"
+        for path in stage.outputs:
+            if self.hasher.fingerprint(path) != record["outputs"].get(path):
+                return f"{path} missing or modified"
+        return None
+
+    def execute(self, stage):
+        """Run one stage's script; returns (ok, captured output, seconds)."""
+        # Inputs are hashed before the run, so an edit made meanwhile still triggers the next one
+        inputs = {p: self.hasher.fingerprint(p) for p in stage.inputs}
+        start = time.perf_counter()
+        proc = subprocess.run(stage.command(), capture_output=True, text=True, encoding="utf-8", errors="replace")
+        elapsed = time.perf_counter() - start
+        output = proc.stdout + proc.stderr
+        if proc.returncode != 0:
+            return False, output, elapsed
+        record = {
+            "config": stage.config,
+            "inputs": inputs,
+            "outputs": {p: self.hasher.fingerprint(p) for p in stage.outputs},
+            "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with self.lock:
+            self.state["stages"][stage.name] = record
+            self.state["files"] = self.hasher.known
+            save_state(self.state, self.state_file)
+        return True, output, elapsed
+
+    def run(self, targets=None):
+        """Bring `targets` (default: every enabled stage) and their upstream stages up to date."""
+        wanted = set(targets or [name for name, stage in self.stages.items() if stage.enabled])
+        pending = set()
+        todo = list(wanted)
+        while todo:
+            name = todo.pop()
+            if name not in pending:
+                pending.add(name)
+                todo.extend(self.stages[name].upstream)
+        pending = {name for name in pending if self.stages[name].enabled}
+
+        results = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                for name in sorted(pending):
+                    stage = self.stages[name]
+                    upstream = stage.upstream & set(self.stages)
+                    busy = pending | set(running.values())
+                    if any(u in busy for u in upstream):
+                        continue
+                    pending.discard(name)
+                    if any(results.get(u) == "failed" or results.get(u) == "blocked" for u in upstream):
+                        results[name] = "blocked"
+                        print(f"[{name}] skipped, an upstream stage failed")
+                        continue
+                    reason = self.reason_to_run(stage)
+                    if reason is None and any(results.get(u) == "would run" for u in upstream):
+                        reason = "an upstream stage would run"
+                    if reason is None:
+                        results[name] = "up to date"
+                        print(f"[{name}] up to date")
+                    elif self.dry_run:
+                        results[name] = "would run"
+                        print(f"[{name}] would run: {reason}")
+                    else:
+                        print(f"[{name}] running: {reason}")
+                        running[pool.submit(self.execute, stage)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    ok, output, elapsed = future.result()
+                    results[name] = "ran" if ok else "failed"
+                    for line in output.splitlines():
+                        print(f"[{name}] {line}")
+                    print(f"[{name}] {'done' if ok else 'FAILED'} in {elapsed:.1f}s")
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run catalog -> filter -> price -> plan -> transfer, skipping unchanged stages.")
+    parser.add_argument("stages", nargs="*", help="stages to bring up to date (default: all)")
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE",
+                        help="re-run this stage even if nothing changed, e.g. to fetch fresh prices (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="stages run at the same time")
+    parser.add_argument("--price-args", default="",
+                        help='extra arguments for price_accessories.py, e.g. "--workers 8"')
+    parser.add_argument("--state", default=STATE_FILE, help=f"where run state is kept (default {STATE_FILE})")
+    args = parser.parse_args()
+
+    stages = build_stages(args.price_args.split())
+    known = {stage.name for stage in stages}
+    unknown = (set(args.stages) | set(args.force)) - known
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))} (choose from {', '.join(sorted(known))})")
+
+    results = Pipeline(stages, args.state, args.jobs, args.force, args.dry_run).run(args.stages or None)
+    if any(result in ("failed", "blocked") for result in results.values()):
+        sys.exit(1)
@@ -0,0 +1,151 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # optional (listed in requirements.txt): without it only .gz siblings are written
+    brotli = None
+
+# --- Config ---
+
+SHARDS_DIR = "plan_shards"
+INDEX_FILE = "index.json"
+SUMMARY_FILE = "summary.json"
+
+# Rows in the summary shard the frontend renders first, and per paginated shard
+SUMMARY_ROWS = 50
+PAGE_ROWS = 100
+
+# Upper bounds (coins) of the price buckets; the last bucket is open-ended
+PRICE_BUCKETS = (1_000_000, 10_000_000, 100_000_000)
+
+
+def bucket_label(price):
+    lower = 0
+    for bound in PRICE_BUCKETS:
+        if price < bound:
+            return f"{coins(lower)}-{coins(bound)}"
+        lower = bound
+    return f"{coins(lower)}+"
+
+
+def coins(n):
+    for scale, suffix in ((1_000_000_000, "B"), (1_000_000, "M"), (1_000, "k")):
+        if n >= scale and n % scale == 0:
+            return f"{n // scale}{suffix}"
+    return str(n)
+
+
+def slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower().replace("+", " plus")).strip("-") or "none"
+
+
+# --- Writing ---
+
+def minified(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def write_if_changed(path, data):
+    """Write bytes through a temp file, leaving the file (and its mtime) alone if nothing changed."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+_warned_no_brotli = False
+
+
+def warn_no_brotli():
+    """Say once per run that .br shards are skipped, so a missing Brotli install doesn't go unnoticed."""
+    global _warned_no_brotli
+    if brotli is None and not _warned_no_brotli:
+        _warned_no_brotli = True
+        print("[WARN] brotli is not installed: plan shards get .gz siblings only (pip install Brotli)")
+
+
+def encoded_names(name):
+    return [name, name + ".gz"] + ([name + ".br"] if brotli is not None else [])
+
+
+def write_encoded(out_dir, name, data):
+    """Write `name` plus its .gz (and .br) siblings; returns {encoding: bytes written}."""
+    sizes = {"identity": len(data)}
+    write_if_changed(os.path.join(out_dir, name), data)
+    # mtime=0 keeps the gzip bytes identical for identical input
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    write_if_changed(os.path.join(out_dir, name + ".gz"), gz)
+    sizes["gzip"] = len(gz)
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        write_if_changed(os.path.join(out_dir, name + ".br"), br)
+        sizes["br"] = len(br)
+    return sizes
+
+
+def write_shards(plan, out_dir=SHARDS_DIR, summary_rows=SUMMARY_ROWS, page_rows=PAGE_ROWS):
+    """
+    Split plan rows into minified, precompressed shards under `out_dir`:
+    a summary with the first `summary_rows` rows, then pages of at most
+    `page_rows` rows per (rarity, price bucket). Every row keeps its "rank" in
+    the full plan so shards can be merged back in order. INDEX_FILE lists them all.
+    Shards from earlier runs that are no longer produced are removed.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    warn_no_brotli()
+    ranked = [dict(row, rank=rank) for rank, row in enumerate(plan)]
+
+    groups = {}
+    for row in ranked:
+        groups.setdefault((row["rarity"], bucket_label(row["price"])), []).append(row)
+
+    shards = []
+    files = set()
+
+    def add(name, rows, **info):
+        data = minified({"rows": rows})
+        sizes = write_encoded(out_dir, name, data)
+        files.update(encoded_names(name))
+        shards.append(dict(
+            info,
+            file=name,
+            sha256=hashlib.sha256(data).hexdigest(),
+            rows=len(rows),
+            first_rank=rows[0]["rank"] if rows else None,
+            min_price=min((r["price"] for r in rows), default=None),
+            max_price=max((r["price"] for r in rows), default=None),
+            bytes=sizes,
+        ))
+
+    add(SUMMARY_FILE, ranked[:summary_rows], kind="summary")
+    for (rarity, bucket), rows in sorted(groups.items(), key=lambda g: g[1][0]["rank"]):
+        for page, start in enumerate(range(0, len(rows), page_rows)):
+            name = f"{slug(rarity)}_{slug(bucket)}_{page}.json"
+            add(name, rows[start:start + page_rows], kind="page", rarity=rarity, bucket=bucket, page=page)
+
+    body = minified(shards)
+    index = {
+        "version": hashlib.sha256(body).hexdigest()[:12],
+        "rows": len(plan),
+        "encodings": ["gzip", "br"] if brotli is not None else ["gzip"],
+        "price_buckets": list(PRICE_BUCKETS),
+        "shards": shards,
+    }
+    write_encoded(out_dir, INDEX_FILE, minified(index))
+    files.update(encoded_names(INDEX_FILE))
+
+    for name in os.listdir(out_dir):
+        if name not in files and name.endswith((".json", ".json.gz", ".json.br")):
+            os.remove(os.path.join(out_dir, name))
+    return index
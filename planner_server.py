@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import Flask, request
+
+import talisman
+from accessory_families import FamilyIndex
+from catalog import load_catalog
+from response_cache import ResponseCache, CACHE_FILE
+
+# --- Config ---
+
+CATALOG_FILE = "accessories.json"
+PRICES_FILE = "accessories_fixed.json"
+
+# How often the background thread checks PRICES_FILE for changes (seconds)
+RELOAD_INTERVAL = 5
+
+# Plans memoized per parameter set, per loaded snapshot
+MAX_CACHED_PLANS = 256
+
+
+# --- Snapshot ---
+
+class PlannerState:
+    """
+    Catalog, prices and derived indexes loaded once from disk.
+    A snapshot is never mutated after construction (apart from its plan memo);
+    reloads build a new one and swap it in, so in-flight requests keep theirs.
+    """
+
+    def __init__(self, catalog, prices, mtime, recombo_price):
+        self.catalog = catalog
+        self.prices = prices
+        self.recombo_price = recombo_price
+        self.last_modified = datetime.fromtimestamp(mtime, tz=timezone.utc)
+
+        # Priced rows win over bare catalog rows (they carry the fixed-up rarity)
+        self.by_id = {a.id: a for a in catalog}
+        self.by_id.update((row.id, row) for row in prices)
+
+        self.index = FamilyIndex([a.id for a in catalog] + [row.id for row in prices])
+        self.parsed = talisman.parse_accessories(prices)
+
+        # Static responses are serialized once per snapshot
+        self.accessories_body = json.dumps(catalog.to_dicts(), ensure_ascii=False)
+        self.prices_body = json.dumps(prices.to_dicts(), ensure_ascii=False)
+        digest = hashlib.sha1(self.accessories_body.encode("utf-8"))
+        digest.update(self.prices_body.encode("utf-8"))
+        digest.update(repr(recombo_price).encode("ascii"))
+        self.version = digest.hexdigest()[:16]
+
+        self.plans = {}
+        self.plans_lock = threading.Lock()
+
+    def plan(self, budget, owned, rarities):
+        """Plan rows for one parameter set, memoized for the life of the snapshot."""
+        key = (budget, owned, rarities)
+        with self.plans_lock:
+            cached = self.plans.get(key)
+        if cached is not None:
+            return cached
+
+        parsed = [item for item in self.parsed if not rarities or item["rarity"] in rarities]
+        owned_mp = talisman.owned_family_mp(owned, self.by_id, self.index)
+        ranked = talisman.rank_by_family(parsed, self.index, owned_mp)
+        rows = talisman.build_plan(ranked, self.recombo_price, verbose=False)
+        if budget is not None:
+            rows = talisman.plan_within_budget(rows, budget)
+        body = json.dumps(rows, ensure_ascii=False)
+
+        with self.plans_lock:
+            if len(self.plans) >= MAX_CACHED_PLANS:
+                self.plans.pop(next(iter(self.plans)))
+            self.plans[key] = body
+        return body
+
+
+def load_state():
+    catalog = load_catalog(CATALOG_FILE)
+    mtime = os.path.getmtime(PRICES_FILE)
+    prices = load_catalog(PRICES_FILE)
+    return PlannerState(catalog, prices, mtime, talisman.fetch_recombobulator_price())
+
+
+class StateHolder:
+    """Holds the current snapshot and swaps it when PRICES_FILE changes on disk."""
+
+    def __init__(self, loader=load_state, interval=RELOAD_INTERVAL):
+        self.loader = loader
+        self.interval = interval
+        self.current = loader()
+        self.mtime = self._mtime()
+
+    def _mtime(self):
+        try:
+            return os.path.getmtime(PRICES_FILE)
+        except FileNotFoundError:
+            return None
+
+    def watch(self):
+        while True:
+            time.sleep(self.interval)
+            mtime = self._mtime()
+            if mtime is None or mtime == self.mtime:
+                continue
+            try:
+                self.current = self.loader()
+                self.mtime = mtime
+                print(f"[RELOAD] {PRICES_FILE} changed, snapshot {self.current.version}")
+            except Exception as e:
+                # Half-written file or similar: keep serving the old snapshot, retry next tick
+                print(f"[RELOAD ERROR] {e}")
+
+    def start(self):
+        threading.Thread(target=self.watch, name="planner-reload", daemon=True).start()
+
+
+# --- App ---
+
+def parse_list(values):
+    # Accept both ?owned=A&owned=B and ?owned=A,B
+    return tuple(sorted({v.strip() for value in values for v in value.split(",") if v.strip()}))
+
+
+def create_app(holder=None):
+    app = Flask(__name__)
+    holder = holder or StateHolder()
+
+    def conditional_json(body, etag, last_modified):
+        resp = app.response_class(body, mimetype="application/json")
+        resp.set_etag(etag)
+        resp.last_modified = last_modified
+        resp.cache_control.no_cache = True
+        return resp.make_conditional(request)
+
+    @app.get("/accessories")
+    def accessories():
+        state = holder.current
+        return conditional_json(state.accessories_body, f"acc-{state.version}", state.last_modified)
+
+    @app.get("/prices")
+    def prices():
+        state = holder.current
+        return conditional_json(state.prices_body, f"prices-{state.version}", state.last_modified)
+
+    @app.get("/plan")
+    def plan():
+        state = holder.current
+        budget = request.args.get("budget")
+        try:
+            budget = talisman.parse_coins(budget) if budget else None
+        except ValueError:
+            return {"error": f"invalid budget: {request.args.get('budget')}"}, 400
+        owned = parse_list(request.args.getlist("owned"))
+        rarities = tuple(r.upper() for r in parse_list(request.args.getlist("rarity")))
+
+        params = json.dumps([budget, owned, rarities])
+        etag = f"plan-{state.version}-{hashlib.sha1(params.encode('utf-8')).hexdigest()[:12]}"
+        if etag in request.if_none_match:
+            # Skip planning entirely for revalidations
+            return conditional_json("", etag, state.last_modified)
+        return conditional_json(state.plan(budget, owned, rarities), etag, state.last_modified)
+
+    app.config["STATE_HOLDER"] = holder
+    return app
+
+
+if __name__ == "__main__":
+    talisman.response_cache = ResponseCache(CACHE_FILE)
+    holder = StateHolder()
+    holder.start()
+    create_app(holder).run(threaded=True)
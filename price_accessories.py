@@ -1,97 +1,384 @@
+import argparse
 import json
-import requests
+import os
+import threading
 import time
 import random
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
 from statistics import median
 
+from catalog import Rarity, configure_snapshots, load_catalog, magical_power, save_records
+from craft_costs import CraftCostEngine, BAZAAR_PRICE_FIELDS, DEFAULT_ORDER, format_breakdown, load_recipes
+import http_client
+from http_metrics import metrics
+from price_history import ESTIMATORS, HISTORY_FILE, PriceHistory, parse_time
+from response_cache import ResponseCache, CACHE_FILE
+
 # --- Config ---
 
-COFL_LOWEST_BIN = "https://sky.coflnet.com/api/item/lowestbin/{}"
-COFL_RECENT_OVERVIEW = "https://sky.coflnet.com/api/auctions/tag/{}/recent/overview"
-COFL_AUCTION_DETAILS = "https://sky.coflnet.com/api/auction/{}"
+# Point COFL_API at a local stand-in (see cofl_stub.py) to run offline
+COFL_API = os.environ.get("COFL_API", "https://sky.coflnet.com/api")
+
+COFL_LOWEST_BIN = COFL_API + "/item/lowestbin/{}"
+COFL_RECENT_OVERVIEW = COFL_API + "/auctions/tag/{}/recent/overview"
+COFL_AUCTION_DETAILS = COFL_API + "/auction/{}"
+COFL_BAZAAR_SNAPSHOT = COFL_API + "/bazaar/{}/snapshot"
 
 INPUT_FILE = "accessories_clean.json"
 OUTPUT_FILE = "accessories_fixed.json"
+PLAN_FILE = "accessory_plan.json"
+REPORT_FILE = "price_report.json"
+
+# Concurrent mode: shared request budget for all worker threads
+DEFAULT_WORKERS = 8
+DEFAULT_RPS = 2.0
+DEFAULT_BURST = 4
+
+# Scheduled mode: seconds between partial OUTPUT_FILE checkpoints
+CHECKPOINT_SECONDS = 10.0
+
+# Start time of a scheduled run that hasn't priced everything yet; the next run resumes it
+RESUME_FILE = "accessories_fixed.resume.json"
+
+# Accessories bought from NPCs, by name
+NPC_PRICES = {
+    "Scavenger Talisman": 200,
+    "Mine Affinity Talisman": 200,
+    "Village Affinity Talisman": 200,
+    "Intimidation Talisman": 200,
+    "Skeleton Talisman": 50,
+    "Zombie Talisman": 50,
+    "Jacobus Register": 21_500_000,
+}
+
+
+# --- Rate limiting ---
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second, bursts of up to `burst`."""
+
+    def __init__(self, rate, burst):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Set by configure_rate_limit(); None means the classic sleep-after-every-call mode
+rate_limiter = None
+
+
+def configure_rate_limit(rps, burst):
+    global rate_limiter
+    rate_limiter = TokenBucket(rps, burst) if rps else None
+
+
+# --- Response cache ---
+
+# Set by configure_cache(); None means every request goes to the network
+response_cache = None
+
+# Per-thread flag so polite_delay() can skip the sleep when the last call never
+# reached the network (cache hit, history estimate, open circuit breaker)
+_last_call = threading.local()
+
+
+def configure_cache(path=CACHE_FILE, max_age=None):
+    global response_cache
+    response_cache = ResponseCache(path, max_age=max_age) if path else None
+
+
+# --- Price history ---
+
+# Set by configure_history(); None prices from the last 3 sales like before
+price_history = None
+
+# Which robust estimate a price is read from, and how old (seconds) a stored one may be
+# before the overview is fetched again (None = always fetch and append new sales)
+history_estimator = "median"
+history_max_age = None
+
+
+def configure_history(path=HISTORY_FILE, estimator="median", max_age=None):
+    global price_history, history_estimator, history_max_age
+    price_history = PriceHistory(path) if path else None
+    history_estimator = estimator
+    history_max_age = max_age
+
+
+def sales_source():
+    return f"history_{history_estimator}" if price_history is not None else "cofl_median"
+
+
+# --- Lowest BIN ---
+
+# Set by configure_sources(): "median" prices from recent sales only, "bin" from the
+# lowest BIN (the sales overview is only downloaded for items without a listing),
+# "both" stores the BIN and still fetches the median
+PRICE_SOURCES = ("median", "bin", "both")
+price_sources = "median"
+
+# item id -> lowest BIN (None = not listed), filled by prefetch_bins()
+bin_prices = {}
+
+
+def configure_sources(sources="median"):
+    global price_sources
+    price_sources = sources
+
+
+def fetch_lowest_bin(item_id):
+    """Lowest BIN for item_id (None if nothing is listed; raises if the fetch fails)."""
+    data = get_json(COFL_LOWEST_BIN.format(item_id))
+    lowest = data.get("lowest") if isinstance(data, dict) else None
+    return int(lowest) if lowest else None
+
+
+def wants_bin(acc):
+    """Whether the general case prices this entry (so a BIN is worth fetching up front)."""
+    if acc.auction_price or acc.craft_price or acc.npc_price or acc.id is None:
+        return False
+    if acc.name in NPC_PRICES or acc.name in ("Runebook", "Abicase"):
+        return False
+    return craft_engine is None or acc.id not in craft_engine.recipes
+
+
+def prefetch_bins(item_ids, workers=1):
+    """Fetch the lowest BIN of every id concurrently into bin_prices; ids that fail are left out."""
+    todo = sorted({str(i) for i in item_ids} - set(bin_prices))
+
+    def fetch(item_id):
+        try:
+            return item_id, fetch_lowest_bin(item_id), None
+        except Exception as e:
+            return item_id, None, e
+        finally:
+            polite_delay()
+
+    listed = 0
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for item_id, price, error in pool.map(fetch, todo):
+            if error is not None:
+                print(f"[BIN ERROR] {item_id}: {error}")
+                continue
+            bin_prices[item_id] = price
+            if price:
+                listed += 1
+                if price_history is not None:
+                    price_history.record_bin(item_id, price)
+    print(f"[BIN] {listed} of {len(todo)} items listed")
+
+
+# --- Crafting ---
+
+# Set by configure_crafting(); prices every accessory listed in recipes.json
+craft_engine = None
+
+
+def fetch_bazaar_snapshot(item_id):
+    data = get_json(COFL_BAZAAR_SNAPSHOT.format(item_id))
+    polite_delay()
+    return data
+
+
+def configure_crafting(order=DEFAULT_ORDER):
+    global craft_engine
+    craft_engine = CraftCostEngine(load_recipes(), fetch_bazaar_snapshot, order)
 
 
 # --- Helpers ---
 
 def polite_delay():
-    """Random short sleep to avoid hammering APIs."""
-    time.sleep(random.uniform(0.4, 0.8))
+    """Random short sleep to avoid hammering APIs (skipped for calls that stayed offline or when a rate limiter paces requests)."""
+    if rate_limiter is not None or getattr(_last_call, "offline", False):
+        return
+    metrics.sleep(random.uniform(0.4, 0.8), "polite_delay")
 
 
-def fetch_sold_auctions(item_id, rarity, max_matches=5):
+def fetch_json(url):
+    """GET `url` through the shared client (retries, circuit breaker), pacing every attempt on the rate limiter."""
+    try:
+        return http_client.client.get_json(url, limiter=rate_limiter)
+    except http_client.CircuitOpenError:
+        # Failed fast without a request, so there is nothing to be polite about
+        _last_call.offline = True
+        raise
+
+
+def get_json(url):
+    """Like fetch_json(), but served from the response cache when a fresh copy exists."""
+    _last_call.offline = False
+    if response_cache is None:
+        return fetch_json(url)
+    hit, data = response_cache.lookup(url)
+    if hit:
+        _last_call.offline = True
+        return data
+    data = fetch_json(url)
+    response_cache.store(url, data)
+    return data
+
+
+# uuid -> tier for auctions already inspected this run (finished auctions never change)
+_auction_tiers = {}
+_auction_tiers_lock = threading.Lock()
+
+
+def fetch_auction_tier(auction_id):
+    """Return the rarity tier of a finished auction, fetching its details at most once per run."""
+    with _auction_tiers_lock:
+        if auction_id in _auction_tiers:
+            return _auction_tiers[auction_id]
+
+    # fetch full auction details
+    detail_url = COFL_AUCTION_DETAILS.format(auction_id)
+    auction_data = get_json(detail_url)
+    polite_delay()
+
+    # rarity comes from "tier"
+    tier = (
+        auction_data.get("item", {}).get("tier")
+        or auction_data.get("tier")
+    )
+    tier = tier.upper() if tier else None
+
+    with _auction_tiers_lock:
+        _auction_tiers[auction_id] = tier
+    return tier
+
+
+def fetch_sold_auctions_by_tier(item_id, rarities, max_matches=5):
     """
-    Find recent auction prices for item_id with the desired rarity.
-    Returns the median of up to `max_matches` matching sales.
+    Find recent auction prices for item_id, partitioned by rarity, in one pass.
+    The overview is downloaded once and each auction's tier looked up at most once;
+    scanning stops as soon as every rarity has `max_matches` sales.
+    Returns {rarity: median price or None}, or the price history's estimate per
+    tier when one is configured; raises if the overview could not be fetched, or
+    if failed detail lookups left a rarity short of sales.
     """
+    wanted = {r.upper(): r for r in rarities}
+    matched = {r: [] for r in wanted}
+    detail_error = None
     url = COFL_RECENT_OVERVIEW.format(item_id)
     try:
-        resp = requests.get(url, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
-
-        matched_prices = []
+        data = get_json(url)
 
         for entry in data:
+            if all(len(prices) >= max_matches for prices in matched.values()):
+                break
+
             auction_id = entry.get("uuid")
             if not auction_id:
                 continue
 
+            # One malformed entry shouldn't cost every rarity its price
             try:
-                # fetch full auction details
-                detail_url = COFL_AUCTION_DETAILS.format(auction_id)
-                d_resp = requests.get(detail_url, timeout=15)
-                d_resp.raise_for_status()
-                auction_data = d_resp.json()
+                price = int(entry["price"])
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"[BAD ENTRY] {auction_id}: price {e!r}, skipped")
+                continue
 
-                # rarity comes from "tier"
-                auction_rarity = (
-                    auction_data.get("item", {}).get("tier")
-                    or auction_data.get("tier")
-                )
+            try:
+                auction_rarity = fetch_auction_tier(auction_id)
+            except Exception as e:
+                print(f"[DETAIL ERROR] {auction_id}: {e}")
+                detail_error = e
+                continue
 
-                if auction_rarity and auction_rarity.upper() == rarity.upper():
-                    matched_prices.append(int(entry["price"]))
-                    print(f"[MATCH] {item_id} {rarity} sold for {entry['price']}")
+            prices = matched.get(auction_rarity)
+            if prices is not None and len(prices) < max_matches:
+                prices.append((auction_id, price, parse_time(entry.get("end"))))
+                print(f"[MATCH] {item_id} {wanted[auction_rarity]} sold for {price}")
 
-                    if len(matched_prices) >= max_matches:
-                        break
+    except Exception as e:
+        print(f"[FETCH SOLD ERROR] {item_id} {', '.join(rarities)}: {e}")
+        raise
 
-            except Exception as e:
-                print(f"[DETAIL ERROR] {auction_id}: {e}")
+    if detail_error is not None and any(len(prices) < max_matches for prices in matched.values()):
+        raise detail_error
 
-            polite_delay()
+    if price_history is not None:
+        estimates = {}
+        for r, sales in matched.items():
+            if sales:
+                price_history.record_sales(item_id, sales, tier=r)
+            est = price_history.estimate(item_id, tier=r)
+            estimates[wanted[r]] = int(est[history_estimator]) if est else None
+        return estimates
 
-        if matched_prices:
-            return int(median(matched_prices))
+    return {
+        wanted[r]: int(median(price for _, price, _ in sales)) if sales else None
+        for r, sales in matched.items()
+    }
 
-    except Exception as e:
-        print(f"[FETCH SOLD ERROR] {item_id} {rarity}: {e}")
 
-    return None
+def fetch_sold_auctions(item_id, rarity, max_matches=5):
+    """
+    Find recent auction prices for item_id with the desired rarity.
+    Returns the median of up to `max_matches` matching sales.
+    """
+    return fetch_sold_auctions_by_tier(item_id, [rarity], max_matches)[rarity]
 
 
-def fetch_cofl_median(item_id):
-    """Fetch the median of the last 3 sales from CoflNet."""
-    url = COFL_RECENT_OVERVIEW.format(item_id)
-    try:
-        resp = requests.get(url, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
+def recent_sales_price(item_id):
+    """
+    Price item_id from its recent sales: the median of the last 3, or with a price
+    history, every sale on the overview is appended to it and the item's robust
+    estimate returned. None if there are no sales; raises if the fetch fails.
+    """
+    if price_history is not None and history_max_age is not None:
+        est = price_history.estimate(item_id, max_age=history_max_age)
+        if est is not None:
+            _last_call.offline = True
+            return int(est[history_estimator])
+
+    data = get_json(COFL_RECENT_OVERVIEW.format(item_id))
+
+    if price_history is None:
         if not data or "price" not in data[0]:
             return None
         last_prices = [entry["price"] for entry in data[:3] if "price" in entry]
-        if last_prices:
-            return int(median(last_prices))
+        return int(median(last_prices)) if last_prices else None
+
+    sales = [
+        (entry.get("uuid") or f"{item_id}:{entry['price']}:{entry.get('end')}",
+         entry["price"], parse_time(entry.get("end")))
+        for entry in data if "price" in entry
+    ]
+    if sales:
+        price_history.record_sales(item_id, sales)
+    est = price_history.estimate(item_id)
+    return int(est[history_estimator]) if est else None
+
+
+def fetch_cofl_median(item_id):
+    """Fetch the recent-sales price from CoflNet (None if there are none; raises if the fetch fails)."""
+    try:
+        return recent_sales_price(item_id)
     except Exception as e:
         print(f"[COFL MEDIAN ERROR] {item_id}: {e}")
-    return None
+        raise
 
 
 def fetch_price(item_id, name):
-    """Try CoflNet BIN, then CoflNet recent median."""
+    """CoflNet recent-sales price (BINs come from prefetch_bins())."""
     if item_id is None:
         return None
 
@@ -99,8 +386,10 @@ def fetch_price(item_id, name):
     price = None
 
     # Try recent sales median
-    price = fetch_cofl_median(item_id)
-    polite_delay()
+    try:
+        price = fetch_cofl_median(item_id)
+    finally:
+        polite_delay()
     if price:
         return price
 
@@ -109,122 +398,449 @@ def fetch_price(item_id, name):
 
 # --- Fix Missing Prices ---
 
-def fix_missing_prices():
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        accessories = json.load(f)
+def stamp(acc, source):
+    """Record when and where an entry's price came from (source None = nothing found)."""
+    acc.price_source = source
+    acc.priced_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def mark_failed(acc, error):
+    """Stamp an entry whose price could not be fetched, so `--refresh` retries it."""
+    stamp(acc, None)
+    acc.fetch_error = f"{type(error).__name__}: {error}"
+    print(f"[FAILED] {acc.name}: {acc.fetch_error}")
+    return acc
+
+
+def price_accessory(acc):
+    """Fill in missing prices for one catalog entry and return the rows it expands to."""
+    name = acc.name
+    item_id = acc.id
+
+    # --- Default rarity to COMMON if missing (an unknown tier is left alone) ---
+    if acc.rarity is None and not (acc.extra and acc.extra.get("rarity")):
+        acc.rarity = Rarity.COMMON
+        print(f"[FIX] {name} had no rarity, set to COMMON")
+
+    needs_price = not acc.auction_price and not acc.craft_price and not acc.npc_price
+
+    # --- Hardcoded NPC prices ---
+    npc_price = NPC_PRICES.get(name)
+    if npc_price is not None:
+        acc.npc_price = npc_price
+        print(f"[FIX] {name} set NPC={npc_price:,}")
+        stamp(acc, "npc")
+        return [acc]
+
+    # --- Crafted accessories (recipes.json) ---
+    if craft_engine is not None and item_id in craft_engine.recipes:
+        craft_price, breakdown = craft_engine.cost(item_id)
+        for line in format_breakdown(breakdown):
+            print(f"[CRAFT] {name}:{line}")
+        acc.craft_breakdown = breakdown
+        if craft_price is not None:
+            acc.craft_price = int(craft_price)
+            print(f"[FIX] {name} craft_price = {int(craft_price)}")
+        else:
+            print(f"[WARN] No craft price for {name}")
+        failed = sorted(i for i in craft_engine.leaves([item_id]) if i in craft_engine.failures)
+        if failed:
+            return [mark_failed(acc, craft_engine.failures[failed[0]])]
+        stamp(acc, "bazaar_craft" if craft_price is not None else None)
+        return [acc]
+
+    # --- Runebook special case ---
+    if name == "Runebook":
+        rarities = ["COMMON", "UNCOMMON", "RARE", "EPIC", "LEGENDARY"]
+        try:
+            prices = fetch_sold_auctions_by_tier(str(item_id), rarities)
+        except Exception as e:
+            return [mark_failed(acc.copy(rarity=Rarity[r]), e) for r in rarities]
+        clones = []
+        for r in rarities:
+            clone = acc.copy(rarity=Rarity[r])
+            price = prices[r]
+            if price:
+                clone.auction_price = price
+                print(f"[FIX] Runebook ({r}) price={price}")
+            else:
+                print(f"[WARN] No recent sales found for Runebook ({r})")
+            stamp(clone, ("history_by_tier" if price_history is not None else "cofl_sold_by_tier") if price else None)
+            clones.append(clone)
+        return clones
+
+    # --- Abicase special case ---
+    if name == "Abicase":
+        samsung_id = "ABICASE_SUMSUNG_1"
+        try:
+            price = recent_sales_price(samsung_id)
+            if price:
+                acc.auction_price = price
+                print(f"[FIX] Samsung Abicase recent sales price = {price}")
+            else:
+                print(f"[WARN] No recent sales found for Samsung Abicase")
+        except Exception as e:
+            print(f"[COFL MEDIAN ERROR] Samsung Abicase: {e}")
+            return [mark_failed(acc, e)]
+        stamp(acc, sales_source() if acc.auction_price else None)
+        return [acc]
+
+    # --- General case ---
+    if needs_price:
+        bin_price = bin_prices.get(str(item_id))
+        if bin_price:
+            acc.bin_price = bin_price
+            print(f"[BIN] {name} = {bin_price}")
+            if price_sources == "bin":
+                stamp(acc, "cofl_bin")
+                return [acc]
+        try:
+            price = fetch_price(item_id, name)
+        except Exception as e:
+            return [mark_failed(acc, e)]
+        if price:
+            acc.auction_price = price
+            print(f"[PRICE] {name} = {price}")
+        elif not bin_price:
+            print(f"[WARN] Still no price for {name}")
+        stamp(acc, sales_source() if price else "cofl_bin" if bin_price else None)
+
+    return [acc]
 
-    updated = []
 
+def top_plan_names(n):
+    """Names of the first `n` accessories in the current plan (recombobulation rows skipped)."""
+    try:
+        with open(PLAN_FILE, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+    except FileNotFoundError:
+        print(f"[WARN] {PLAN_FILE} not found, --top ignored")
+        return set()
+    names = [row["name"] for row in plan if not row["name"].startswith("Recombobulate ")]
+    return set(names[:n])
+
+
+# --- Scheduling ---
+
+def last_known_price(acc, rows):
+    """Best guess at an entry's price before fetching: last run's rows, the price history, or the input file."""
+    prices = [row.best_price() for row in rows or ()]
+    prices = [p for p in prices if p is not None]
+    if prices:
+        return min(prices)
+    if price_history is not None and acc.id is not None:
+        est = price_history.estimate(str(acc.id))
+        if est is not None:
+            return est[history_estimator]
+    return acc.best_price()
+
+
+def schedule_order(accessories, previous=None):
+    """
+    Positions of `accessories` ordered by expected coins/MP (last known price over
+    rarity MP), so likely top-of-plan entries are fetched first. Entries with no
+    known price are placed at the median coins/MP of their rarity (or of everything).
+    """
+    expected = []
     for acc in accessories:
-        name = acc.get("name")
-        item_id = acc.get("id")
-        rarity = acc.get("rarity")
-
-        # --- Default rarity to COMMON if missing ---
-        if not rarity:
-            acc["rarity"] = "COMMON"
-            print(f"[FIX] {name} had no rarity, set to COMMON")
-
-        needs_price = not acc.get("auction_price") and not acc.get("craft_price") and not acc.get("npc_price")
-
-        # --- Hardcoded NPC prices ---
-        if name in ["Scavenger Talisman", "Mine Affinity Talisman", "Village Affinity Talisman",
-                    "Intimidation Talisman"]:
-            acc["npc_price"] = 200
-            print(f"[FIX] {name} set NPC=200")
-            updated.append(acc)
-            continue
-        if name in ["Skeleton Talisman", "Zombie Talisman"]:
-            acc["npc_price"] = 50
-            print(f"[FIX] {name} set NPC=50")
-            updated.append(acc)
-            continue
-        if name == "Jacobus Register":
-            acc["npc_price"] = 21_500_000
-            print(f"[FIX] Jacobus Register set NPC=21,500,000")
-            updated.append(acc)
-            continue
-
-        # --- Fried Frozen Chicken special case ---
-        if name == "Fried Frozen Chicken":
-            recipe = {
-                "FRIED_FEATHER": 256,
-                "ENCHANTED_GLACITE": 128,
-                "ENCHANTED_BLAZE_POWDER": 128
-            }
-            craft_price = 0
-            for ingredient, qty in recipe.items():
-                try:
-                    url = f"https://sky.coflnet.com/api/bazaar/{ingredient}/snapshot"
-                    resp = requests.get(url, timeout=15)
-                    resp.raise_for_status()
-                    data = resp.json()
-                    price_per_unit = data.get("buyPrice")
-                    if price_per_unit:
-                        craft_price += price_per_unit * qty
-                        print(f"[FRIED CHICKEN] {ingredient} x{qty} = {price_per_unit * qty}")
-                    else:
-                        print(f"[WARN] No buyPrice for {ingredient}")
-                except Exception as e:
-                    print(f"[ERROR] Failed to fetch {ingredient} price: {e}")
-                polite_delay()
-            acc["craft_price"] = int(craft_price)
-            print(f"[FIX] Fried Frozen Chicken craft_price = {int(craft_price)}")
-            updated.append(acc)
-            continue
-
-        # --- Runebook special case ---
-        if name == "Runebook":
-            rarities = ["COMMON", "UNCOMMON", "RARE", "EPIC", "LEGENDARY"]
-            for r in rarities:
-                clone = dict(acc)
-                clone["rarity"] = r
-                price = fetch_sold_auctions(str(item_id), r)  # <--- new function
-                if price:
-                    clone["auction_price"] = price
-                    print(f"[FIX] Runebook ({r}) price={price}")
-                else:
-                    print(f"[WARN] No recent sales found for Runebook ({r})")
-                updated.append(clone)
-                polite_delay()
-            continue
-
-        # --- Abicase special case ---
-        if name == "Abicase":
-            samsung_id = "ABICASE_SUMSUNG_1"
-            url = COFL_RECENT_OVERVIEW.format(samsung_id)
-            try:
-                resp = requests.get(url, timeout=15)
-                resp.raise_for_status()
-                data = resp.json()
-                last_prices = [entry["price"] for entry in data[:3] if "price" in entry]
-                if last_prices:
-                    median_price = int(median(last_prices))
-                    acc["auction_price"] = median_price
-                    print(f"[FIX] Samsung Abicase median of last 3 sales = {median_price}")
-                else:
-                    print(f"[WARN] No recent sales found for Samsung Abicase")
-            except Exception as e:
-                print(f"[COFL MEDIAN ERROR] Samsung Abicase: {e}")
-            updated.append(acc)
-            continue
+        rows = previous.rows(acc.id) if previous is not None else None
+        price = last_known_price(acc, rows)
+        mp = magical_power.get(acc.rarity_label or "COMMON", 0)
+        expected.append(price / mp if price is not None and mp else None)
+
+    by_rarity = {}
+    for acc, cpm in zip(accessories, expected):
+        if cpm is not None:
+            by_rarity.setdefault(acc.rarity_label, []).append(cpm)
+    known = [cpm for cpm in expected if cpm is not None]
+    fallback = median(known) if known else 0.0
+    priors = {rarity: median(values) for rarity, values in by_rarity.items()}
+
+    def key(k):
+        acc = accessories[k]
+        cpm = expected[k]
+        if cpm is None:
+            cpm = priors.get(acc.rarity_label, fallback)
+        return (cpm, -magical_power.get(acc.rarity_label or "COMMON", 0), k)
+
+    return sorted(range(len(accessories)), key=key)
+
+
+def price_scheduled(accessories, order, workers=1, deadline=None, checkpoint=None,
+                    checkpoint_every=CHECKPOINT_SECONDS):
+    """
+    Price `accessories` in `order` with at most `workers` in flight, starting no new
+    fetch after `deadline` (a time.monotonic() value). `checkpoint(results)` is
+    called every `checkpoint_every` seconds with what is done so far.
+    Entries are priced on copies, so unfinished ones stay as they were read.
+    Returns {position: rows} for the entries that finished.
+    """
+    results = {}
+    pending = {}
+    queue = iter(order)
+    exhausted = False
+    next_checkpoint = time.monotonic() + checkpoint_every
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                exhausted = True  # out of time: only wait for the fetches in flight
+            while not exhausted and len(pending) < max(workers, 1):
+                k = next(queue, None)
+                if k is None:
+                    exhausted = True
+                    break
+                pending[pool.submit(price_accessory, accessories[k].copy())] = k
+            if not pending:
+                break
+            timeout = next_checkpoint - time.monotonic()
+            if deadline is not None and not exhausted:
+                timeout = min(timeout, deadline - time.monotonic())
+            done, _ = wait(pending, timeout=max(timeout, 0.0), return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+            if checkpoint is not None and time.monotonic() >= next_checkpoint:
+                checkpoint(results)
+                next_checkpoint = time.monotonic() + checkpoint_every
+    return results
+
+
+def checkpoint_rows(results, todo, todo_acc, done, previous=None):
+    """
+    Output rows while a scheduled run is in progress: `results` (kept entries),
+    then for each `todo` entry its fetched rows from `done`, else its rows from
+    `previous` untouched (so their priced_at still shows them as due), else the
+    input row unpriced.
+    """
+    rows = list(results)
+    for k, i in enumerate(todo):
+        acc = todo_acc[k]
+        rows[i] = done.get(k) or (previous.rows(acc.id) if previous is not None else None) or [acc]
+    return [row for entry in rows for row in entry]
 
-        # --- General case ---
-        if needs_price:
-            price = fetch_price(item_id, name)
-            if price:
-                acc["auction_price"] = price
-                print(f"[PRICE] {name} = {price}")
+
+# --- Resuming ---
+
+def load_resume(path=RESUME_FILE):
+    """Start time (ISO) of the unfinished scheduled run recorded in `path`, or None."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["started"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def save_resume(started, path=RESUME_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"started": started}, f)
+    os.replace(tmp, path)
+
+
+def clear_resume(path=RESUME_FILE):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def priced_since(rows, started):
+    """True if every row was priced without error at or after ISO time `started`."""
+    since = datetime.fromisoformat(started)
+    return bool(rows) and all(
+        row.priced_at is not None and not row.fetch_error and datetime.fromisoformat(row.priced_at) >= since
+        for row in rows
+    )
+
+
+def needs_refresh(acc, rows, rarities=(), ids=(), names=(), stale_before=None):
+    """Decide whether an already-priced entry should be fetched again."""
+    if not rows or any(row.priced_at is None or row.fetch_error for row in rows):
+        return True
+    if acc.id in ids or acc.name in names:
+        return True
+    if any(row.rarity_label in rarities for row in rows):
+        return True
+    if stale_before is not None:
+        return any(datetime.fromisoformat(row.priced_at) < stale_before for row in rows)
+    return False
+
+
+def fix_missing_prices(workers=1, refresh=False, rarities=(), ids=(), top=None, stale_after=None,
+                       schedule=False, budget=None, checkpoint_every=CHECKPOINT_SECONDS, resume=True):
+    """
+    Price every accessory in INPUT_FILE and write OUTPUT_FILE.
+    With workers > 1 items are fetched concurrently; output order is unchanged.
+
+    With refresh=True the previous OUTPUT_FILE is reused and only entries that are
+    new, older than `stale_after` hours, or matched by rarity / id / top-N of the
+    current plan are fetched again.
+
+    With schedule=True (implied by a `budget` in seconds) entries are fetched in
+    expected plan order instead of file order, OUTPUT_FILE is checkpointed every
+    `checkpoint_every` seconds, and no new fetch starts once the budget is spent.
+    Entries not reached keep their previous rows (and priced_at). Until every entry
+    has been priced, RESUME_FILE holds the run's start time, and the next run
+    (scheduled or not, unless resume=False) skips the entries priced since then.
+    """
+    started = time.monotonic()
+    schedule = schedule or budget is not None
+    resumed = load_resume() if resume else None
+    with metrics.stage("load"):
+        accessories = load_catalog(INPUT_FILE)
+        # Last run's rows, by id (Runebook has several); scheduling also uses them as price hints
+        previous = load_catalog(OUTPUT_FILE, missing_ok=True) if refresh or schedule or resumed else None
+    names = top_plan_names(top) if refresh and top else set()
+    stale_before = (
+        datetime.now(timezone.utc) - timedelta(hours=stale_after)
+        if stale_after is not None else None
+    )
+
+    results = [None] * len(accessories)
+    todo = []
+    carried = 0
+    for i, acc in enumerate(accessories):
+        rows = previous.rows(acc.id) if previous is not None else None
+        if resumed and priced_since(rows, resumed):
+            results[i] = rows
+            carried += 1
+        elif refresh and not needs_refresh(acc, rows, set(rarities), set(ids), names, stale_before):
+            results[i] = rows
+        else:
+            todo.append(i)
+
+    if resumed:
+        print(f"[RESUME] {carried} accessories already priced by the run started {resumed}")
+    if refresh or resumed:
+        print(f"[REFRESH] {len(todo)} of {len(accessories)} accessories to fetch")
+
+    todo_acc = [accessories.records[i] for i in todo]
+
+    # Bazaar prices for every recipe ingredient, fetched once up front
+    if craft_engine is None:
+        configure_crafting()
+    with metrics.stage("craft_prefetch"):
+        craft_engine.prefetch([acc.id for acc in todo_acc if acc.id in craft_engine.recipes], workers)
+
+    # Lowest BINs for everything the general case prices, in one concurrent pass
+    if price_sources != "median":
+        with metrics.stage("bin_prefetch"):
+            prefetch_bins([acc.id for acc in todo_acc if wants_bin(acc)], workers)
+
+    if schedule:
+        def checkpoint(done):
+            save_records(checkpoint_rows(results, todo, todo_acc, done, previous), OUTPUT_FILE)
+            print(f"[CHECKPOINT] {len(done)} of {len(todo)} priced, saved to {OUTPUT_FILE}")
+
+        # Recorded before the first fetch, so an interrupted run resumes too
+        save_resume(resumed or datetime.now(timezone.utc).isoformat(timespec="seconds"))
+        deadline = started + budget if budget is not None else None
+        with metrics.stage("price"):
+            done = price_scheduled(todo_acc, schedule_order(todo_acc, previous), workers, deadline,
+                                   checkpoint, checkpoint_every)
+        updated = checkpoint_rows(results, todo, todo_acc, done, previous)
+        finished = len(done) == len(todo)
+        if not finished:
+            print(f"[BUDGET] {len(done)} of {len(todo)} priced in {time.monotonic() - started:.0f}s; "
+                  f"run again to price the rest")
+    else:
+        with metrics.stage("price"):
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    fetched = list(pool.map(price_accessory, todo_acc))
             else:
-                print(f"[WARN] Still no price for {name}")
+                fetched = [price_accessory(acc) for acc in todo_acc]
+        for i, rows in zip(todo, fetched):
+            results[i] = rows
 
-        updated.append(acc)
+        updated = [row for rows in results for row in rows]
+        finished = True
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(updated, f, indent=2, ensure_ascii=False)
+    with metrics.stage("write"):
+        save_records(updated, OUTPUT_FILE)
+    if finished:
+        clear_resume()
 
     print(f"✅ Fixed prices saved to {OUTPUT_FILE}")
+    failed = sum(1 for row in updated if row.fetch_error)
+    if failed:
+        print(f"[FAILED] {failed} entries could not be fetched; run again with --refresh to retry only those")
+    if response_cache is not None:
+        print(f"[CACHE] {response_cache.summary()}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fill in missing accessory prices from CoflNet.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"concurrent fetch threads (default 1 = sequential; try {DEFAULT_WORKERS})")
+    parser.add_argument("--rps", type=float, default=None,
+                        help=f"global requests/second cap (default {DEFAULT_RPS} when --workers > 1)")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST,
+                        help=f"requests allowed back-to-back before the cap kicks in (default {DEFAULT_BURST})")
+    parser.add_argument("--retries", type=int, default=http_client.MAX_RETRIES,
+                        help=f"retries per request on timeouts, 5xx and 429 (default {http_client.MAX_RETRIES})")
+    parser.add_argument("--max-age", type=float, default=None,
+                        help="treat cached responses older than this many seconds as stale (overrides per-endpoint TTLs)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"bypass the on-disk response cache ({CACHE_FILE})")
+    parser.add_argument("--sources", choices=PRICE_SOURCES, default="median",
+                        help="median: recent sales only; bin: lowest BIN, recent sales only for unlisted items; "
+                             "both: fetch both (default median)")
+    parser.add_argument("--no-history", action="store_true",
+                        help=f"don't keep sales in {HISTORY_FILE}; price from the median of the last 3 sales")
+    parser.add_argument("--estimator", choices=ESTIMATORS, default="median",
+                        help="robust estimate a price is read from the history (default median)")
+    parser.add_argument("--history-max-age", type=float, default=None, metavar="SECONDS",
+                        help="reuse history estimates updated within SECONDS instead of fetching recent sales")
+    parser.add_argument("--refresh", action="store_true",
+                        help=f"reuse {OUTPUT_FILE} and only re-fetch new, stale or selected entries")
+    parser.add_argument("--stale-after", type=float, default=None, metavar="HOURS",
+                        help="with --refresh, re-fetch entries priced more than HOURS ago")
+    parser.add_argument("--rarity", action="append", default=[], type=str.upper,
+                        help="with --refresh, re-fetch entries of this rarity (repeatable)")
+    parser.add_argument("--ids", default="",
+                        help="with --refresh, comma-separated accessory ids to re-fetch")
+    parser.add_argument("--top", type=int, default=None, metavar="N",
+                        help=f"with --refresh, re-fetch the first N accessories of {PLAN_FILE}")
+    parser.add_argument("--schedule", action="store_true",
+                        help="fetch likely top-of-plan accessories first (by last known coins/MP) and checkpoint as it goes")
+    parser.add_argument("--budget", type=float, default=None, metavar="SECONDS",
+                        help="stop starting new fetches after SECONDS (implies --schedule); the next run resumes")
+    parser.add_argument("--no-resume", action="store_true",
+                        help=f"ignore an unfinished scheduled run ({RESUME_FILE}) and price everything again")
+    parser.add_argument("--checkpoint-every", type=float, default=CHECKPOINT_SECONDS, metavar="SECONDS",
+                        help=f"with --schedule, save partial results this often (default {CHECKPOINT_SECONDS:.0f})")
+    parser.add_argument("--bazaar-order", choices=sorted(BAZAAR_PRICE_FIELDS), default=DEFAULT_ORDER,
+                        help="price recipe ingredients at the lowest sell order (instant buy) or the top buy order")
+    parser.add_argument("--snapshot", action="store_true",
+                        help=f"also write {OUTPUT_FILE} as a memory-mappable snapshot (.snap) for fast loading")
+    parser.add_argument("--report", default=REPORT_FILE,
+                        help=f"JSON run report with request latencies, status codes and stage times (default {REPORT_FILE})")
+    parser.add_argument("--prometheus", default=None, metavar="PATH",
+                        help="also write the run report in Prometheus text format")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    fix_missing_prices()
+    args = parse_args()
+    rps = args.rps if args.rps is not None else (DEFAULT_RPS if args.workers > 1 else None)
+    configure_rate_limit(rps, args.burst)
+    http_client.configure_client(pool_size=max(args.workers, http_client.POOL_SIZE), retries=args.retries)
+    configure_cache(None if args.no_cache else CACHE_FILE, max_age=args.max_age)
+    configure_crafting(args.bazaar_order)
+    configure_sources(args.sources)
+    configure_history(None if args.no_history else HISTORY_FILE, args.estimator, args.history_max_age)
+    if args.snapshot:
+        configure_snapshots(True)
+    fix_missing_prices(
+        workers=args.workers,
+        refresh=args.refresh,
+        rarities=args.rarity,
+        ids=[i.strip() for i in args.ids.split(",") if i.strip()],
+        top=args.top,
+        stale_after=args.stale_after,
+        schedule=args.schedule,
+        budget=args.budget,
+        checkpoint_every=args.checkpoint_every,
+        resume=not args.no_resume,
+    )
+    metrics.write_report(args.report, response_cache)
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus, response_cache)
@@ -0,0 +1,168 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from statistics import median
+
+# --- Config ---
+
+HISTORY_FILE = "price_history.sqlite"
+
+# Estimates use at most the newest WINDOW_SALES observations of an item, and only
+# those within WINDOW_DAYS of its newest one (thin markets keep their last prices)
+WINDOW_SALES = 30
+WINDOW_DAYS = 14
+
+# Observations further than this many MADs (modified z-score) from the median are rejected
+OUTLIER_CUTOFF = 3.5
+
+# Fraction cut from each end of the sorted inliers for the trimmed mean
+TRIM = 0.1
+
+ESTIMATORS = ("median", "trimmed_mean")
+
+
+def parse_time(text):
+    """Epoch seconds for an ISO timestamp such as CoflNet's "end" field, or None."""
+    if not text:
+        return None
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def robust_estimate(prices, cutoff=OUTLIER_CUTOFF, trim=TRIM):
+    """
+    Median, trimmed mean and MAD of `prices` after rejecting outliers by modified
+    z-score (|0.6745 * (x - median) / MAD| > cutoff). With a MAD of 0 nothing is rejected.
+    """
+    m = median(prices)
+    mad = median(abs(p - m) for p in prices)
+    if mad:
+        inliers = sorted(p for p in prices if abs(0.6745 * (p - m) / mad) <= cutoff)
+    else:
+        inliers = sorted(prices)
+    cut = int(len(inliers) * trim)
+    kept = inliers[cut:len(inliers) - cut] or inliers
+    return {
+        "count": len(prices),
+        "outliers": len(prices) - len(inliers),
+        "median": median(inliers),
+        "trimmed_mean": sum(kept) / len(kept),
+        "mad": mad,
+    }
+
+
+# --- Store ---
+
+class PriceHistory:
+    """
+    Every sale and BIN price seen, per item, in SQLite, plus a robust estimate per
+    (item, tier, kind) that is recomputed from its window whenever new observations
+    arrive. Sales are de-duplicated by auction uuid, so re-reading the same
+    overview page only adds the sales that are new.
+    """
+
+    def __init__(self, path=HISTORY_FILE, window_sales=WINDOW_SALES, window_days=WINDOW_DAYS,
+                 cutoff=OUTLIER_CUTOFF, trim=TRIM):
+        self.path = path
+        self.window_sales = window_sales
+        self.window_days = window_days
+        self.cutoff = cutoff
+        self.trim = trim
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS observations ("
+            " item_id TEXT NOT NULL,"
+            " tier TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " uuid TEXT,"
+            " price REAL NOT NULL,"
+            " observed_at REAL NOT NULL);"
+            "CREATE UNIQUE INDEX IF NOT EXISTS observations_uuid ON observations (kind, uuid);"
+            "CREATE INDEX IF NOT EXISTS observations_item ON observations (item_id, tier, kind, observed_at);"
+            "CREATE TABLE IF NOT EXISTS estimates ("
+            " item_id TEXT NOT NULL,"
+            " tier TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " count INTEGER NOT NULL,"
+            " outliers INTEGER NOT NULL,"
+            " median REAL NOT NULL,"
+            " trimmed_mean REAL NOT NULL,"
+            " mad REAL NOT NULL,"
+            " latest REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (item_id, tier, kind))"
+        )
+        self.conn.commit()
+
+    def record_sales(self, item_id, sales, tier=""):
+        """
+        Append sales ([(uuid, price, ended_at epoch or None), ...]) for `item_id`.
+        Returns how many were new; the estimate is refreshed either way.
+        """
+        now = time.time()
+        rows = [(item_id, tier, "sale", uuid, float(price), ended if ended is not None else now)
+                for uuid, price, ended in sales]
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO observations (item_id, tier, kind, uuid, price, observed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)", rows)
+            added = self.conn.total_changes - before
+            self._refresh(item_id, tier, "sale", now)
+            self.conn.commit()
+        return added
+
+    def record_bin(self, item_id, price, tier=""):
+        """Append a lowest-BIN observation for `item_id`, timestamped now."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO observations (item_id, tier, kind, uuid, price, observed_at)"
+                " VALUES (?, ?, 'bin', NULL, ?, ?)", (item_id, tier, float(price), now))
+            self._refresh(item_id, tier, "bin", now)
+            self.conn.commit()
+
+    def _refresh(self, item_id, tier, kind, now):
+        # Recompute one estimate from its window (caller holds the lock)
+        window = self.conn.execute(
+            "SELECT price, observed_at FROM observations"
+            " WHERE item_id = ? AND tier = ? AND kind = ?"
+            " ORDER BY observed_at DESC LIMIT ?",
+            (item_id, tier, kind, self.window_sales),
+        ).fetchall()
+        if not window:
+            return
+        newest = window[0][1]
+        prices = [price for price, at in window if newest - at <= self.window_days * 86400]
+        est = robust_estimate(prices, self.cutoff, self.trim)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO estimates"
+            " (item_id, tier, kind, count, outliers, median, trimmed_mean, mad, latest, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (item_id, tier, kind, est["count"], est["outliers"], est["median"],
+             est["trimmed_mean"], est["mad"], newest, now),
+        )
+
+    def estimate(self, item_id, tier="", kind="sale", max_age=None):
+        """
+        The stored estimate for an item as a dict, or None if there is none
+        (or it was last updated more than `max_age` seconds ago).
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT count, outliers, median, trimmed_mean, mad, latest, updated_at FROM estimates"
+                " WHERE item_id = ? AND tier = ? AND kind = ?",
+                (item_id, tier, kind),
+            ).fetchone()
+        if row is None or (max_age is not None and time.time() - row[6] > max_age):
+            return None
+        keys = ("count", "outliers", "median", "trimmed_mean", "mad", "latest", "updated_at")
+        return dict(zip(keys, row))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,93 @@
+import json
+import sqlite3
+import threading
+import time
+
+# --- Config ---
+
+CACHE_FILE = "cofl_cache.sqlite"
+
+# Seconds a cached response stays fresh, per endpoint class (None = never expires)
+ENDPOINT_TTLS = {
+    "bazaar": 5 * 60,          # bazaar snapshots move constantly
+    "bin": 5 * 60,             # so do lowest BINs
+    "overview": 60 * 60,       # recent sales overview
+    "auction": None,           # a finished auction never changes
+    "default": 10 * 60,
+}
+
+
+def endpoint_class(url):
+    """Bucket a CoflNet URL into one of the ENDPOINT_TTLS classes."""
+    if "/api/bazaar/" in url:
+        return "bazaar"
+    if "/lowestbin/" in url:
+        return "bin"
+    if "/recent/overview" in url:
+        return "overview"
+    if "/api/auction/" in url:
+        return "auction"
+    return "default"
+
+
+# --- Cache ---
+
+class ResponseCache:
+    """
+    On-disk JSON response cache keyed by URL, backed by SQLite.
+    `max_age` (seconds) overrides the per-class TTLs when set; 0 forces a refetch.
+    """
+
+    def __init__(self, path=CACHE_FILE, ttls=None, max_age=None):
+        self.path = path
+        self.ttls = dict(ENDPOINT_TTLS, **(ttls or {}))
+        self.max_age = max_age
+        self.hits = {}
+        self.misses = {}
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY,"
+            " fetched_at REAL NOT NULL,"
+            " body TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def ttl_for(self, url):
+        if self.max_age is not None:
+            return self.max_age
+        return self.ttls.get(endpoint_class(url), self.ttls["default"])
+
+    def lookup(self, url):
+        """Return (True, data) for a fresh entry, (False, None) otherwise."""
+        kind = endpoint_class(url)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT fetched_at, body FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            ttl = self.ttl_for(url)
+            if row is not None and (ttl is None or time.time() - row[0] < ttl):
+                self.hits[kind] = self.hits.get(kind, 0) + 1
+                return True, json.loads(row[1])
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+            return False, None
+
+    def store(self, url, data):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (url, fetched_at, body) VALUES (?, ?, ?)",
+                (url, time.time(), json.dumps(data, ensure_ascii=False)),
+            )
+            self.conn.commit()
+
+    def summary(self):
+        kinds = sorted(set(self.hits) | set(self.misses))
+        parts = [f"{k} {self.hits.get(k, 0)}/{self.hits.get(k, 0) + self.misses.get(k, 0)}" for k in kinds]
+        total_hits = sum(self.hits.values())
+        total = total_hits + sum(self.misses.values())
+        return f"{total_hits} hits, {total - total_hits} misses" + (f" ({', '.join(parts)})" if parts else "")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from math import inf
+
+import numpy as np
+
+import talisman
+from price_history import HISTORY_FILE, PriceHistory
+
+# --- Config ---
+
+RISK_FILE = "accessory_risk.json"
+
+DEFAULT_SCENARIOS = 5000
+DEFAULT_TOP_K = 20
+DEFAULT_SEED = 0
+PERCENTILES = (5, 50, 95)
+
+# Scenarios per task; fixed so results don't depend on the number of workers
+CHUNK = 500
+
+# Relative price spread (≈ sigma of log price) when the price history can't tell,
+# by price_source: NPC prices are fixed, bazaar crafts move little, thin auctions a lot
+SPREAD_BY_SOURCE = {
+    "npc": 0.0,
+    "bazaar_craft": 0.05,
+    "cofl_bin": 0.15,
+}
+DEFAULT_SPREAD = 0.25
+
+# Sales needed before an item's own MAD is trusted over SPREAD_BY_SOURCE
+MIN_SALES = 5
+
+
+# --- Price spreads ---
+
+def price_spreads(parsed, accessories, history=None):
+    """
+    Relative spread of each parsed row's price: 1.4826 * MAD / median of its
+    observed sales when the price history has enough of them, else by price source.
+    """
+    spreads = np.empty(len(parsed))
+    for i, item in enumerate(parsed):
+        acc = next((a for a in accessories.rows(item["id"]) if a.rarity_label == item["rarity"]), None)
+        source = acc.price_source if acc is not None else None
+        spread = SPREAD_BY_SOURCE.get(source, DEFAULT_SPREAD)
+        if history is not None and spread:
+            tier = item["rarity"] if source == "history_by_tier" else ""
+            est = history.estimate(item["id"], tier=tier)
+            if est is not None and est["count"] >= MIN_SALES and est["median"] > 0:
+                spread = 1.4826 * est["mad"] / est["median"]
+        spreads[i] = spread
+    return spreads
+
+
+# --- Vectorized ranking ---
+
+def family_members(parsed, index):
+    """Parsed row indices of each upgrade family, in parsed order (rank_by_family's tie order)."""
+    members = {}
+    for i, item in enumerate(parsed):
+        members.setdefault(index.family_of(item["id"]), []).append(i)
+    return [np.asarray(m, dtype=np.int64) for m in members.values()]
+
+
+def rank_scenarios(prices, mps, families):
+    """
+    rank_by_family for every row of `prices` (scenarios x parsed rows) at once.
+
+    Each family's upgrade chain is walked with one vectorized step per tier; a
+    step sorts at the highest coins/MP along its chain so far (it can't be bought
+    before its predecessor), ties broken by parsed position like the heap.
+    Returns (order of step items, step coins/MP), both scenarios x steps, with
+    unused step slots at the end of each row (item -1, coins/MP NaN).
+    """
+    scenarios = prices.shape[0]
+    rows = np.arange(scenarios)
+    keys, items, cpms = [], [], []
+
+    singles = np.concatenate([m for m in families if len(m) == 1] or [np.empty(0, dtype=np.int64)])
+    if len(singles):
+        cpm = prices[:, singles] / mps[singles]
+        keys.append(cpm)
+        items.append(np.broadcast_to(singles, cpm.shape))
+        cpms.append(cpm)
+
+    for members in families:
+        if len(members) == 1:
+            continue
+        member_mp = mps[members]
+        member_prices = prices[:, members]
+        owned = np.zeros(scenarios)
+        running = np.full(scenarios, -inf)
+        for _ in range(len(members)):
+            gain = member_mp[None, :] - owned[:, None]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cpm = np.where(gain > 0, member_prices / gain, inf)
+            pick = cpm.argmin(axis=1)
+            best = cpm[rows, pick]
+            bought = np.isfinite(best)
+            if not bought.any():
+                break
+            running = np.where(bought, np.maximum(running, best), running)
+            keys.append(np.where(bought, running, inf)[:, None])
+            items.append(np.where(bought, members[pick], -1)[:, None])
+            cpms.append(np.where(bought, best, np.nan)[:, None])
+            owned = np.where(bought, member_mp[pick], owned)
+
+    keys = np.concatenate(keys, axis=1)
+    items = np.concatenate(items, axis=1)
+    cpms = np.concatenate(cpms, axis=1)
+    # Unused slots (item -1) sort last, behind every real step
+    order = np.lexsort((np.where(items < 0, len(mps), items), keys), axis=-1)
+    return np.take_along_axis(items, order, axis=1), np.take_along_axis(cpms, order, axis=1)
+
+
+# --- Worker ---
+
+_model = None
+
+
+def _init_worker(model):
+    global _model
+    _model = model
+
+
+def simulate_chunk(task):
+    """Sample one chunk of scenarios and rank them; returns (top-K counts per row, coins/MP per scenario x row)."""
+    seed, size = task
+    prices, spreads, mps, families, top_k = _model
+    rng = np.random.default_rng(seed)
+    sampled = prices * np.exp(spreads * rng.standard_normal((size, len(prices))))
+    ranked, step_cpm = rank_scenarios(sampled, mps, families)
+
+    top = ranked[:, :top_k]
+    top_counts = np.bincount(top[top >= 0], minlength=len(prices))
+
+    item_cpm = np.full((size, len(prices)), np.nan, dtype=np.float32)
+    bought = ranked >= 0
+    scenario = np.broadcast_to(np.arange(size)[:, None], ranked.shape)
+    item_cpm[scenario[bought], ranked[bought]] = step_cpm[bought]
+    return top_counts, item_cpm
+
+
+def simulate(parsed, spreads, index, scenarios=DEFAULT_SCENARIOS, top_k=DEFAULT_TOP_K,
+             seed=DEFAULT_SEED, workers=None):
+    """
+    Re-rank `parsed` under `scenarios` log-normal price draws (item prices
+    independent, sigma = spread) across a process pool.
+    Returns per-row top-K probability and bought-coins/MP samples (scenarios x rows, NaN = not bought).
+    """
+    prices = np.asarray([item["price"] for item in parsed], dtype=np.float64)
+    mps = np.asarray([item["mp"] for item in parsed], dtype=np.float64)
+    model = (prices, np.asarray(spreads, dtype=np.float64), mps, family_members(parsed, index), top_k)
+
+    sizes = [min(CHUNK, scenarios - start) for start in range(0, scenarios, CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = list(zip(seeds, sizes))
+    if workers == 1:
+        _init_worker(model)
+        results = [simulate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model,)) as pool:
+            results = list(pool.map(simulate_chunk, tasks))
+
+    top_counts = sum(counts for counts, _ in results)
+    item_cpm = np.concatenate([cpm for _, cpm in results])
+    return top_counts / scenarios, item_cpm
+
+
+def summarize(parsed, top_probability, item_cpm, top_k):
+    """Rows sorted by top-K probability, then expected coins/MP."""
+    bought = (~np.isnan(item_cpm)).sum(axis=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # rows never bought are all-NaN
+        expected = np.nanmean(item_cpm, axis=0)
+        percentiles = np.nanpercentile(item_cpm, PERCENTILES, axis=0)
+
+    rows = []
+    for i, item in enumerate(parsed):
+        row = {
+            "id": item["id"],
+            "name": item["name"],
+            "rarity": item["rarity"],
+            "price": int(item["price"]),
+            "mp": item["mp"],
+            f"top_{top_k}_probability": round(float(top_probability[i]), 4),
+            "bought_probability": round(float(bought[i]) / len(item_cpm), 4),
+            "coins_per_mp": None,
+        }
+        if bought[i]:
+            row["coins_per_mp"] = {"expected": int(expected[i])}
+            row["coins_per_mp"].update(
+                (f"p{p}", int(percentiles[k, i])) for k, p in enumerate(PERCENTILES)
+            )
+        rows.append(row)
+    rows.sort(key=lambda r: (-r[f"top_{top_k}_probability"],
+                             r["coins_per_mp"]["expected"] if r["coins_per_mp"] else inf))
+    return rows
+
+
+# --- Main ---
+
+def main(scenarios=DEFAULT_SCENARIOS, top_k=DEFAULT_TOP_K, seed=DEFAULT_SEED, workers=None, out=RISK_FILE):
+    accessories = talisman.load_accessories()
+    parsed = talisman.parse_accessories(accessories)
+    index = talisman.family_index_for(parsed)
+
+    history = PriceHistory(HISTORY_FILE) if os.path.exists(HISTORY_FILE) else None
+    spreads = price_spreads(parsed, accessories, history)
+    if history is not None:
+        history.close()
+
+    top_probability, item_cpm = simulate(parsed, spreads, index, scenarios, top_k, seed, workers)
+    rows = summarize(parsed, top_probability, item_cpm, top_k)
+
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump({"scenarios": scenarios, "top_k": top_k, "seed": seed, "items": rows},
+                  fh, indent=4, ensure_ascii=False)
+
+    for row in rows[:top_k]:
+        cpm = row["coins_per_mp"]
+        spread = f"{cpm[f'p{PERCENTILES[0]}']}-{cpm[f'p{PERCENTILES[-1]}']}" if cpm else "-"
+        print(f"{row['name']} | top {top_k} in {row[f'top_{top_k}_probability']:.0%} | "
+              f"{cpm['expected'] if cpm else '-'} coins/MP (p{PERCENTILES[0]}-p{PERCENTILES[-1]} {spread})")
+    print(f"Saved {len(rows)} items over {scenarios} scenarios to {out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo view of how stable the plan is under price noise.")
+    parser.add_argument("--scenarios", type=int, default=DEFAULT_SCENARIOS,
+                        help=f"price scenarios to re-plan (default {DEFAULT_SCENARIOS})")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K,
+                        help=f"report how often each item lands in the first K purchases (default {DEFAULT_TOP_K})")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--out", default=RISK_FILE, help=f"output file (default {RISK_FILE})")
+    args = parser.parse_args()
+    main(args.scenarios, args.top_k, args.seed, args.workers, args.out)
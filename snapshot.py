@@ -0,0 +1,130 @@
+import mmap
+import os
+import struct
+from array import array
+
+# --- Format ---
+#
+#   header     MAGIC, row count, column count
+#   directory  one entry per column: name, typecode, offset, size
+#   columns    8-byte aligned; numeric columns are packed little-endian arrays,
+#              string columns ("s") are n+1 uint64 offsets followed by UTF-8 bytes
+#
+# Readers mmap the file and only touch the pages of the columns they use.
+
+MAGIC = b"SKYSNAP1"
+HEADER = struct.Struct("<8sQQ")
+ENTRY = struct.Struct("<24s1s7xQQ")
+STRING = "s"
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def write_snapshot(path, rows, columns):
+    """
+    Write `columns` ({name: (typecode, values)}) for `rows` rows to `path`.
+    Typecodes are array module codes, or "s" for a column of strings.
+    The file is written next to `path` and renamed into place.
+    """
+    blobs = []
+    for name, (typecode, values) in columns.items():
+        if len(values) != rows:
+            raise ValueError(f"column {name} has {len(values)} values, expected {rows}")
+        if typecode == STRING:
+            encoded = [v.encode("utf-8") for v in values]
+            offsets = array("Q", [0])
+            for b in encoded:
+                offsets.append(offsets[-1] + len(b))
+            blob = offsets.tobytes() + b"".join(encoded)
+        else:
+            blob = array(typecode, values).tobytes()
+        blobs.append((name, typecode, blob))
+
+    offset = _align(HEADER.size + ENTRY.size * len(blobs))
+    directory = []
+    for name, typecode, blob in blobs:
+        directory.append(ENTRY.pack(name.encode("ascii"), typecode.encode("ascii"), offset, len(blob)))
+        offset = _align(offset + len(blob))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, rows, len(blobs)))
+        f.write(b"".join(directory))
+        for _, _, blob in blobs:
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(blob)
+    os.replace(tmp, path)
+
+
+# --- Reader ---
+
+class StringColumn:
+    """Lazily decoded string column: each value is decoded when indexed."""
+
+    def __init__(self, view, rows):
+        self.offsets = view[:(rows + 1) * 8].cast("Q")
+        self.data = view[(rows + 1) * 8:]
+        self.rows = rows
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(self.rows):
+            yield self[i]
+
+    def tolist(self):
+        """Decode the whole column at once (much faster than indexing every row)."""
+        data = bytes(self.data)
+        offsets = self.offsets.tolist()
+        text = data.decode("utf-8")
+        if len(text) == len(data):
+            # Pure ASCII: byte offsets are character offsets
+            return [text[offsets[i]:offsets[i + 1]] for i in range(self.rows)]
+        return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(self.rows)]
+
+
+class Snapshot:
+    """Memory-mapped snapshot; columns are zero-copy memoryviews over the file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.rows, count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            self.mm.close()
+            raise ValueError(f"{path} is not a snapshot file")
+        self.view = memoryview(self.mm)
+        self.directory = {}
+        for k in range(count):
+            name, typecode, offset, size = ENTRY.unpack_from(self.mm, HEADER.size + k * ENTRY.size)
+            self.directory[name.rstrip(b"\0").decode("ascii")] = (typecode.decode("ascii"), offset, size)
+        self.cache = {}
+
+    def __len__(self):
+        return self.rows
+
+    def __contains__(self, name):
+        return name in self.directory
+
+    def column(self, name):
+        """A numeric column as a memoryview, or a string column as a StringColumn."""
+        if name not in self.cache:
+            typecode, offset, size = self.directory[name]
+            view = self.view[offset:offset + size]
+            self.cache[name] = StringColumn(view, self.rows) if typecode == STRING else view.cast(typecode)
+        return self.cache[name]
+
+    def close(self):
+        for column in self.cache.values():
+            for view in (column.offsets, column.data) if isinstance(column, StringColumn) else (column,):
+                view.release()
+        self.cache = {}
+        self.view.release()
+        self.mm.close()
@@ -1,26 +1,32 @@
+import argparse
+import heapq
 import json
-import requests
-import time
+import os
 import random
-from math import inf
+from bisect import bisect_right
+from math import inf, isfinite, isnan, nextafter
+
+from accessory_families import FamilyIndex, load_family_index
+from catalog import (DEFAULT_PRICE_POLICY, PRICE_POLICIES, Catalog, Rarity, fresh_snapshot, load_catalog,
+                     magical_power, open_snapshot, snapshot_best_prices)
+import http_client
+from http_metrics import metrics
+from plan_shards import SHARDS_DIR, write_shards
+from response_cache import ResponseCache, CACHE_FILE
 
 # --- Config ---
 
 ACCESSORY_FILES = ["accessories_fixed.json"]
+PLAN_FILE = "accessory_plan.json"
+BUDGET_PLAN_FILE = "accessory_budget_plan.json"
+FRONTIER_FILE = "accessory_frontier.json"
+REPORT_FILE = "plan_report.json"
+SENSITIVITY_FILE = "accessory_recomb_sensitivity.json"
 
-COFL_RECOMBO_PRICE = "https://sky.coflnet.com/api/bazaar/RECOMBOBULATOR_3000/snapshot"
-
-# Magical Power per Rarity
-magical_power = {
-    "COMMON": 3,
-    "UNCOMMON": 5,
-    "RARE": 8,
-    "EPIC": 12,
-    "LEGENDARY": 16,
-    "MYTHIC": 22,
-    "SPECIAL": 3,
-    "VERY SPECIAL": 5
-}
+# Point COFL_API at a local stand-in (see cofl_stub.py) to run offline
+COFL_API = os.environ.get("COFL_API", "https://sky.coflnet.com/api")
+
+COFL_RECOMBO_PRICE = COFL_API + "/bazaar/RECOMBOBULATOR_3000/snapshot"
 
 # MP gained from recombobulating X rarity
 recombobulate = {
@@ -34,19 +40,42 @@ recombobulate = {
     "VERY SPECIAL": 0
 }
 
+# Rarity an accessory becomes once recombobulated
+recombobulate_to = {
+    "COMMON": "UNCOMMON",
+    "UNCOMMON": "RARE",
+    "RARE": "EPIC",
+    "EPIC": "LEGENDARY",
+    "LEGENDARY": "MYTHIC",
+    "MYTHIC": "SPECIAL",
+    "SPECIAL": "VERY SPECIAL"
+}
+
+
+# Set in __main__; None means every request goes to the network
+response_cache = None
+
+# Set in __main__: which market price accessories are ranked by (see catalog.PRICE_POLICIES)
+price_policy = DEFAULT_PRICE_POLICY
+
 
 # --- Helpers ---
 
 def polite_delay():
     """Random short sleep to avoid hammering APIs."""
-    time.sleep(random.uniform(0.4, 0.8))
+    metrics.sleep(random.uniform(0.4, 0.8), "polite_delay")
 
 
 def fetch_recombobulator_price():
+    if response_cache is not None:
+        hit, data = response_cache.lookup(COFL_RECOMBO_PRICE)
+        if hit:
+            price_per_unit = data.get("buyPrice")
+            return float(price_per_unit) if price_per_unit else None
     try:
-        resp = requests.get(COFL_RECOMBO_PRICE, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
+        data = http_client.client.get_json(COFL_RECOMBO_PRICE)
+        if response_cache is not None:
+            response_cache.store(COFL_RECOMBO_PRICE, data)
         price_per_unit = data.get("buyPrice")
         return float(price_per_unit) if price_per_unit else None
     except Exception as e:
@@ -56,69 +85,196 @@ def fetch_recombobulator_price():
         polite_delay()
 
 
-def best_price_for_accessory(acc):
-    # Return best available price (auction > craft > npc) or None.
-    for k in ("auction_price", "craft_price", "npc_price"):
-        v = acc.get(k)
-        if v is not None:
-            try:
-                return float(v)
-            except Exception:
-                pass
-    return None
-
-
-# --- Main ---
-
-def main():
-    all_acc = []
+def load_accessories():
+    # Every priced accessory from ACCESSORY_FILES, as one Catalog.
+    all_acc = Catalog()
     for fn in ACCESSORY_FILES:
-        try:
-            with open(fn, "r", encoding="utf-8") as fh:
-                data = json.load(fh)
-                if isinstance(data, list):
-                    all_acc.extend(data)
-        except FileNotFoundError:
-            continue
+        all_acc.extend(load_catalog(fn, missing_ok=True))
+    return all_acc
 
+
+def parse_accessories(all_acc):
+    # Keep accessories that have both a price and a known MP value.
     parsed = []
     for a in all_acc:
-        price = best_price_for_accessory(a)
+        price = a.best_price(price_policy)
         if price is None:
-            print(f"Failed to fetch price for {a.get('name','')}")
+            print(f"Failed to fetch price for {a.name or ''}")
             continue
 
-        rarity = a.get("rarity", "")
+        rarity = a.rarity_label
         mp = magical_power.get(rarity)
         if mp is None:
-            print(f"Failed to fetch MP for {a.get('name','')}")
+            print(f"Failed to fetch MP for {a.name or ''}")
             continue
 
         coins_per_mp = price / mp if mp else inf
         parsed.append({
-            "name": a.get("name"),
+            "id": a.id,
+            "name": a.name,
             "rarity": rarity,
             "price": price,
             "mp": mp,
             "coins_per_mp": coins_per_mp
         })
+    return parsed
+
+
+def parse_snapshot(snapshot):
+    # Same rows as parse_accessories(), read straight from a snapshot's columns.
+    # MP comes from the current magical_power table rather than the snapshot's
+    # "mp" column, so editing the table doesn't require re-pricing.
+    prices = snapshot_best_prices(snapshot, price_policy)
+    rarities = snapshot.column("rarity").tolist()
+    ids, names = snapshot.column("id").tolist(), snapshot.column("name").tolist()
+    labels = {r.value: r.label for r in Rarity}
+    mp_by_rarity = {r.value: magical_power.get(r.label, -1) for r in Rarity}
+    parsed = []
+    for i, price in enumerate(prices):
+        if isnan(price):
+            print(f"Failed to fetch price for {names[i]}")
+            continue
 
-    # Sort by coins/MP ascending
-    parsed.sort(key=lambda x: x["coins_per_mp"])
+        mp = mp_by_rarity.get(rarities[i], -1)
+        if mp < 0:
+            print(f"Failed to fetch MP for {names[i]}")
+            continue
+
+        parsed.append({
+            "id": ids[i] or None,
+            "name": names[i] or None,
+            "rarity": labels[rarities[i]],
+            "price": price,
+            "mp": mp,
+            "coins_per_mp": price / mp if mp else inf
+        })
+    return parsed
+
+
+def load_parsed():
+    # parse_accessories(load_accessories()), reading fresh snapshots column-wise instead of building records.
+    parsed = []
+    for fn in ACCESSORY_FILES:
+        snap = fresh_snapshot(fn)
+        if snap is None:
+            parsed.extend(parse_accessories(load_catalog(fn, missing_ok=True)))
+            continue
+        snapshot = open_snapshot(snap)
+        try:
+            parsed.extend(parse_snapshot(snapshot))
+        finally:
+            snapshot.close()
+    return parsed
 
-    recombo_price = fetch_recombobulator_price()
 
+def family_index_for(parsed):
+    # Family index from the full catalog, or from what we have if it's missing.
+    try:
+        return load_family_index()
+    except FileNotFoundError:
+        return FamilyIndex(item["id"] for item in parsed)
+
+
+def owned_family_mp(owned_ids, accessories_by_id, index):
+    """MP each family already provides for a player owning `owned_ids` (highest tier wins)."""
+    owned = {}
+    for item_id in owned_ids:
+        acc = accessories_by_id.get(item_id)
+        mp = magical_power.get(acc.rarity_label or "COMMON", 0) if acc else 0
+        family = index.family_of(item_id)
+        owned[family] = max(owned.get(family, 0), mp)
+    return owned
+
+
+def rank_by_family(parsed, index, owned_mp=None):
+    """
+    Order purchases by marginal coins/MP, treating each upgrade family as a chain.
+    Only the highest tier owned counts, so buying a higher tier after a lower one
+    is worth just the MP difference; tiers that add nothing are never emitted.
+    `owned_mp` ({family: mp}, see owned_family_mp) is what the player already has.
+    Returned rows carry the marginal "mp"/"coins_per_mp" and the row they replace.
+    """
+    owned_mp = owned_mp or {}
+    families = {}
+    for i, item in enumerate(parsed):
+        families.setdefault(index.family_of(item["id"]), []).append(i)
+
+    def push_best_step(heap, family, owned):
+        base_mp = owned_mp.get(family, 0)
+        owned_mp_now = parsed[owned]["mp"] if owned is not None else base_mp
+        best = None
+        for i in families[family]:
+            gain = parsed[i]["mp"] - owned_mp_now
+            if gain <= 0:
+                continue
+            cpm = parsed[i]["price"] / gain
+            if best is None or cpm < best[0]:
+                best = (cpm, i, gain)
+        if best is not None:
+            cpm, i, gain = best
+            heapq.heappush(heap, (cpm, i, gain, family, owned))
+
+    heap = []
+    for family in families:
+        push_best_step(heap, family, None)
+
+    ranked = []
+    while heap:
+        cpm, i, gain, family, owned = heapq.heappop(heap)
+        step = dict(parsed[i], mp=gain, coins_per_mp=cpm)
+        step["replaces"] = parsed[owned] if owned is not None else None
+        ranked.append(step)
+        push_best_step(heap, family, i)
+    return ranked
+
+
+def accessory_row(item):
+    """Plan row for buying one ranked accessory."""
+    row = {
+        "name": item["name"],
+        "rarity": item["rarity"],
+        "price": int(item["price"]),
+        "mp": item["mp"],
+        "coinsPerMP": int(item["coins_per_mp"])
+    }
+    replaced = item["replaces"]
+    if replaced is not None:
+        row["replaces"] = replaced["name"]
+    return row
+
+
+def recomb_row(rarity, count, recombo_price):
+    """Plan row for recombobulating `count` accessories of `rarity`."""
+    total_price = int(recombo_price * count)
+    total_mp = recombobulate.get(rarity, 0) * count
+    coins_per_mp_total = int(total_price / total_mp) if total_mp else 0
+
+    # Plural for recombobulation name
+    plural = "ies" if count != 1 else "y"
+
+    return {
+        "name": f"Recombobulate {count} {rarity} accessor{plural}",
+        "rarity": recombobulate_to.get(rarity, ""),
+        "price": total_price,
+        "mp": total_mp,
+        "coinsPerMP": coins_per_mp_total
+    }
+
+
+def print_row(row):
+    upgrade = f" (replaces {row['replaces']})" if "replaces" in row else ""
+    print(f"{row['name']} | {row['price']} coins | {row['mp']} MP | {row['coinsPerMP']} coins/MP{upgrade}")
+
+
+def build_plan(parsed, recombo_price, verbose=True):
+    """Turn ranked purchases into plan rows, splicing in recombobulations when they beat the next buy."""
     # Per-rarity counters
     rarity_counts = {r: 0 for r in magical_power.keys()}
 
     final_output = []
 
     for item in parsed:
-        name = item["name"]
         rarity = item["rarity"]
-        price = int(item["price"])
-        mp = item["mp"]
-        cpp = int(item["coins_per_mp"])
 
         # Check recombobulation for each rarity separately
         if recombo_price is not None:
@@ -129,65 +285,398 @@ def main():
                         recomb_cpp = recombo_price / recomb_mp
                         # If recombob is better than buying next cheapest
                         if item["coins_per_mp"] > recomb_cpp:
-                            total_price = int(recombo_price * count)
-                            total_mp = recomb_mp * count
-                            coins_per_mp_total = int(total_price / total_mp) if total_mp else 0
-
-                            # Plural for recombobulation name
-                            plural = "ies" if count != 1 else "y"
-
-                            recomb_to = ""
-
-                            if r == "COMMON":
-                                recomb_to = "UNCOMMON"
-                            elif r == "UNCOMMON":
-                                recomb_to = "RARE"
-                            elif r == "RARE":
-                                recomb_to = "EPIC"
-                            elif r == "EPIC":
-                                recomb_to = "LEGENDARY"
-                            elif r == "LEGENDARY":
-                                recomb_to = "MYTHIC"
-                            elif r == "MYTHIC":
-                                recomb_to = "SPECIAL"
-                            elif r == "SPECIAL":
-                                recomb_to = "VERY SPECIAL"
-
-                            final_output.append({
-                                "name": f"Recombobulate {count} {r} accessor{plural}",
-                                "rarity": recomb_to,
-                                "price": total_price,
-                                "mp": total_mp,
-                                "coinsPerMP": coins_per_mp_total
-                            })
-
-                            # Print recombobulation with accessory singular/plural
-                            print(
-                                f"Recombobulate {count} {r} accessor{plural} | "
-                                f"{total_price} coins | {total_mp} MP | {coins_per_mp_total} coins/MP"
-                            )
+                            final_output.append(recomb_row(r, count, recombo_price))
+                            if verbose:
+                                print_row(final_output[-1])
 
                             # Reset only THIS rarity counter
                             rarity_counts[r] = 0
 
-        final_output.append({
-            "name": name,
-            "rarity": rarity,
-            "price": price,
+        row = accessory_row(item)
+        final_output.append(row)
+        if verbose:
+            print_row(row)
+        replaced = item["replaces"]
+
+        # Increment counter for its rarity; the replaced tier no longer needs a recomb
+        rarity_counts[rarity] = rarity_counts.get(rarity, 0) + 1
+        if replaced is not None and rarity_counts.get(replaced["rarity"], 0) > 0:
+            rarity_counts[replaced["rarity"]] -= 1
+
+    return final_output
+
+
+# --- Recombobulator sensitivity ---
+
+def recomb_sensitivity(parsed):
+    """
+    Every plan build_plan(parsed, p) can produce, as price ranges of the Recombobulator.
+
+    build_plan only compares the recomb price p against item coins/MP times a
+    rarity's recomb MP, so the plan is piecewise constant in p with breakpoints
+    at those products. Sweeping them from the top down, each breakpoint makes one
+    item "hot" for one rarity (a recomb of that rarity now goes ahead of it); only
+    that rarity's counter run is re-simulated, from its previous recomb until it
+    meets one of the old recombs again (the counters agree from there on).
+
+    Returns ranges in ascending price: {"from", "to" (None = no upper bound),
+    "recombs": [[row index, rarity, count], ...]}, meaning recombobulate `count`
+    accessories of `rarity` just before ranked item `row index`, for p in [from, to).
+    """
+    n = len(parsed)
+    order = list(magical_power.keys())
+    rarities = [r for r in order if recombobulate.get(r, 0) > 0]
+    inc = {r: bytearray(n) for r in rarities}
+    dec = {r: bytearray(n) for r in rarities}
+    for i, item in enumerate(parsed):
+        if item["rarity"] in inc:
+            inc[item["rarity"]][i] = 1
+        replaced = item["replaces"]
+        if replaced is not None and replaced["rarity"] in dec:
+            dec[replaced["rarity"]][i] = 1
+
+    def breakpoint(cpm, recomb_mp):
+        # Smallest price at which build_plan's `cpm > price / recomb_mp` is False, to the last float bit
+        b = cpm * recomb_mp
+        while cpm > b / recomb_mp:
+            b = nextafter(b, inf)
+        while not cpm > nextafter(b, -inf) / recomb_mp:
+            b = nextafter(b, -inf)
+        return b
+
+    flips = sorted(
+        ((breakpoint(item["coins_per_mp"], recombobulate[r]), i, r) for i, item in enumerate(parsed)
+         for r in rarities if item["coins_per_mp"] > 0),
+        reverse=True,
+    )
+    hot = {r: bytearray(n) for r in rarities}
+    recombs = {r: [] for r in rarities}  # rarity -> [(row index, count)] in row order
+
+    def resimulate(r, i):
+        # Replay rarity r's counter from its last recomb before row i, after row i turned hot.
+        # Returns whether rarity r's recombs changed.
+        old = recombs[r]
+        k = bisect_right(old, (i,))
+        count, start = 0, 0
+        if k:
+            j = old[k - 1][0]
+            count = inc[r][j]
+            start = j + 1
+        old_at = {pos: idx for idx, (pos, _) in enumerate(old[k:], start=k)}
+        new = []
+        h, up, down = hot[r], inc[r], dec[r]
+        for pos in range(start, n):
+            if count > 0 and h[pos]:
+                new.append((pos, count))
+                count = 0
+                if pos in old_at:
+                    end = old_at[pos] + 1
+                    if new == old[k:end]:
+                        return False
+                    recombs[r] = old[:k] + new + old[end:]
+                    return True
+            count += up[pos]
+            if down[pos] and count > 0:
+                count -= 1
+        if new == old[k:]:
+            return False
+        recombs[r] = old[:k] + new
+        return True
+
+    def snapshot():
+        rank = {r: order.index(r) for r in rarities}
+        rows = sorted((pos, rank[r], r, count) for r in rarities for pos, count in recombs[r])
+        return [[pos, r, count] for pos, _, r, count in rows]
+
+    ranges = []
+    upper = None
+    current = snapshot()
+    k = 0
+    while k < len(flips):
+        price = flips[k][0]
+        changed = False
+        while k < len(flips) and flips[k][0] == price:
+            _, i, r = flips[k]
+            hot[r][i] = 1
+            changed = resimulate(r, i) or changed
+            k += 1
+        if changed:
+            ranges.append({"from": price, "to": upper, "recombs": current})
+            upper = price
+            current = snapshot()
+    ranges.append({"from": 0, "to": upper, "recombs": current})
+    ranges.reverse()
+    return ranges
+
+
+def splice_recombs(rows, recombs, recombo_price):
+    """Plan rows for one sensitivity range: accessory `rows` with the range's recombs priced at `recombo_price`."""
+    plan = []
+    k = 0
+    for i, row in enumerate(rows):
+        while k < len(recombs) and recombs[k][0] == i:
+            plan.append(recomb_row(recombs[k][1], recombs[k][2], recombo_price))
+            k += 1
+        plan.append(row)
+    return plan
+
+
+def plan_for_recomb_price(sensitivity, recombo_price):
+    """The plan build_plan would produce at `recombo_price`, read from a saved sensitivity table."""
+    ranges = sensitivity["ranges"]
+    k = bisect_right([r["from"] for r in ranges], recombo_price) - 1
+    return splice_recombs(sensitivity["rows"], ranges[max(k, 0)]["recombs"], recombo_price)
+
+
+def sensitivity(recombo_price=None):
+    """Write SENSITIVITY_FILE: the plan's recombobulation layout for every Recombobulator price."""
+    with metrics.stage("load"):
+        parsed = load_parsed()
+    with metrics.stage("rank"):
+        parsed = rank_by_family(parsed, family_index_for(parsed))
+    with metrics.stage("sensitivity"):
+        ranges = recomb_sensitivity(parsed)
+    table = {"rows": [accessory_row(item) for item in parsed], "ranges": ranges}
+
+    with metrics.stage("write"):
+        with open(SENSITIVITY_FILE, "w", encoding="utf-8") as fh:
+            json.dump(table, fh, indent=4, ensure_ascii=False)
+    print(f"Saved {len(ranges)} Recombobulator price ranges to {SENSITIVITY_FILE}")
+
+    if recombo_price is None:
+        with metrics.stage("recombobulator_price"):
+            recombo_price = fetch_recombobulator_price()
+    if recombo_price is not None:
+        k = bisect_right([r["from"] for r in ranges], recombo_price) - 1
+        here = ranges[k]
+        upper = f"{here['to']:.0f}" if here["to"] is not None else "up"
+        print(f"Recombobulator at {recombo_price:.0f} coins: plan holds from {here['from']:.0f} to {upper}, "
+              f"{len(here['recombs'])} recomb rows")
+    return table
+
+
+def plan_within_budget(plan, budget):
+    """Leading plan rows whose running total fits in `budget` coins."""
+    affordable = []
+    spent = 0
+    for row in plan:
+        if spent + row["price"] > budget:
+            break
+        spent += row["price"]
+        affordable.append(row)
+    return affordable
+
+
+# --- Main ---
+
+def main(recombo_price=None, shards_dir=SHARDS_DIR):
+    with metrics.stage("load"):
+        parsed = load_parsed()
+
+    # Rank by marginal coins/MP ascending, one upgrade chain per family
+    with metrics.stage("rank"):
+        parsed = rank_by_family(parsed, family_index_for(parsed))
+
+    if recombo_price is None:
+        with metrics.stage("recombobulator_price"):
+            recombo_price = fetch_recombobulator_price()
+
+    with metrics.stage("plan"):
+        final_output = build_plan(parsed, recombo_price)
+
+    with metrics.stage("write"):
+        with open(PLAN_FILE + ".tmp", "w", encoding="utf-8") as fh:
+            json.dump(final_output, fh, indent=4, ensure_ascii=False)
+        os.replace(PLAN_FILE + ".tmp", PLAN_FILE)
+
+    print(f"Saved {len(final_output)} items to {PLAN_FILE}")
+
+    # Minified, precompressed shards so the frontend can render the first page right away
+    if shards_dir:
+        with metrics.stage("shards"):
+            index = write_shards(final_output, shards_dir)
+        print(f"Saved {len(index['shards'])} plan shards to {shards_dir}/")
+    if response_cache is not None:
+        print(f"[CACHE] {response_cache.summary()}")
+
+
+# --- Budget optimizer ---
+
+def parse_coins(text):
+    """Parse a coin amount such as 250M, 1.5B, 750k or 1200000."""
+    text = str(text).strip().upper().replace(",", "").replace("_", "")
+    scale = {"K": 1e3, "M": 1e6, "B": 1e9}.get(text[-1:], 1)
+    if scale != 1:
+        text = text[:-1]
+    value = float(text) * scale
+    if not isfinite(value):
+        raise ValueError(f"not a finite coin amount: {text!r}")
+    return int(value)
+
+
+def accessory_options(parsed, recombo_price, index):
+    """
+    One choice group per upgrade family: [(cost, mp, recombobulated, parsed index), ...].
+    Only the highest tier owned counts, so at most one member of a family is bought.
+    Skipping is implicit; buy+recomb is only offered when it adds MP.
+    """
+    families = {}
+    for i, item in enumerate(parsed):
+        options = families.setdefault(index.family_of(item["id"]), [])
+        options.append((int(item["price"]), item["mp"], False, i))
+        recomb_mp = recombobulate.get(item["rarity"], 0)
+        if recombo_price is not None and recomb_mp > 0:
+            options.append((int(item["price"] + recombo_price), item["mp"] + recomb_mp, True, i))
+    return list(families.values())
+
+
+def solve_min_cost(groups):
+    """
+    Exact multiple-choice knapsack over magical power.
+    min_cost[m] is the cheapest way to reach exactly m MP taking at most one option
+    per group; picks[i][m] is the 1-based option group i used for that state (0 = skipped).
+    """
+    max_mp = sum(max(option[1] for option in options) for options in groups)
+    min_cost = [inf] * (max_mp + 1)
+    min_cost[0] = 0
+    picks = []
+    reach = 0
+
+    for options in groups:
+        new_cost = min_cost[:]
+        pick = bytearray(max_mp + 1)
+        for k, (cost, mp, *_) in enumerate(options, start=1):
+            for m in range(reach + mp, mp - 1, -1):
+                candidate = min_cost[m - mp] + cost
+                if candidate < new_cost[m]:
+                    new_cost[m] = candidate
+                    pick[m] = k
+        reach += max(option[1] for option in options)
+        min_cost = new_cost
+        picks.append(pick)
+
+    return min_cost, picks
+
+
+def mp_frontier(min_cost):
+    """Pareto frontier [(cost, mp), ...]: each point is the most MP reachable for that many coins."""
+    frontier = []
+    best_above = inf
+    for m in range(len(min_cost) - 1, -1, -1):
+        if min_cost[m] < best_above:
+            best_above = min_cost[m]
+            frontier.append((int(min_cost[m]), m))
+    frontier.reverse()
+    return frontier
+
+
+def best_mp_for_budget(frontier, budget):
+    """Highest MP on the frontier whose cost fits the budget."""
+    i = bisect_right([cost for cost, _ in frontier], budget)
+    return frontier[i - 1][1] if i else 0
+
+
+def reconstruct_plan(parsed, groups, picks, target_mp):
+    """Walk the pick tables back from target_mp to the chosen purchases."""
+    plan = []
+    m = target_mp
+    for i in range(len(groups) - 1, -1, -1):
+        k = picks[i][m]
+        if not k:
+            continue
+        cost, mp, recomb, item_index = groups[i][k - 1]
+        item = parsed[item_index]
+        plan.append({
+            "name": item["name"],
+            "rarity": recombobulate_to.get(item["rarity"], item["rarity"]) if recomb else item["rarity"],
+            "price": cost,
             "mp": mp,
-            "coinsPerMP": cpp
+            "recombobulate": recomb
         })
+        m -= mp
+    plan.reverse()
+    return plan
+
+
+def optimize(budgets, sweep=False, recombo_price=None):
+    """
+    Answer "which purchases and recombs maximize MP for N coins" exactly.
+    One DP run serves every budget; with sweep=True the full budget->MP frontier
+    is written to FRONTIER_FILE as well.
+    """
+    with metrics.stage("load"):
+        parsed = load_parsed()
+    if recombo_price is None:
+        with metrics.stage("recombobulator_price"):
+            recombo_price = fetch_recombobulator_price()
+    if recombo_price is None:
+        print("[WARN] No Recombobulator price, optimizing without recombobulation")
+
+    with metrics.stage("optimize"):
+        groups = accessory_options(parsed, recombo_price, family_index_for(parsed))
+        min_cost, picks = solve_min_cost(groups)
+        frontier = mp_frontier(min_cost)
+
+    plans = []
+    for budget in budgets:
+        target = best_mp_for_budget(frontier, budget)
+        plan = reconstruct_plan(parsed, groups, picks, target)
+        total = sum(row["price"] for row in plan)
+        plans.append({
+            "budget": budget,
+            "mp": target,
+            "price": total,
+            "items": plan
+        })
+        print(f"Budget {budget} coins -> {target} MP for {total} coins ({len(plan)} purchases)")
 
-        # Print the accessory
-        print(f"{name} | {price} coins | {mp} MP | {cpp} coins/MP")
+    if plans:
+        with open(BUDGET_PLAN_FILE, "w", encoding="utf-8") as fh:
+            json.dump(plans, fh, indent=4, ensure_ascii=False)
+        print(f"Saved {len(plans)} budget plans to {BUDGET_PLAN_FILE}")
 
-        # Increment counter for its rarity
-        rarity_counts[rarity] = rarity_counts.get(rarity, 0) + 1
+    if sweep:
+        with open(FRONTIER_FILE, "w", encoding="utf-8") as fh:
+            json.dump([{"price": cost, "mp": mp} for cost, mp in frontier], fh, indent=4)
+        print(f"Saved {len(frontier)} frontier points to {FRONTIER_FILE}")
 
-    with open("accessory_plan.json", "w", encoding="utf-8") as fh:
-        json.dump(final_output, fh, indent=4, ensure_ascii=False)
+    return plans, frontier
 
-    print(f"Saved {len(final_output)} items to accessory_plan.json")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Rank accessory upgrades by coins per magical power.")
+    parser.add_argument("--max-age", type=float, default=None,
+                        help="treat cached responses older than this many seconds as stale")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"bypass the on-disk response cache ({CACHE_FILE})")
+    parser.add_argument("--budget", action="append", default=[], type=parse_coins,
+                        help="coin budget to maximize MP for, e.g. 250M (repeatable)")
+    parser.add_argument("--sweep", action="store_true",
+                        help=f"write the whole budget->MP frontier to {FRONTIER_FILE}")
+    parser.add_argument("--recomb-price", type=parse_coins, default=None,
+                        help="use this Recombobulator 3000 price instead of fetching it, e.g. 6.2M")
+    parser.add_argument("--price-policy", choices=PRICE_POLICIES, default=DEFAULT_PRICE_POLICY,
+                        help="market price to rank by: the lower of lowest BIN and recent-sales median (min), "
+                             "BIN only or median only (default min)")
+    parser.add_argument("--sensitivity", action="store_true",
+                        help=f"write the plan's recomb layout for every Recombobulator price to {SENSITIVITY_FILE}")
+    parser.add_argument("--shards-dir", default=SHARDS_DIR,
+                        help=f"where the sharded, precompressed copy of the plan goes (default {SHARDS_DIR}/)")
+    parser.add_argument("--no-shards", action="store_true", help="only write the single plan file")
+    parser.add_argument("--report", default=REPORT_FILE,
+                        help=f"JSON run report with request latencies, status codes and stage times (default {REPORT_FILE})")
+    parser.add_argument("--prometheus", default=None, metavar="PATH",
+                        help="also write the run report in Prometheus text format")
+    args = parser.parse_args()
+    if not args.no_cache:
+        response_cache = ResponseCache(CACHE_FILE, max_age=args.max_age)
+    price_policy = args.price_policy
+    if args.sensitivity:
+        sensitivity(args.recomb_price)
+    elif args.budget or args.sweep:
+        optimize(args.budget, sweep=args.sweep, recombo_price=args.recomb_price)
+    else:
+        main(args.recomb_price, None if args.no_shards else args.shards_dir)
+    metrics.write_report(args.report, response_cache)
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus, response_cache)
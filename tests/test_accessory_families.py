@@ -0,0 +1,52 @@
+import pytest
+
+import accessory_families
+from accessory_families import FamilyIndex, classify
+
+
+@pytest.mark.parametrize("item_id, heuristic, override", [
+    # RING_OF_* reads as the RING tier of a "COINS" family, one rank too high
+    ("RING_OF_COINS", ("COINS", 2), ("COINS", 1)),
+    # Trailing tier word would split CAT_TALISMAN off as "CAT"
+    ("CAT_TALISMAN", ("CAT", 0), ("CAT_TALISMAN", 0)),
+    ("SHADY_RING", ("SHADY", 2), ("SHADY_RING", 0)),
+    ("CROOKED_ARTIFACT", ("CROOKED", 3), ("SHADY_RING", 1)),
+    # No pattern at all: each would be its own family
+    ("RAZOR_SHARP_SHARK_TOOTH_NECKLACE", ("RAZOR_SHARP_SHARK_TOOTH_NECKLACE", 0), ("SHARK_TOOTH_NECKLACE", 4)),
+    ("JERRY_TALISMAN_GOLDEN", ("JERRY_TALISMAN_GOLDEN", 0), ("JERRY_TALISMAN", 3)),
+])
+def test_upgrade_chains_win_over_name_patterns(monkeypatch, item_id, heuristic, override):
+    assert classify(item_id) == override
+    monkeypatch.delitem(accessory_families.FAMILY_OVERRIDES, item_id)
+    assert classify(item_id) == heuristic
+
+
+def test_override_added_at_runtime_wins(monkeypatch):
+    assert classify("ANITA_RING") == ("ANITA", 2)
+    monkeypatch.setitem(accessory_families.FAMILY_OVERRIDES, "ANITA_RING", ("ANITA_RING", 0))
+    assert classify("ANITA_RING") == ("ANITA_RING", 0)
+    assert FamilyIndex(["ANITA_TALISMAN", "ANITA_RING"]).chains() == {}
+
+
+def test_family_index_orders_chains_by_override_rank():
+    ids = ["SEAL_OF_THE_FAMILY", "CAT_TALISMAN", "SHADY_RING", "CHEETAH_TALISMAN", "CROOKED_ARTIFACT", "LYNX_TALISMAN"]
+    index = FamilyIndex(ids)
+    assert index.chains() == {
+        "SHADY_RING": ["SHADY_RING", "CROOKED_ARTIFACT", "SEAL_OF_THE_FAMILY"],
+        "CAT_TALISMAN": ["CAT_TALISMAN", "LYNX_TALISMAN", "CHEETAH_TALISMAN"],
+    }
+    assert index.family_of("CROOKED_ARTIFACT") == "SHADY_RING"
+    assert index.rank_of("CHEETAH_TALISMAN") == 2
+
+
+def test_wolf_paw_stays_out_of_the_wolf_line():
+    index = FamilyIndex(["WOLF_TALISMAN", "WOLF_RING", "WOLF_PAW"])
+    assert index.family_of("WOLF_PAW") == "WOLF_PAW"
+    assert index.chains() == {"WOLF": ["WOLF_TALISMAN", "WOLF_RING"]}
+
+
+def test_name_patterns():
+    assert classify("CAMPFIRE_TALISMAN_12") == ("CAMPFIRE_TALISMAN", 12)
+    assert classify("BEASTMASTER_CREST_EPIC") == ("BEASTMASTER_CREST", 3)
+    assert classify("ARTIFACT_POTION_AFFINITY") == ("POTION_AFFINITY", 3)
+    assert classify("HEGEMONY_ARTIFACT") == ("HEGEMONY", 3)
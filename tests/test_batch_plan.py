@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+import talisman
+from accessory_families import FamilyIndex
+from batch_plan import BatchPlanner
+from catalog import Accessory, Catalog, Rarity
+
+LINES = ["SPEED", "ZOMBIE", "BAT", "CANDY", "FEATHER"]
+RARITIES = ["COMMON", "UNCOMMON", "RARE", "EPIC", "LEGENDARY"]
+
+
+def random_catalog(rng):
+    """A few upgrade lines plus loose accessories, with small prices so coins/MP ties are common."""
+    rows = []
+    for line in rng.sample(LINES, rng.randint(1, len(LINES))):
+        tiers = rng.sample(["TALISMAN", "RING", "ARTIFACT", "RELIC"], rng.randint(1, 3))
+        for tier in tiers:
+            rarity = rng.choice(RARITIES)
+            rows.append(Accessory(f"{line}_{tier}", f"{line} {tier}".title(), Rarity[rarity], rng.randint(1, 8) * 10))
+    for k in range(rng.randint(0, 4)):
+        rows.append(Accessory(f"LOOSE_{k}", f"Loose {k}", Rarity[rng.choice(RARITIES)], rng.randint(1, 8) * 10))
+    # Same id at several tiers, like the Runebook clones
+    for rarity in rng.sample(RARITIES, rng.randint(0, 3)):
+        rows.append(Accessory("RUNEBOOK", "Runebook", Rarity[rarity], rng.randint(1, 8) * 10))
+    return rows
+
+
+def rank_alone(priced, catalog, index, owned):
+    """The single-player ranking planner_server and talisman.main compute."""
+    by_id = {a.id: a for a in catalog}
+    by_id.update((a.id, a) for a in priced)
+    owned_mp = talisman.owned_family_mp(owned, by_id, index)
+    return talisman.rank_by_family(talisman.parse_accessories(priced), index, owned_mp)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_batch_ranking_matches_rank_by_family(seed):
+    rng = random.Random(seed)
+    catalog = Catalog(random_catalog(rng))
+    index = FamilyIndex(a.id for a in catalog)
+    # A rarity filter applied to the priced rows, as /plan?rarity=... does
+    allowed = set(rng.sample(RARITIES, rng.randint(2, len(RARITIES))))
+    priced = Catalog([a for a in catalog if a.rarity_label in allowed])
+    ids = sorted(set(a.id for a in catalog))
+    profiles = [(f"player{p}", rng.sample(ids, rng.randint(0, len(ids)))) for p in range(6)]
+
+    planner = BatchPlanner(priced, index, 500, catalog)
+    for (name, owned), ranked in zip(profiles, planner.rank(profiles)):
+        assert ranked == rank_alone(priced, catalog, index, owned), name
+
+
+def test_plan_matches_build_plan():
+    rng = random.Random(7)
+    catalog = Catalog(random_catalog(rng))
+    index = FamilyIndex(a.id for a in catalog)
+    profiles = [("empty", []), ("some", [a.id for a in list(catalog)[::2]])]
+    plans = BatchPlanner(catalog, index, 500, catalog).plan(profiles)
+    for (_, owned), plan in zip(profiles, plans):
+        assert plan == talisman.build_plan(rank_alone(catalog, catalog, index, owned), 500, verbose=False)
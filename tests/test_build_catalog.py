@@ -0,0 +1,103 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+import build_catalog
+
+
+def item(item_id, name, rarity_line):
+    return {"internalname": item_id, "displayname": name, "lore": ["§7Some text", "", rarity_line, ""]}
+
+
+ITEMS = {
+    "SPEED_TALISMAN.json": item("SPEED_TALISMAN", "§aSpeed Talisman", "§f§lCOMMON ACCESSORY"),
+    "SPEED_RING.json": item("SPEED_RING", "§aSpeed Ring", "§a§lUNCOMMON ACCESSORY"),
+    "sub/HAT.json": item("PARTY_HAT", "§9Party Hat", "§9§lRARE DUNGEON HATCESSORY"),
+    "sub/SWORD.json": item("ASPECT_OF_THE_END", "Aspect of the End", "§9§lRARE SWORD"),
+    "broken.json": None,
+}
+
+
+@pytest.fixture
+def items(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name, data in ITEMS.items():
+        path = tmp_path / "items" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("{not json" if data is None else json.dumps(data), encoding="utf-8")
+    return tmp_path / "items"
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Ids parse_item is called for (run with workers=1 so calls stay in this process)."""
+    calls = []
+    real = build_catalog.parse_item
+
+    def parse_item(data):
+        calls.append(data["internalname"])
+        return real(data)
+    monkeypatch.setattr(build_catalog, "parse_item", parse_item)
+    return calls
+
+
+def build(workers=1):
+    build_catalog.build_catalog("items", "out.json", "cache.json", workers)
+    with open("out.json", "rb") as f:
+        return f.read()
+
+
+def test_output(items):
+    build()
+    with open("out.json", encoding="utf-8") as f:
+        rows = json.load(f)
+    assert [(row["id"], row["name"], row["rarity"]) for row in rows] == [
+        ("PARTY_HAT", "Party Hat", "RARE"),
+        ("SPEED_RING", "Speed Ring", "UNCOMMON"),
+        ("SPEED_TALISMAN", "Speed Talisman", "COMMON"),
+    ]
+
+
+def test_output_is_byte_identical_across_runs(items):
+    first = build()
+    os.remove("out.json")
+    assert build() == first  # from the cache
+    os.remove("out.json")
+    os.remove("cache.json")
+    assert build(workers=2) == first  # from scratch, on a process pool
+
+
+def test_unchanged_files_are_not_parsed_again(items, parsed, capsys):
+    build()
+    assert sorted(parsed) == ["ASPECT_OF_THE_END", "PARTY_HAT", "SPEED_RING", "SPEED_TALISMAN"]
+    parsed.clear()
+    capsys.readouterr()
+
+    build()
+    assert parsed == []
+    assert "[SCAN] 5 files, 0 changed on disk, 0 parsed" in capsys.readouterr().out
+
+    # Touched but identical: read and hashed, still not parsed
+    st = os.stat(items / "SPEED_RING.json")
+    os.utime(items / "SPEED_RING.json", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    build()
+    assert parsed == []
+    assert "[SCAN] 5 files, 1 changed on disk, 0 parsed" in capsys.readouterr().out
+
+    (items / "SPEED_RING.json").write_text(json.dumps(item("SPEED_RING", "Speed Ring", "§5§lEPIC ACCESSORY")))
+    build()
+    assert parsed == ["SPEED_RING"]
+    with open("out.json", encoding="utf-8") as f:
+        assert {row["id"]: row["rarity"] for row in json.load(f)}["SPEED_RING"] == "EPIC"
+
+
+def test_zip_source_matches_directory(items):
+    from_dir = build()
+    with zipfile.ZipFile("items.zip", "w") as archive:
+        for name in sorted(ITEMS):
+            archive.write(items / name, name)
+    build_catalog.build_catalog("items.zip", "zip.json", "zip_cache.json", 1)
+    with open("zip.json", "rb") as f:
+        assert f.read() == from_dir
@@ -0,0 +1,79 @@
+import pytest
+
+from craft_costs import CraftCostEngine, RecipeCycleError, format_breakdown
+
+RECIPES = {
+    "FRIED_FROZEN_CHICKEN": {"FRIED_FEATHER": 256, "ENCHANTED_GLACITE": 128},
+    "FRIED_FEATHER": {"FEATHER": 4, "ENCHANTED_BLAZE_POWDER": 1},
+    "ENCHANTED_GLACITE": {"GLACITE": 160},
+}
+PRICES = {"FEATHER": 10, "ENCHANTED_BLAZE_POWDER": 1000, "GLACITE": 2}
+
+
+def engine(recipes=RECIPES, prices=PRICES, fetched=None):
+    def fetch_snapshot(item_id):
+        if fetched is not None:
+            fetched.append(item_id)
+        return {"buyPrice": prices.get(item_id), "sellPrice": 1}
+    return CraftCostEngine(recipes, fetch_snapshot)
+
+
+def test_nested_cost():
+    total, breakdown = engine().cost("FRIED_FROZEN_CHICKEN")
+    assert total == 256 * (4 * 10 + 1000) + 128 * 160 * 2
+    feather = breakdown[0]
+    assert feather["source"] == "craft" and feather["unit_price"] == 1040
+    assert [part["cost"] for part in feather["ingredients"]] == [40, 1000]
+
+
+def test_recipe_cycle_is_detected():
+    recipes = dict(RECIPES, GLACITE={"ENCHANTED_GLACITE": 1})
+    with pytest.raises(RecipeCycleError, match="ENCHANTED_GLACITE -> GLACITE -> ENCHANTED_GLACITE"):
+        engine(recipes).cost("FRIED_FROZEN_CHICKEN")
+
+
+def test_costs_and_prices_are_memoized():
+    fetched = []
+    craft = engine(fetched=fetched)
+    first = craft.cost("FRIED_FROZEN_CHICKEN")
+    craft.recipes = {}  # a second lookup would now raise KeyError
+    assert craft.cost("FRIED_FROZEN_CHICKEN")[1] is first[1]
+    assert craft.cost("FRIED_FEATHER")[0] == 1040
+    assert sorted(fetched) == sorted(PRICES)
+
+
+def test_shared_ingredient_fetched_once():
+    fetched = []
+    recipes = dict(RECIPES, BLAZE_ROD_THING={"ENCHANTED_BLAZE_POWDER": 2, "FEATHER": 1})
+    craft = engine(recipes, fetched=fetched)
+    craft.prefetch(["FRIED_FROZEN_CHICKEN", "BLAZE_ROD_THING"])
+    craft.cost("FRIED_FROZEN_CHICKEN")
+    craft.cost("BLAZE_ROD_THING")
+    assert sorted(fetched) == sorted(PRICES)
+
+
+def test_missing_ingredient_price_means_no_craft_price():
+    craft = engine(prices=dict(PRICES, ENCHANTED_BLAZE_POWDER=None))
+    total, breakdown = craft.cost("FRIED_FROZEN_CHICKEN")
+    assert total is None
+    assert craft.costs["FRIED_FEATHER"][0] is None
+    assert craft.costs["ENCHANTED_GLACITE"][0] == 320
+    assert breakdown[0]["cost"] is None and breakdown[1]["cost"] == 128 * 320
+    assert format_breakdown(breakdown)[0] == "  FRIED_FEATHER x256 = ? (craft)"
+
+
+def test_failed_fetch_means_no_craft_price():
+    def fetch_snapshot(item_id):
+        if item_id == "GLACITE":
+            raise ConnectionError("down")
+        return {"buyPrice": PRICES[item_id]}
+    craft = CraftCostEngine(RECIPES, fetch_snapshot)
+    assert craft.cost("FRIED_FROZEN_CHICKEN")[0] is None
+    assert list(craft.failures) == ["GLACITE"]
+
+
+def test_order_picks_the_snapshot_field():
+    craft = CraftCostEngine({"X": {"Y": 3}}, lambda item_id: {"buyPrice": 10, "sellPrice": 7}, "buy-order")
+    assert craft.cost("X")[0] == 21
+    with pytest.raises(ValueError):
+        CraftCostEngine({}, None, "market")
@@ -0,0 +1,172 @@
+import json
+
+import pytest
+import requests
+
+import http_client
+import price_accessories
+from http_client import CircuitBreaker, CircuitOpenError, CoflClient
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(http_client.time, "monotonic", clock)
+    return clock
+
+
+def test_opens_after_threshold(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=60)
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow()
+
+
+def test_half_open_allows_one_trial(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.now += 59
+    assert not breaker.allow()
+    clock.now += 2
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+
+
+def test_trial_success_closes(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.now += 61
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_trial_failure_reopens_for_another_cooldown(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.now += 61
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.trial_running
+    assert not breaker.allow()
+    clock.now += 61
+    assert breaker.allow()
+
+
+class Response:
+    def __init__(self, status, body=None):
+        self.status_code = status
+        self.content = json.dumps(body).encode()
+        self.headers = {}
+        self.body = body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code), response=self)
+
+    def json(self):
+        return self.body
+
+
+class Session:
+    """Answers each get() with the next outcome: a Response or an exception to raise."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def client(session, breaker, retries=0):
+    c = CoflClient(retries=retries, breaker=breaker)
+    c.session = session
+    c.backoff = lambda attempt: 0
+    return c
+
+
+URL = "http://127.0.0.1/api/item/lowestbin/X"
+
+
+@pytest.mark.parametrize("error", [requests.TooManyRedirects("loop"), requests.exceptions.ChunkedEncodingError("cut")])
+def test_other_request_errors_end_the_trial(clock, error):
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.now += 61
+    c = client(Session(error, Response(200, {"ok": 1})), breaker)
+    with pytest.raises(type(error)):
+        c.get_json(URL)
+    assert not breaker.trial_running
+    with pytest.raises(CircuitOpenError):
+        c.get_json(URL)
+    clock.now += 61
+    assert c.get_json(URL) == {"ok": 1}
+    assert breaker.opened_at is None
+
+
+def test_connection_errors_are_retried(clock):
+    breaker = CircuitBreaker(threshold=10, cooldown=60)
+    session = Session(requests.ConnectionError("down"), Response(503), Response(200, [1]))
+    assert client(session, breaker, retries=2).get_json(URL) == [1]
+    assert session.calls == 3
+    assert breaker.failures == 0
+
+
+def test_throttling_does_not_open_the_breaker(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    with pytest.raises(requests.HTTPError):
+        client(Session(Response(429)), breaker).get_json(URL)
+    assert breaker.allow()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """price_accessories without a cache, history or rate limiter; records polite_delay sleeps."""
+    slept = []
+    monkeypatch.setattr(price_accessories, "response_cache", None)
+    monkeypatch.setattr(price_accessories, "price_history", None)
+    monkeypatch.setattr(price_accessories, "rate_limiter", None)
+    monkeypatch.setattr(price_accessories.metrics, "sleep", lambda seconds, label: slept.append(label))
+    return slept
+
+
+def test_no_polite_delay_after_a_fast_fail(clock, sleeps, monkeypatch):
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.record_failure()
+    session = Session()
+    monkeypatch.setattr(http_client, "client", client(session, breaker))
+    with pytest.raises(CircuitOpenError):
+        price_accessories.fetch_price("X", "X")
+    assert session.calls == 0
+    assert sleeps == []
+
+
+def test_polite_delay_after_a_real_failure(clock, sleeps, monkeypatch):
+    breaker = CircuitBreaker(threshold=5, cooldown=60)
+    monkeypatch.setattr(http_client, "client", client(Session(requests.ConnectionError("down")), breaker))
+    with pytest.raises(requests.ConnectionError):
+        price_accessories.fetch_price("X", "X")
+    assert sleeps == ["polite_delay"]
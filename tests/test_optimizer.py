@@ -0,0 +1,83 @@
+import itertools
+import random
+from math import inf
+
+import pytest
+
+import talisman
+
+
+def random_case(seed):
+    """Small choice groups plus the parsed rows their options point at."""
+    rng = random.Random(seed)
+    parsed, groups = [], []
+    for g in range(rng.randint(1, 4)):
+        options = []
+        for k in range(rng.randint(1, 3)):
+            options.append((rng.randint(1, 50), rng.randint(1, 6), False, len(parsed)))
+            parsed.append({"name": f"item {g}-{k}", "rarity": "COMMON"})
+        groups.append(options)
+    return parsed, groups
+
+
+def brute_force(groups):
+    """{mp: cheapest cost} over every way of taking at most one option per group."""
+    best = {}
+    for choice in itertools.product(*[[None] + options for options in groups]):
+        picked = [option for option in choice if option is not None]
+        mp = sum(option[1] for option in picked)
+        cost = sum(option[0] for option in picked)
+        best[mp] = min(best.get(mp, inf), cost)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_min_cost_matches_brute_force(seed):
+    _, groups = random_case(seed)
+    min_cost, _ = talisman.solve_min_cost(groups)
+    assert {m: c for m, c in enumerate(min_cost) if c < inf} == brute_force(groups)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_reconstructed_plan_hits_target(seed):
+    parsed, groups = random_case(seed)
+    min_cost, picks = talisman.solve_min_cost(groups)
+    for m, cost in enumerate(min_cost):
+        if cost == inf:
+            continue
+        plan = talisman.reconstruct_plan(parsed, groups, picks, m)
+        assert sum(row["mp"] for row in plan) == m
+        assert sum(row["price"] for row in plan) == cost
+        groups_used = [row["name"].split("-")[0] for row in plan]
+        assert len(groups_used) == len(set(groups_used))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_budget_picks_most_mp_affordable(seed):
+    _, groups = random_case(seed)
+    min_cost, _ = talisman.solve_min_cost(groups)
+    frontier = talisman.mp_frontier(min_cost)
+    best = brute_force(groups)
+    for budget in range(0, sum(max(o[0] for o in options) for options in groups) + 2, 3):
+        expected = max(m for m, cost in best.items() if cost <= budget)
+        assert talisman.best_mp_for_budget(frontier, budget) == expected
+
+
+def test_recomb_option_only_when_it_adds_mp():
+    parsed = [
+        {"id": "A_TALISMAN", "name": "A", "rarity": "RARE", "price": 100, "mp": 8},
+        {"id": "B_TALISMAN", "name": "B", "rarity": "MYTHIC", "price": 100, "mp": 22},
+    ]
+    index = talisman.FamilyIndex(item["id"] for item in parsed)
+    options = [o for group in talisman.accessory_options(parsed, 50, index) for o in group]
+    assert (150, 8 + talisman.recombobulate["RARE"], True, 0) in options
+    mythic_recombs = [o for o in options if o[3] == 1 and o[2]]
+    assert bool(mythic_recombs) == (talisman.recombobulate.get("MYTHIC", 0) > 0)
+    # Without a Recombobulator price nothing is offered recombobulated
+    assert not any(o[2] for group in talisman.accessory_options(parsed, None, index) for o in group)
+
+
+@pytest.mark.parametrize("text, coins", [("250M", 250_000_000), ("1.5b", 1_500_000_000), ("750k", 750_000),
+                                         ("1,200,000", 1_200_000)])
+def test_parse_coins(text, coins):
+    assert talisman.parse_coins(text) == coins
@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from pipeline import FileHasher, Pipeline, Stage, local_imports
+
+# Upper-cases argv[1] into argv[2] (via a helper module); exits 1 if the input says FAIL
+SCRIPT = """import sys
+from helper import transform
+text = open(sys.argv[1]).read()
+if "FAIL" in text:
+    sys.exit(1)
+open(sys.argv[2], "w").write(transform(text))
+"""
+HELPER = """def transform(text):
+    return text.upper()
+"""
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "upper.py").write_text(SCRIPT)
+    (tmp_path / "helper.py").write_text(HELPER)
+    (tmp_path / "src.txt").write_text("hello")
+    return tmp_path
+
+
+def stages(workdir, b_config=None):
+    script = str(workdir / "upper.py")
+    a = Stage("a", script, ["src.txt"], ["mid.txt"], config={}, args=["src.txt", "mid.txt"])
+    b = Stage("b", script, ["mid.txt"], ["out.txt"], config=b_config or {}, args=["mid.txt", "out.txt"])
+    b.upstream = {"a"}
+    return [a, b]
+
+
+def run(workdir, **kw):
+    b_config = kw.pop("b_config", None)
+    return Pipeline(stages(workdir, b_config), state_file=str(workdir / "state.json"), jobs=2, **kw).run()
+
+
+def test_first_run_then_up_to_date(workdir):
+    assert run(workdir) == {"a": "ran", "b": "ran"}
+    assert (workdir / "out.txt").read_text() == "HELLO"
+    assert run(workdir) == {"a": "up to date", "b": "up to date"}
+
+
+def test_touch_without_change_is_up_to_date(workdir):
+    run(workdir)
+    st = os.stat("src.txt")
+    os.utime("src.txt", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert run(workdir) == {"a": "up to date", "b": "up to date"}
+
+
+def test_input_change_reruns_downstream(workdir):
+    run(workdir)
+    (workdir / "src.txt").write_text("changed")
+    assert run(workdir) == {"a": "ran", "b": "ran"}
+    assert (workdir / "out.txt").read_text() == "CHANGED"
+
+
+def test_helper_module_change_reruns_stage(workdir):
+    run(workdir)
+    (workdir / "helper.py").write_text(HELPER.replace("upper", "swapcase"))
+    assert run(workdir) == {"a": "ran", "b": "ran"}
+    assert (workdir / "out.txt").read_text() == "hello"
+
+
+def test_local_imports_are_transitive(workdir):
+    (workdir / "helper.py").write_text("import os\nimport inner\n" + HELPER)
+    (workdir / "inner.py").write_text("from helper import transform\n")
+    assert local_imports(str(workdir / "upper.py")) == [str(workdir / "helper.py"), str(workdir / "inner.py")]
+
+
+def test_config_change_reruns_only_that_stage(workdir):
+    run(workdir)
+    assert run(workdir, b_config={"edited": True}) == {"a": "up to date", "b": "ran"}
+
+
+def test_modified_output_reruns_stage(workdir):
+    run(workdir)
+    (workdir / "out.txt").write_text("tampered")
+    assert run(workdir) == {"a": "up to date", "b": "ran"}
+
+
+def test_dry_run_propagates_downstream(workdir):
+    run(workdir)
+    (workdir / "src.txt").write_text("changed")
+    assert run(workdir, dry_run=True) == {"a": "would run", "b": "would run"}
+    assert (workdir / "out.txt").read_text() == "HELLO"
+
+
+def test_failure_blocks_downstream(workdir):
+    (workdir / "src.txt").write_text("FAIL")
+    assert run(workdir) == {"a": "failed", "b": "blocked"}
+    assert not (workdir / "out.txt").exists()
+
+
+def test_force(workdir):
+    run(workdir)
+    assert run(workdir, force=["b"]) == {"a": "up to date", "b": "ran"}
+
+
+def test_hasher_reuses_digest_for_same_stamp(workdir):
+    hasher = FileHasher()
+    digest = hasher.fingerprint("src.txt")
+    assert FileHasher(hasher.known).fingerprint("src.txt") == digest
+    assert hasher.fingerprint("missing.txt") is None
@@ -0,0 +1,28 @@
+import json
+import os
+
+import plan_shards
+
+PLAN = [{"name": f"Item {i}", "rarity": ["COMMON", "EPIC"][i % 2], "price": i * 400_000, "mp": 3, "coinsPerMP": 1}
+        for i in range(60)]
+
+
+def test_without_brotli_warns_once_and_lists_gzip_only(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(plan_shards, "brotli", None)
+    monkeypatch.setattr(plan_shards, "_warned_no_brotli", False)
+    index = plan_shards.write_shards(PLAN, str(tmp_path))
+    plan_shards.write_shards(PLAN, str(tmp_path))
+    assert capsys.readouterr().out.count("brotli is not installed") == 1
+    assert index["encodings"] == ["gzip"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".br")]
+
+
+def test_shards_hold_every_row_once(tmp_path):
+    index = plan_shards.write_shards(PLAN, str(tmp_path), summary_rows=10, page_rows=8)
+    pages = [shard for shard in index["shards"] if shard["kind"] == "page"]
+    ranks = []
+    for shard in pages:
+        with open(tmp_path / shard["file"], encoding="utf-8") as f:
+            ranks.extend(row["rank"] for row in json.load(f)["rows"])
+    assert sorted(ranks) == list(range(len(PLAN)))
+    assert all(shard["rows"] <= 8 for shard in pages)
@@ -0,0 +1,45 @@
+import pytest
+
+import planner_server
+import talisman
+from catalog import Catalog
+
+ROWS = [
+    {"id": "SPEED_TALISMAN", "name": "Speed Talisman", "rarity": "COMMON", "auction_price": 1000},
+    {"id": "SPEED_RING", "name": "Speed Ring", "rarity": "UNCOMMON", "auction_price": 5000},
+    {"id": "HEGEMONY_ARTIFACT", "name": "Hegemony Artifact", "rarity": "LEGENDARY", "auction_price": 90_000_000},
+]
+
+
+@pytest.fixture
+def client():
+    state = planner_server.PlannerState(Catalog.from_dicts(ROWS), Catalog.from_dicts(ROWS), 0, 500)
+    holder = planner_server.StateHolder(loader=lambda: state)
+    return planner_server.create_app(holder).test_client()
+
+
+@pytest.mark.parametrize("text", ["inf", "-inf", "nan", "1e400", "lots"])
+def test_parse_coins_rejects_non_finite(text):
+    with pytest.raises(ValueError):
+        talisman.parse_coins(text)
+
+
+@pytest.mark.parametrize("budget", ["inf", "1e400", "nan", "lots"])
+def test_bad_budget_is_a_400(client, budget):
+    resp = client.get("/plan", query_string={"budget": budget})
+    assert resp.status_code == 400
+    assert budget in resp.get_json()["error"]
+
+
+def test_budget_cuts_the_plan(client):
+    full = client.get("/plan").get_json()
+    assert full[-1]["name"] == "Hegemony Artifact"
+    cut = client.get("/plan", query_string={"budget": "1m"}).get_json()
+    assert cut == talisman.plan_within_budget(full, 1_000_000)
+    assert "Hegemony Artifact" not in [row["name"] for row in cut]
+
+
+def test_revalidation_is_a_304(client):
+    first = client.get("/plan", query_string={"budget": "1m"})
+    again = client.get("/plan", query_string={"budget": "1m"}, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
@@ -0,0 +1,63 @@
+import pytest
+
+from price_history import PriceHistory, robust_estimate
+
+
+def test_outlier_rejected_by_mad():
+    est = robust_estimate([95, 98, 99, 100, 101, 102, 105, 5000])
+    assert est["count"] == 8
+    assert est["outliers"] == 1
+    assert est["median"] == 100
+    assert 98 <= est["trimmed_mean"] <= 102
+
+
+def test_zero_mad_rejects_nothing():
+    est = robust_estimate([100, 100, 100, 500])
+    assert est["mad"] == 0
+    assert est["outliers"] == 0
+
+
+def test_trimmed_mean_cuts_both_ends():
+    est = robust_estimate(list(range(1, 11)), trim=0.1)
+    assert est["trimmed_mean"] == pytest.approx(sum(range(2, 10)) / 8)
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = PriceHistory(str(tmp_path / "history.sqlite"), window_sales=5, window_days=14)
+    yield store
+    store.close()
+
+
+def test_sales_deduplicated_by_uuid(history):
+    sales = [(f"u{i}", 100 + i, 1_000_000 + i) for i in range(3)]
+    assert history.record_sales("ITEM", sales) == 3
+    assert history.record_sales("ITEM", sales + [("u9", 200, 1_000_009)]) == 1
+    assert history.estimate("ITEM")["count"] == 4
+
+
+def test_window_keeps_newest_sales(history):
+    history.record_sales("ITEM", [(f"u{i}", 1000 if i < 5 else 10, 1_000_000 + i) for i in range(10)])
+    est = history.estimate("ITEM")
+    assert est["count"] == 5
+    assert est["median"] == 10
+
+
+def test_window_drops_sales_older_than_window_days(history):
+    day = 86400
+    history.record_sales("ITEM", [("old", 9999, 0), ("a", 10, 30 * day), ("b", 12, 30 * day + 1)])
+    assert history.estimate("ITEM")["count"] == 2
+
+
+def test_estimates_are_per_tier_and_kind(history):
+    history.record_sales("RUNEBOOK", [("a", 10, 1)], tier="RARE")
+    history.record_bin("RUNEBOOK", 50)
+    assert history.estimate("RUNEBOOK", tier="RARE")["median"] == 10
+    assert history.estimate("RUNEBOOK", kind="bin")["median"] == 50
+    assert history.estimate("RUNEBOOK") is None
+
+
+def test_max_age(history):
+    history.record_bin("ITEM", 50)
+    assert history.estimate("ITEM", kind="bin", max_age=3600) is not None
+    assert history.estimate("ITEM", kind="bin", max_age=-1) is None
@@ -0,0 +1,36 @@
+import pytest
+
+import price_accessories
+
+TIERS = {"a": "RARE", "b": "EPIC", "c": "RARE", "d": "EPIC", "e": "RARE"}
+
+
+@pytest.fixture
+def overview(monkeypatch):
+    """Serve `entries` as the recent-sales overview and TIERS as auction details."""
+    entries = []
+    monkeypatch.setattr(price_accessories, "get_json", lambda url: entries)
+    monkeypatch.setattr(price_accessories, "fetch_auction_tier", lambda uuid: TIERS[uuid])
+    monkeypatch.setattr(price_accessories, "price_history", None)
+    return entries
+
+
+def test_sales_partitioned_by_tier(overview):
+    overview.extend({"uuid": u, "price": p} for u, p in zip("abcde", (100, 900, 300, 1100, 200)))
+    assert price_accessories.fetch_sold_auctions_by_tier("RUNEBOOK", ["Rare", "Epic"]) == \
+        {"Rare": 200, "Epic": 1000}
+
+
+def test_stops_once_every_tier_has_enough(overview, monkeypatch):
+    looked_up = []
+    monkeypatch.setattr(price_accessories, "fetch_auction_tier", lambda uuid: looked_up.append(uuid) or TIERS[uuid])
+    overview.extend({"uuid": u, "price": 100} for u in "abcde")
+    price_accessories.fetch_sold_auctions_by_tier("RUNEBOOK", ["RARE", "EPIC"], max_matches=1)
+    assert looked_up == ["a", "b"]
+
+
+@pytest.mark.parametrize("bad", [{"uuid": "b"}, {"uuid": "b", "price": None}, {"uuid": "b", "price": "lots"}])
+def test_malformed_entry_is_skipped(overview, bad):
+    overview.extend([{"uuid": "a", "price": 100}, bad, {"uuid": "d", "price": 500}])
+    assert price_accessories.fetch_sold_auctions_by_tier("RUNEBOOK", ["RARE", "EPIC"]) == \
+        {"RARE": 100, "EPIC": 500}
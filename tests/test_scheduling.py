@@ -0,0 +1,146 @@
+import json
+import time
+
+import pytest
+
+import price_accessories
+from catalog import Accessory, Catalog, Rarity, load_catalog
+
+OLD = "2020-01-01T00:00:00+00:00"
+
+
+def priced(item_id, price, rarity=Rarity.RARE, at=OLD):
+    acc = Accessory(item_id, item_id.title(), rarity, auction_price=price)
+    acc.price_source = "cofl_recent"
+    acc.priced_at = at
+    return acc
+
+
+def fake_price_accessory(delay=0.0, calls=None):
+    """Stand-in for price_accessory: prices an entry at 1000 after `delay` seconds."""
+    def price(acc):
+        if calls is not None:
+            calls.append(acc.id)
+        time.sleep(delay)
+        acc.auction_price = 1000
+        price_accessories.stamp(acc, "cofl_recent")
+        return [acc]
+    return price
+
+
+# --- Checkpoints ---
+
+def test_checkpoint_keeps_previous_prices():
+    kept = priced("KEPT", 5)
+    fetched_input, stale_input, new_input = (Accessory(i, i.title(), Rarity.RARE) for i in ("FETCHED", "STALE", "NEW"))
+    previous = Catalog([priced("FETCHED", 10), priced("STALE", 20)])
+    fetched = priced("FETCHED", 11, at="2026-01-01T00:00:00+00:00")
+
+    rows = price_accessories.checkpoint_rows(
+        [[kept], None, None, None], [1, 2, 3], [fetched_input, stale_input, new_input], {0: [fetched]}, previous)
+
+    assert [(r.id, r.auction_price, r.priced_at) for r in rows] == [
+        ("KEPT", 5, OLD),
+        ("FETCHED", 11, "2026-01-01T00:00:00+00:00"),
+        ("STALE", 20, OLD),  # not reached: previous row, timestamp untouched
+        ("NEW", None, None),  # nothing to keep: input row, unpriced
+    ]
+
+
+def test_priced_since():
+    since = "2026-01-01T00:00:00+00:00"
+    assert price_accessories.priced_since([priced("A", 1, at="2026-01-01T00:00:05+00:00")], since)
+    assert not price_accessories.priced_since([priced("A", 1)], since)
+    assert not price_accessories.priced_since([], since)
+    failed = priced("A", 1, at="2026-01-02T00:00:00+00:00")
+    failed.fetch_error = "Timeout: x"
+    assert not price_accessories.priced_since([failed], since)
+
+
+# --- Scheduling ---
+
+def test_schedule_order_by_expected_coins_per_mp():
+    accessories = [
+        Accessory("PRICEY", "Pricey", Rarity.COMMON),     # 3000 / 3 MP
+        Accessory("CHEAP", "Cheap", Rarity.LEGENDARY),    # 1600 / 16 MP
+        Accessory("UNKNOWN", "Unknown", Rarity.COMMON),   # no price: median of COMMON
+        Accessory("MIDDLE", "Middle", Rarity.COMMON),     # 900 / 3 MP
+    ]
+    previous = Catalog([priced("PRICEY", 3000, Rarity.COMMON), priced("CHEAP", 1600, Rarity.LEGENDARY),
+                        priced("MIDDLE", 900, Rarity.COMMON)])
+    order = price_accessories.schedule_order(accessories, previous)
+    assert [accessories[k].id for k in order] == ["CHEAP", "MIDDLE", "UNKNOWN", "PRICEY"]
+
+
+def test_price_scheduled_follows_order_and_prices_copies(monkeypatch):
+    calls = []
+    monkeypatch.setattr(price_accessories, "price_accessory", fake_price_accessory(calls=calls))
+    accessories = [Accessory(f"ITEM_{i}", f"Item {i}", Rarity.RARE) for i in range(4)]
+    done = price_accessories.price_scheduled(accessories, [2, 0, 3, 1], workers=1)
+    assert calls == ["ITEM_2", "ITEM_0", "ITEM_3", "ITEM_1"]
+    assert sorted(done) == [0, 1, 2, 3]
+    assert all(acc.priced_at is None for acc in accessories)
+
+
+def test_price_scheduled_starts_nothing_after_deadline(monkeypatch):
+    calls = []
+    monkeypatch.setattr(price_accessories, "price_accessory", fake_price_accessory(calls=calls))
+    accessories = [Accessory("A", "A", Rarity.RARE)]
+    assert price_accessories.price_scheduled(accessories, [0], deadline=time.monotonic() - 1) == {}
+    assert calls == []
+
+
+def test_waiting_past_deadline_does_not_spin(monkeypatch):
+    monkeypatch.setattr(price_accessories, "price_accessory", fake_price_accessory(delay=0.5))
+    accessories = [Accessory(f"ITEM_{i}", f"Item {i}", Rarity.RARE) for i in range(4)]
+    cpu = time.process_time()
+    done = price_accessories.price_scheduled(accessories, range(4), workers=2, deadline=time.monotonic() + 0.05)
+    assert sorted(done) == [0, 1]  # the two in flight at the deadline finish
+    assert time.process_time() - cpu < 0.2
+
+
+# --- Budgeted runs and resuming ---
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(price_accessories, "INPUT_FILE", "clean.json")
+    monkeypatch.setattr(price_accessories, "OUTPUT_FILE", "fixed.json")
+    monkeypatch.setattr(price_accessories, "RESUME_FILE", "fixed.resume.json")
+    monkeypatch.setattr(price_accessories, "craft_engine", None)
+    ids = [f"ITEM_{i}" for i in range(6)]
+    with open("clean.json", "w", encoding="utf-8") as f:
+        json.dump([{"id": i, "name": i.title(), "rarity": "RARE"} for i in ids], f)
+    with open("fixed.json", "w", encoding="utf-8") as f:
+        json.dump([priced(i, 500).to_dict() for i in ids], f)
+    return ids
+
+
+def test_budget_keeps_previous_prices_and_resumes_without_refresh(files, monkeypatch):
+    monkeypatch.setattr(price_accessories, "price_accessory", fake_price_accessory(delay=0.25))
+    price_accessories.fix_missing_prices(budget=0.6)
+
+    rows = load_catalog("fixed.json").records
+    fresh = [r.id for r in rows if r.priced_at != OLD]
+    assert 1 <= len(fresh) < len(files)
+    assert all(r.auction_price == 500 for r in rows if r.priced_at == OLD)
+    assert price_accessories.load_resume() is not None
+
+    calls = []
+    monkeypatch.setattr(price_accessories, "price_accessory", fake_price_accessory(calls=calls))
+    price_accessories.fix_missing_prices()
+
+    assert sorted(calls) == sorted(set(files) - set(fresh))
+    assert all(r.auction_price == 1000 and r.priced_at != OLD for r in load_catalog("fixed.json").records)
+    assert price_accessories.load_resume() is None
+
+
+def test_no_resume_prices_everything(files, monkeypatch):
+    monkeypatch.setattr(price_accessories, "price_accessory", fake_price_accessory())
+    price_accessories.fix_missing_prices(budget=0)
+    assert all(r.auction_price == 500 for r in load_catalog("fixed.json").records)
+
+    calls = []
+    monkeypatch.setattr(price_accessories, "price_accessory", fake_price_accessory(calls=calls))
+    price_accessories.fix_missing_prices(resume=False)
+    assert sorted(calls) == files
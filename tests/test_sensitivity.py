@@ -0,0 +1,54 @@
+import json
+import random
+from math import inf, nextafter
+
+import pytest
+
+import talisman
+from accessory_families import FamilyIndex
+from catalog import Accessory, Rarity
+
+RARITIES = ["COMMON", "UNCOMMON", "RARE", "EPIC", "LEGENDARY", "MYTHIC", "SPECIAL"]
+
+
+def random_ranking(seed):
+    """Ranked purchases over a few upgrade lines and loose accessories, with round prices so breakpoints collide."""
+    rng = random.Random(seed)
+    rows = []
+    for line in range(rng.randint(1, 5)):
+        for tier in rng.sample(["TALISMAN", "RING", "ARTIFACT"], rng.randint(1, 3)):
+            rows.append(Accessory(f"LINE{line}_{tier}", f"Line {line} {tier}", Rarity[rng.choice(RARITIES)],
+                                  rng.randint(1, 20) * 1000))
+    for k in range(rng.randint(0, 12)):
+        rows.append(Accessory(f"LOOSE_{k}", f"Loose {k}", Rarity[rng.choice(RARITIES)], rng.randint(1, 20) * 1000))
+    parsed = talisman.parse_accessories(rows)
+    return talisman.rank_by_family(parsed, FamilyIndex(item["id"] for item in parsed))
+
+
+def probe_prices(ranges):
+    """Every breakpoint, one coin (and one float step) either side of it, and prices past the last one."""
+    prices = {0, 1}
+    for r in ranges:
+        b = r["from"]
+        prices.update({b, b - 1, b + 1, nextafter(b, -inf), nextafter(b, inf)})
+    top = ranges[-1]["from"]
+    prices.update({top + 1, top * 2 + 1, 10**9})
+    return sorted(p for p in prices if p >= 0)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_table_matches_build_plan(seed):
+    ranked = random_ranking(seed)
+    ranges = talisman.recomb_sensitivity(ranked)
+    # Read back from JSON, the way the saved table is used
+    table = json.loads(json.dumps({"rows": [talisman.accessory_row(item) for item in ranked], "ranges": ranges}))
+    for price in probe_prices(table["ranges"]):
+        assert talisman.plan_for_recomb_price(table, price) == talisman.build_plan(ranked, price, verbose=False), price
+
+
+def test_ranges_cover_every_price():
+    ranges = talisman.recomb_sensitivity(random_ranking(3))
+    assert ranges[0]["from"] == 0 and ranges[-1]["to"] is None
+    for below, above in zip(ranges, ranges[1:]):
+        assert below["to"] == above["from"]
+        assert below["recombs"] != above["recombs"]
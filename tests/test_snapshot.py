@@ -0,0 +1,102 @@
+import json
+import os
+import random
+
+import pytest
+
+import talisman
+from accessory_families import FamilyIndex
+from catalog import (Accessory, Catalog, Rarity, load_catalog, open_snapshot, save_records, save_snapshot,
+                     snapshot_path, snapshot_records)
+
+
+def sample_records():
+    rng = random.Random(0)
+    rarities = list(Rarity)[:6] + [None]
+    records = []
+    for i in range(120):
+        acc = Accessory(f"ITEM_{i % 40}_{['TALISMAN', 'RING', 'ARTIFACT'][i // 40]}", f"Item {i}",
+                        rng.choice(rarities))
+        kind = rng.random()
+        if kind < 0.5:
+            acc.auction_price = rng.randint(1_000, 10_000_000)
+        elif kind < 0.7:
+            acc.craft_price = rng.uniform(1_000, 1_000_000)
+        elif kind < 0.8:
+            acc.npc_price = rng.randint(50, 500)
+        if rng.random() < 0.3:
+            acc.bin_price = rng.randint(1_000, 10_000_000)
+        if rng.random() < 0.2:
+            acc.price_source = "cofl_recent"
+            acc.priced_at = "2026-01-01T00:00:00+00:00"
+        records.append(acc)
+    return records
+
+
+def read_json(path):
+    """The JSON side on its own; load_catalog() would pick up a snapshot beside it."""
+    with open(path, "r", encoding="utf-8") as f:
+        return Catalog.from_dicts(json.load(f))
+
+
+@pytest.fixture
+def files(tmp_path):
+    records = sample_records()
+    json_path, snap_path = str(tmp_path / "fixed.json"), str(tmp_path / "other.snap")
+    save_records(records, json_path)
+    save_snapshot(records, snap_path)
+    snapshot = open_snapshot(snap_path)
+    yield json_path, snapshot
+    snapshot.close()
+
+
+def test_records_round_trip(files):
+    json_path, snapshot = files
+    assert [acc.to_dict() for acc in snapshot_records(snapshot)] == \
+        [acc.to_dict() for acc in read_json(json_path)]
+
+
+@pytest.mark.parametrize("policy", ["min", "bin", "median"])
+def test_snapshot_parses_like_json(files, monkeypatch, policy):
+    json_path, snapshot = files
+    monkeypatch.setattr(talisman, "price_policy", policy)
+    assert talisman.parse_snapshot(snapshot) == talisman.parse_accessories(read_json(json_path))
+
+
+def test_snapshot_plan_equals_json_plan(files):
+    json_path, snapshot = files
+
+    def plan(parsed):
+        index = FamilyIndex(item["id"] for item in parsed)
+        return talisman.build_plan(talisman.rank_by_family(parsed, index), 250_000, verbose=False)
+
+    assert plan(talisman.parse_snapshot(snapshot)) == plan(talisman.parse_accessories(read_json(json_path)))
+
+
+def test_load_catalog_prefers_a_fresh_snapshot(tmp_path):
+    json_path = str(tmp_path / "fixed.json")
+    records = sample_records()
+    save_records(records, json_path)
+    records[0].auction_price = 123
+    save_snapshot(records, snapshot_path(json_path))
+    assert list(load_catalog(json_path))[0].auction_price == 123
+
+
+def test_stale_snapshot_is_ignored(tmp_path):
+    json_path = str(tmp_path / "fixed.json")
+    records = sample_records()
+    save_records(records, json_path)
+    save_snapshot(records, snapshot_path(json_path))
+
+    # Hand edit after the snapshot was written
+    with open(json_path, "r", encoding="utf-8") as f:
+        rows = json.load(f)
+    rows[0]["auction_price"] = 456
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(rows, f)
+    snap_mtime = os.path.getmtime(snapshot_path(json_path))
+    os.utime(json_path, (snap_mtime + 1, snap_mtime + 1))
+
+    loaded = load_catalog(json_path)
+    assert list(loaded)[0].auction_price == 456
+    assert [acc.to_dict() for acc in loaded] == [acc.to_dict() for acc in read_json(json_path)]
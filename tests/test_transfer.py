@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+import transfer_accessories_copy as transfer
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A project folder with two of the published files and a shard folder."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(transfer, "files_to_copy", ["accessories.json", "accessory_plan.json", "missing.json"])
+    monkeypatch.setattr(transfer, "dirs_to_copy", ["plan_shards"])
+    (tmp_path / "accessories.json").write_text('[{"id": "A"}]')
+    (tmp_path / "accessory_plan.json").write_text("[]")
+    (tmp_path / "plan_shards").mkdir()
+    (tmp_path / "plan_shards" / "index.json").write_text('{"shards": 1}')
+    (tmp_path / "plan_shards" / "0.json").write_text("[1]")
+    return tmp_path
+
+
+def test_unchanged_destination_is_skipped(project, monkeypatch):
+    dest = str(project / "public")
+    assert transfer.transfer(dest) == 4
+    published = []
+    monkeypatch.setattr(transfer, "publish_file", lambda *args: published.append(args))
+    assert transfer.transfer(dest) == 0
+    assert published == []
+
+
+def test_is_current(project):
+    (project / "copy.json").write_text('[{"id": "A"}]')
+    (project / "other.json").write_text('[{"id": "B"}]')
+    assert transfer.is_current("accessories.json", "copy.json")
+    assert not transfer.is_current("accessories.json", "other.json")
+    assert not transfer.is_current("accessories.json", "nowhere.json")
+    os.link("accessories.json", "linked.json")
+    assert transfer.is_current("accessories.json", "linked.json")
+
+
+def test_falls_back_to_copy_when_links_fail(project, monkeypatch):
+    def no_link(src, dst):
+        raise OSError("cross-device link")
+    monkeypatch.setattr(transfer.os, "link", no_link)
+    assert transfer.publish_file("accessories.json", "out.json") == "copied"
+    assert (project / "out.json").read_text() == '[{"id": "A"}]'
+    assert not os.path.samefile("accessories.json", "out.json")
+    assert not os.path.exists("out.json.tmp")
+
+
+def test_links_where_possible(project):
+    assert transfer.publish_file("accessories.json", "out.json") == "linked"
+    assert os.path.samefile("accessories.json", "out.json")
+    assert transfer.publish_file("accessory_plan.json", "out.json", link=False) == "copied"
+    assert (project / "out.json").read_text() == "[]"
+
+
+def test_manifest_contents(project):
+    dest = project / "public"
+    transfer.transfer(str(dest))
+    manifest = json.loads((dest / transfer.MANIFEST_FILE).read_text())
+    assert sorted(manifest["files"]) == ["accessories.json", "accessory_plan.json", "plan_shards/index.json"]
+    for name, entry in manifest["files"].items():
+        data = (dest / name).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        assert entry == {"sha256": digest, "size": len(data), "url": f"{name}?v={digest[:12]}"}
+    digests = "".join(entry["sha256"] for entry in manifest["files"].values())
+    assert manifest["version"] == hashlib.sha256(digests.encode("ascii")).hexdigest()[:12]
+    assert not transfer.write_manifest(str(dest), transfer.files_to_copy + ["plan_shards/index.json"])
+
+
+def test_removed_shards_are_dropped(project):
+    dest = project / "public"
+    transfer.transfer(str(dest))
+    os.remove(project / "plan_shards" / "0.json")
+    assert transfer.transfer(str(dest)) == 1
+    assert sorted(os.listdir(dest / "plan_shards")) == ["index.json"]
@@ -1,5 +1,8 @@
-import shutil
+import argparse
+import hashlib
+import json
 import os
+import shutil
 
 # List of JSON files to copy
 files_to_copy = [
@@ -10,16 +13,145 @@ files_to_copy = [
     "accessory_plan.json"
 ]
 
+# Folders published file by file (the plan shards written by talisman.py)
+dirs_to_copy = [
+    "plan_shards"
+]
+
 # Destination folder
 destination = os.path.join("accessory-planner", "public")
 
-# Copy each file
-for file_name in files_to_copy:
-    src_path = os.path.join(os.getcwd(), file_name)
-    dest_path = os.path.join(destination, file_name)
+# Written beside the published files: hash and size of each, for cache-busting in the frontend
+MANIFEST_FILE = "manifest.json"
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def is_current(src_path, dest_path):
+    """True if dest_path already holds the same bytes as src_path."""
+    if not os.path.exists(dest_path):
+        return False
+    if os.path.samefile(src_path, dest_path):
+        return True  # hardlinked by an earlier run
+    if os.path.getsize(src_path) != os.path.getsize(dest_path):
+        return False
+    return file_digest(src_path) == file_digest(dest_path)
+
+
+def publish_file(src_path, dest_path, link=True):
+    """
+    Put src_path at dest_path with a single rename, so the dev server never
+    serves a half-written file. The temp file is a hardlink where the
+    filesystem allows it (the producing scripts replace their outputs rather
+    than rewrite them, so a link never changes under the server), else a copy.
+    Returns "linked" or "copied".
+    """
+    tmp = dest_path + ".tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    how = "copied"
+    if link:
+        try:
+            os.link(src_path, tmp)
+            how = "linked"
+        except OSError:
+            pass
+    if how == "copied":
+        shutil.copy2(src_path, tmp)
+    os.replace(tmp, dest_path)
+    return how
+
+
+def write_manifest(dest_dir, names):
+    """Write MANIFEST_FILE for the published `names`; returns False if it was already up to date."""
+    path = os.path.join(dest_dir, MANIFEST_FILE)
+    files = {}
+    for name in names:
+        published = os.path.join(dest_dir, name)
+        if os.path.exists(published):
+            digest = file_digest(published)
+            files[name] = {
+                "sha256": digest,
+                "size": os.path.getsize(published),
+                "url": f"{name}?v={digest[:12]}",
+            }
+    manifest = {
+        "version": hashlib.sha256("".join(f["sha256"] for f in files.values()).encode("ascii")).hexdigest()[:12],
+        "files": files,
+    }
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if json.load(f) == manifest:
+                return False
+    except (FileNotFoundError, ValueError):
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+    return True
+
+
+def publish_dir(src_dir, dest_dir, link=True):
+    """Publish the files of src_dir into dest_dir and drop the ones src_dir no longer has; returns files changed."""
+    os.makedirs(dest_dir, exist_ok=True)
+    names = {name for name in os.listdir(src_dir) if os.path.isfile(os.path.join(src_dir, name))}
+    changed = 0
+    for name in sorted(names):
+        src_path, dest_path = os.path.join(src_dir, name), os.path.join(dest_dir, name)
+        if not is_current(src_path, dest_path):
+            publish_file(src_path, dest_path, link)
+            changed += 1
+    for name in os.listdir(dest_dir):
+        if name not in names and os.path.isfile(os.path.join(dest_dir, name)):
+            os.remove(os.path.join(dest_dir, name))
+            changed += 1
+    return changed
+
+
+def transfer(dest_dir=destination, link=True):
+    # Publish each file that changed since the last run
+    os.makedirs(dest_dir, exist_ok=True)
+    changed = 0
+    for file_name in files_to_copy:
+        src_path = os.path.join(os.getcwd(), file_name)
+        dest_path = os.path.join(dest_dir, file_name)
+
+        if not os.path.exists(src_path):
+            print(f"File {file_name} not found in project folder.")
+        elif is_current(src_path, dest_path):
+            print(f"{file_name} unchanged")
+        else:
+            how = publish_file(src_path, dest_path, link)
+            print(f"{how.capitalize()} {file_name} to {dest_dir}")
+            changed += 1
+
+    # Shard folders: each shard index goes into the manifest, the index carries the shard hashes
+    indexes = []
+    for dir_name in dirs_to_copy:
+        if not os.path.isdir(dir_name):
+            print(f"Folder {dir_name} not found in project folder.")
+            continue
+        count = publish_dir(dir_name, os.path.join(dest_dir, dir_name), link)
+        print(f"{dir_name}/: {count} files updated" if count else f"{dir_name}/ unchanged")
+        changed += count
+        indexes.append(f"{dir_name}/index.json")
+
+    if write_manifest(dest_dir, files_to_copy + indexes):
+        print(f"Updated {MANIFEST_FILE}")
+    print(f"{changed} files published")
+    return changed
+
 
-    if os.path.exists(src_path):
-        shutil.copy(src_path, dest_path)
-        print(f"Copied {file_name} to {destination}")
-    else:
-        print(f"File {file_name} not found in project folder.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish the JSON files to the accessory planner frontend.")
+    parser.add_argument("--dest", default=destination, help=f"folder to publish into (default {destination})")
+    parser.add_argument("--no-link", action="store_true", help="always copy instead of hardlinking")
+    args = parser.parse_args()
+    transfer(args.dest, link=not args.no_link)